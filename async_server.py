@@ -0,0 +1,148 @@
+"""asyncio front end for the conversion service
+
+    python async_server.py [--host 0.0.0.0] [--port 8080]
+
+Serves the same POST /convert as server.py on aiohttp. The multipart
+upload is spooled to disk CHUNK_SIZE bytes at a time and the converted
+style is streamed back with chunked transfer encoding, so the memory a
+request holds is bounded by CHUNK_SIZE whatever the file size. The
+conversion itself runs on the service.WorkerPool processes; the event
+loop only waits for it on a thread.
+
+Only jobs the pool has admitted take a thread of the job executor, which
+is sized to the pool's capacity, so a full queue is answered with 429 at
+once. Uploads are hashed on the loop's default executor, and identical
+requests in flight await the leader's task on the loop (AsyncSingleFlight)
+instead of each blocking a thread.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import aiofiles
+from aiohttp import web
+
+from cache import ResultCache
+from service import AsyncSingleFlight, JobFailed, JobTimeout, PoolBusy, WorkerPool, convert_cached_async
+from sff import SFFError
+
+CHUNK_SIZE = 256 * 1024
+
+# Upload form fields and the names they are spooled under
+UPLOAD_FIELDS = {"aus": "input.aus", "template": "template.sty"}
+
+
+async def spool_upload(part, path):
+    """Write one multipart field to path in CHUNK_SIZE pieces; returns the byte count"""
+    size = 0
+    async with aiofiles.open(path, "wb") as f:
+        while True:
+            chunk = await part.read_chunk(CHUNK_SIZE)
+            if not chunk:
+                return size
+            await f.write(chunk)
+            size += len(chunk)
+
+
+async def stream_file(request, f, name):
+    """Send an open file to the client in CHUNK_SIZE pieces with chunked transfer encoding"""
+    response = web.StreamResponse(headers={"Content-Type": "application/octet-stream",
+                                           "Content-Disposition": f'attachment; filename="{name}"'})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    async with aiofiles.open(f.fileno(), "rb", closefd=False) as reader:
+        while True:
+            chunk = await reader.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            await response.write(chunk)
+    await response.write_eof()
+    return response
+
+
+def error_response(status, message, headers=None):
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+async def convert(request):
+    """Spool the upload, convert it on a pool worker and stream the STY back"""
+    if not request.content_type.startswith("multipart/"):
+        return error_response(400, 'Expected a multipart upload with an "aus" file')
+    work_dir = tempfile.mkdtemp(prefix="convert-")
+    try:
+        paths = {}
+        filename = None
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name in UPLOAD_FIELDS and part.name not in paths:
+                paths[part.name] = os.path.join(work_dir, UPLOAD_FIELDS[part.name])
+                await spool_upload(part, paths[part.name])
+                if part.name == "aus":
+                    filename = part.filename
+        if "aus" not in paths:
+            return error_response(400, 'Missing "aus" file upload')
+
+        output_path = os.path.join(work_dir, "output.sty")
+        try:
+            app = request.app
+            result = await convert_cached_async(app["pool"], app["cache"], app["flights"], app["executor"],
+                                                paths["aus"], output_path, paths.get("template"))
+        except PoolBusy as e:
+            return error_response(429, str(e), {"Retry-After": str(e.retry_after)})
+        except JobTimeout as e:
+            return error_response(504, str(e))
+        except SFFError as e:
+            return error_response(422, f"Invalid chunk structure: {e}")
+        except JobFailed as e:
+            return error_response(500, str(e))
+
+        name = os.path.splitext(os.path.basename(filename or "") or "converted")[0] + ".sty"
+        with result:
+            return await stream_file(request, result, name.replace('"', ""))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def stats(request):
+    app = request.app
+    return web.json_response({"pool": app["pool"].stats(), "cache": app["cache"].stats(),
+                              "flights": app["flights"].stats()})
+
+
+async def start_pool(app):
+    pool = WorkerPool.from_environment()
+    app["pool"] = pool
+    app["cache"] = ResultCache.from_environment()
+    app["flights"] = AsyncSingleFlight()
+    # One thread per admissible job; the pool turns the rest away before they need one
+    app["executor"] = ThreadPoolExecutor(max_workers=pool.workers + pool.queue_size)
+
+
+async def stop_pool(app):
+    app["pool"].close()
+    app["executor"].shutdown(wait=False)
+
+
+def make_app():
+    # Uploads are read with request.multipart(), so client_max_size does not cap their size
+    app = web.Application()
+    app.router.add_post("/convert", convert)
+    app.router.add_get("/stats", stats)
+    app.on_startup.append(start_pool)
+    app.on_cleanup.append(stop_pool)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asyncio AUS to STY conversion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
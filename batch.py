@@ -0,0 +1,192 @@
+"""Parallel batch conversion of a directory tree of AUS files
+
+    python batch.py library/ -o styles/ [-t template.sty] [-j 8] [--check hash]
+
+Every *.aus file under the source directory is converted with
+convert.convert_file into the same relative path under the output
+directory. Files are spread over a ProcessPoolExecutor; outputs that are
+already up to date are skipped, by modification time or, with --check
+hash, by a SHA-256 of the inputs recorded in a manifest next to them.
+With --cache, results are also looked up in and stored to the shared
+cache.ResultCache, so an AUS that was converted before (here or by the
+server) is copied instead of converted. A JSON summary with per-file
+timings is written when the run finishes.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import ResultCache
+from convert import convert_file
+
+MANIFEST_NAME = ".batch-manifest.json"
+HASH_BLOCK = 1024 * 1024
+
+
+def file_digest(path, seed=""):
+    """Return the SHA-256 hex digest of a file, optionally chained to seed"""
+    digest = hashlib.sha256(seed.encode("ascii"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_jobs(source_dir, output_dir, extension=".aus"):
+    """Return (input, output) paths for every AUS file under source_dir, in a stable order"""
+    jobs = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extension):
+                relative = os.path.relpath(os.path.join(root, name), source_dir)
+                jobs.append((os.path.join(root, name),
+                             os.path.join(output_dir, os.path.splitext(relative)[0] + ".sty")))
+    return jobs
+
+
+def convert_one(job):
+    """Worker: convert one file unless its output is up to date; returns a summary entry
+
+    job is (input, output, template, check, template_stamp, recorded_digest,
+    cache), where cache is a (directory, max_bytes) pair or None.
+    Runs in a worker process, so every error is reported in the entry
+    instead of being raised.
+    """
+    aus_path, output_path, template_path, check, template_stamp, recorded, cache_spec = job
+    started = time.perf_counter()
+    entry = {"input": aus_path, "output": output_path, "status": "converted", "size": 0}
+    try:
+        if check == "hash":
+            entry["digest"] = file_digest(aus_path, template_stamp)
+            up_to_date = recorded == entry["digest"] and os.path.exists(output_path)
+        elif check == "mtime":
+            up_to_date = (os.path.exists(output_path)
+                          and os.path.getmtime(output_path) >= max(os.path.getmtime(aus_path), template_stamp))
+        else:
+            up_to_date = False
+        if up_to_date:
+            entry["status"] = "skipped"
+            entry["size"] = os.path.getsize(output_path)
+        else:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            cache = ResultCache(*cache_spec) if cache_spec else None
+            key = cache.key(aus_path, template_path) if cache else None
+            if cache and cache.copy_to(key, output_path):
+                entry["status"] = "cached"
+                entry["size"] = os.path.getsize(output_path)
+            else:
+                entry["size"] = convert_file(aus_path, output_path, template_path).size
+                if cache:
+                    cache.put(key, output_path)
+    except Exception as e:
+        # One malformed file must not take the whole batch down with it
+        entry["status"] = "failed"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["elapsed"] = time.perf_counter() - started
+    return entry
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run_batch(source_dir, output_dir, template_path=None, workers=None, check="mtime", summary_path=None,
+              cache_dir=None, cache_size=1024 * 1024 * 1024):
+    """Convert every AUS file under source_dir and return the summary dict"""
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path) if check == "hash" else {}
+
+    # The template is shared by every job, so it is stamped once up front
+    template_stamp = 0
+    if check == "hash":
+        template_stamp = file_digest(template_path) if template_path else ""
+    elif check == "mtime" and template_path:
+        template_stamp = os.path.getmtime(template_path)
+
+    jobs = [(aus_path, output_path, template_path, check, template_stamp,
+             manifest.get(os.path.relpath(output_path, output_dir)),
+             (cache_dir, cache_size) if cache_dir else None)
+            for aus_path, output_path in find_jobs(source_dir, output_dir)]
+
+    # Hand files out in batches so thousands of small conversions do not pay one round trip each
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        entries = list(executor.map(convert_one, jobs, chunksize=chunksize))
+
+    counts = {"converted": 0, "cached": 0, "skipped": 0, "failed": 0}
+    for entry in entries:
+        counts[entry["status"]] += 1
+        if "digest" in entry and entry["status"] != "failed":
+            manifest[os.path.relpath(entry["output"], output_dir)] = entry["digest"]
+    elapsed = time.perf_counter() - started
+    summary = {
+        "source": source_dir,
+        "output": output_dir,
+        "template": template_path,
+        "workers": workers,
+        "check": check,
+        "elapsed": elapsed,
+        "cache": cache_dir,
+        "bytes_written": sum(entry["size"] for entry in entries if entry["status"] in ("converted", "cached")),
+        **counts,
+        "files": entries,
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    if check == "hash":
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    with open(summary_path or os.path.join(output_dir, "batch-summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert every AUS file under a directory to a style")
+    parser.add_argument("source", help="directory tree to search for .aus files")
+    parser.add_argument("-o", "--output", help="output directory (default: the source directory)")
+    parser.add_argument("-t", "--template",
+                        help="style whose sections are kept in every output (default: none, which copies "
+                             "each AUS after validating it)")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--check", choices=("mtime", "hash", "none"), default="mtime",
+                        help="how to detect outputs that are up to date (default: mtime)")
+    parser.add_argument("--summary", help="JSON summary path (default: OUTPUT/batch-summary.json)")
+    parser.add_argument("--cache", help="result cache directory shared with the conversion server")
+    parser.add_argument("--cache-size", type=int, default=1024 * 1024 * 1024,
+                        help="result cache size limit in bytes")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source):
+        print(f"batch: {args.source} is not a directory", file=sys.stderr)
+        return 2
+    try:
+        summary = run_batch(args.source, args.output or args.source, args.template, args.jobs,
+                            args.check, args.summary, args.cache, args.cache_size)
+    except OSError as e:
+        print(f"batch: {e}", file=sys.stderr)
+        return 1
+
+    for entry in summary["files"]:
+        if entry["status"] == "failed":
+            print(f"FAILED {entry['input']}: {entry['error']}", file=sys.stderr)
+    rate = summary["bytes_written"] / summary["elapsed"] / 1e6 if summary["elapsed"] else 0.0
+    print(f"{summary['converted']} converted, {summary['cached']} from cache, {summary['skipped']} up to date, "
+          f"{summary['failed']} failed "
+          f"in {summary['elapsed']:.2f} s with {summary['workers']} workers ({rate:.1f} MB/s)")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
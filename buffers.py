@@ -0,0 +1,505 @@
+"""Byte buffer types used by the viewers, the editor and the converter"""
+import bisect
+import mmap
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+
+def map_file(path):
+    """Map a file read-only into memory
+
+    Pages are only read from disk when a viewer touches them, so opening a
+    file costs no resident memory up front. Empty files cannot be mapped and
+    are returned as an empty bytes object.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# Windows cannot replace or delete a file while it is mapped, so map only where that is safe
+MMAP_BY_DEFAULT = sys.platform != "win32"
+
+
+def load_file(path, use_mmap=MMAP_BY_DEFAULT):
+    """Return the contents of path, memory-mapped or read into a bytes object"""
+    if use_mmap:
+        return map_file(path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_buffer(fileobj, data, block_size=1024 * 1024):
+    """Write data to fileobj in fixed-size blocks without materializing it"""
+    if isinstance(data, SegmentedBuffer):
+        data.write_to(fileobj, block_size)
+        return
+    view = memoryview(data)
+    for start in range(0, len(view), block_size):
+        fileobj.write(view[start:start + block_size])
+
+
+class SegmentedBuffer:
+    """Several buffers presented as one logical byte sequence
+
+    The buffer is a list of pieces, each a (source, start, end) range of an
+    underlying bytes/bytearray/mmap object. Nothing is copied when the buffer
+    is created; slicing and searching read straight from the sources.
+    Writes are copy-on-write: the affected range is split out of its piece
+    and replaced by a private copy, so the sources are never modified.
+    """
+
+    def __init__(self, segments=()):
+        self._pieces = []
+        self._starts = []
+        self._length = 0
+        for segment in segments:
+            if isinstance(segment, SegmentedBuffer):
+                for source, start, end in segment._pieces:
+                    self._append_piece(source, start, end)
+            else:
+                self._append_piece(segment, 0, len(segment))
+
+    def _append_piece(self, source, start, end):
+        if end > start:
+            self._pieces.append((source, start, end))
+            self._starts.append(self._length)
+            self._length += end - start
+
+    def __len__(self):
+        return self._length
+
+    def __bytes__(self):
+        return self.tobytes()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._length:,} bytes in {len(self._pieces)} pieces>"
+
+    def _locate(self, offset):
+        """Return the index of the piece containing logical offset"""
+        return bisect.bisect_right(self._starts, offset) - 1
+
+    def _read(self, start, stop):
+        if start >= stop:
+            return b""
+        index = self._locate(start)
+        parts = []
+        while start < stop and index < len(self._pieces):
+            source, piece_start, piece_end = self._pieces[index]
+            local = piece_start + start - self._starts[index]
+            take = min(piece_end - local, stop - start)
+            parts.append(source[local:local + take])
+            start += take
+            index += 1
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                return self._read(0, self._length)[key]
+            return bytes(self._read(start, stop))
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("buffer index out of range")
+        return self._read(key, key + 1)[0]
+
+    def __setitem__(self, key, value):
+        """Copy-on-write overwrite of a single byte or a slice"""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                raise ValueError("extended slice assignment is not supported")
+            self.replace(start, max(0, stop - start), value)
+        else:
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError("buffer index out of range")
+            self.replace(key, 1, bytes((value,)))
+
+    def replace(self, offset, length, data):
+        """Replace length bytes at offset with a private copy of data"""
+        self._splice(offset, min(offset + length, self._length), bytes(data))
+
+    def _split(self, offset):
+        """Make offset fall on a piece boundary and return the index of the piece starting there"""
+        if offset >= self._length:
+            return len(self._pieces)
+        index = self._locate(offset)
+        piece_offset = self._starts[index]
+        if piece_offset == offset:
+            return index
+        source, start, end = self._pieces[index]
+        middle = start + offset - piece_offset
+        self._pieces[index:index + 1] = [(source, start, middle), (source, middle, end)]
+        self._starts.insert(index + 1, offset)
+        return index + 1
+
+    def _splice(self, start, stop, pieces):
+        """Replace logical range [start, stop) with pieces, a bytes object or list of pieces"""
+        if isinstance(pieces, (bytes, bytearray)):
+            pieces = [(pieces, 0, len(pieces))] if pieces else []
+        first = self._split(start)
+        last = self._split(stop)
+        self._pieces[first:last] = pieces
+        self._rebuild_starts(first)
+
+    def _rebuild_starts(self, first=0):
+        offset = self._starts[first - 1] + self._piece_length(first - 1) if first > 0 else 0
+        del self._starts[first:]
+        for source, start, end in self._pieces[first:]:
+            self._starts.append(offset)
+            offset += end - start
+        self._length = offset
+
+    def _piece_length(self, index):
+        source, start, end = self._pieces[index]
+        return end - start
+
+    def view(self, start, stop):
+        """Return a new buffer over [start, stop) that shares this buffer's sources"""
+        start, stop, _ = slice(start, stop).indices(self._length)
+        result = SegmentedBuffer()
+        for piece in self._pieces_between(start, stop):
+            result._append_piece(*piece)
+        return result
+
+    def _pieces_between(self, start, stop):
+        """Return the (source, start, end) pieces covering logical range [start, stop)"""
+        pieces = []
+        if start >= stop:
+            return pieces
+        index = self._locate(start)
+        while start < stop:
+            source, piece_start, piece_end = self._pieces[index]
+            local = piece_start + start - self._starts[index]
+            take = min(piece_end - local, stop - start)
+            pieces.append((source, local, local + take))
+            start += take
+            index += 1
+        return pieces
+
+    def find(self, sub, start=0, end=None):
+        """Return the lowest offset of sub in [start, end), or -1"""
+        sub = bytes(sub)
+        if start > self._length:
+            return -1
+        start, end, _ = slice(start, end).indices(self._length)
+        if not sub:
+            return start if start <= end else -1
+        if end - start < len(sub):
+            return -1
+        index = max(0, self._locate(start))
+        while index < len(self._pieces):
+            piece_offset = self._starts[index]
+            if piece_offset >= end:
+                break
+            source, piece_start, piece_end = self._pieces[index]
+            local_start = piece_start + max(0, start - piece_offset)
+            local_end = piece_end - max(0, piece_offset + piece_end - piece_start - end)
+            pos = source.find(sub, local_start, local_end)
+            if pos >= 0:
+                return piece_offset + pos - piece_start
+            # A match may straddle the boundary with the following pieces
+            boundary = piece_offset + piece_end - piece_start
+            if boundary < end:
+                window_start = max(start, piece_offset, boundary - len(sub) + 1)
+                window = self._read(window_start, min(end, boundary + len(sub) - 1))
+                pos = window.find(sub)
+                if 0 <= pos and window_start + pos < boundary:
+                    return window_start + pos
+            index += 1
+        return -1
+
+    def sources(self):
+        """Return the distinct underlying objects this buffer reads from"""
+        seen = {}
+        for source, start, end in self._pieces:
+            seen.setdefault(id(source), source)
+        return list(seen.values())
+
+    def detach(self, source, replacement):
+        """Read the pieces that come from source from replacement, a copy of it, instead
+
+        Lets a mapped file be closed while buffers built on it stay valid.
+        Returns True if any piece came from source.
+        """
+        if not any(item is source for item, start, end in self._pieces):
+            return False
+        self._pieces = _repoint(self._pieces, source, replacement)
+        return True
+
+    def iter_pages(self, page_size, start=0, stop=None):
+        """Yield (offset, bytes) pages of at most page_size bytes"""
+        stop = self._length if stop is None else min(stop, self._length)
+        for offset in range(start, stop, page_size):
+            yield offset, self._read(offset, min(offset + page_size, stop))
+
+    def write_to(self, fileobj, block_size=1024 * 1024):
+        """Stream the buffer to fileobj piece by piece"""
+        for source, start, end in self._pieces:
+            for offset in range(start, end, block_size):
+                fileobj.write(source[offset:min(offset + block_size, end)])
+
+    def tobytes(self):
+        return bytes(self._read(0, self._length))
+
+
+def _repoint(pieces, source, replacement):
+    return [(replacement if item is source else item, start, end) for item, start, end in pieces]
+
+
+class PieceTable(SegmentedBuffer):
+    """Editable buffer backed by a piece table
+
+    The original sources are never modified. Inserted bytes are appended to
+    a private add buffer and every edit only rewrites the piece list, which
+    is searched by binary search over piece start offsets. Data that is
+    itself a SegmentedBuffer is spliced in by reference, without copying.
+    generation is incremented on every edit so views can tell when cached
+    renderings are stale, and on_edit, if set, is called as
+    on_edit(offset, old_length, new_length) after every edit so that
+    structures such as sff.ChunkLayout can follow along.
+    """
+
+    def __init__(self, segments=()):
+        super().__init__(segments)
+        self._add = bytearray()
+        self.generation = 0
+        self.on_edit = None
+        self.journal = None  # EditJournal recording every edit for undo/redo
+
+    def _pieces_for(self, data):
+        if isinstance(data, SegmentedBuffer):
+            return list(data._pieces)
+        start = len(self._add)
+        self._add += data
+        return [(self._add, start, len(self._add))] if len(self._add) > start else []
+
+    def replace(self, offset, length, data):
+        """Replace length bytes at offset with data"""
+        if not 0 <= offset <= self._length:
+            raise IndexError("buffer offset out of range")
+        stop = min(offset + max(0, length), self._length)
+        pieces = self._pieces_for(data)
+        if self.journal is not None:
+            self.journal.record(offset, self._pieces_between(offset, stop), pieces)
+        self._apply(offset, stop, pieces)
+
+    def _apply(self, offset, stop, pieces):
+        """Splice pieces over [offset, stop) and report the edit to on_edit"""
+        self._splice(offset, stop, pieces)
+        self.generation += 1
+        if self.on_edit:
+            self.on_edit(offset, stop - offset, _pieces_length(pieces))
+
+    def replace_all(self, offsets, length, data):
+        """Replace length bytes at each offset with data in a single pass
+
+        offsets must be sorted and non-overlapping, as returned by
+        search.find_all(..., overlapping=False). The new piece list is built
+        once from the untouched gaps and one shared copy of data, so the cost
+        does not grow with the product of buffer size and match count.
+        """
+        if not offsets:
+            return 0
+        replacement = self._pieces_for(data)
+        pieces = []
+        edits = []
+        previous = 0
+        for offset in offsets:
+            if offset < previous or offset + length > self._length:
+                raise ValueError("offsets must be sorted, non-overlapping and inside the buffer")
+            pieces.extend(self._pieces_between(previous, offset))
+            pieces.extend(replacement)
+            if self.journal is not None:
+                edits.append(Edit(offset, self._pieces_between(offset, offset + length), replacement))
+            previous = offset + length
+        pieces.extend(self._pieces_between(previous, self._length))
+        self._pieces = pieces
+        self._rebuild_starts()
+        self.generation += 1
+        # Last match first, so every reported offset is still in the caller's coordinates
+        edits.reverse()
+        if self.journal is not None:
+            self.journal.record_step(edits)
+        if self.on_edit:
+            new_length = _pieces_length(replacement)
+            for offset in reversed(offsets):
+                self.on_edit(offset, length, new_length)
+        return len(offsets)
+
+    def detach(self, source, replacement):
+        # Journaled pieces are spliced back in by undo/redo, so they move too
+        if self.journal is not None:
+            self.journal.detach(source, replacement)
+        return super().detach(source, replacement)
+
+    def insert(self, offset, data):
+        self.replace(offset, 0, data)
+
+    def delete(self, offset, length):
+        self.replace(offset, length, b"")
+
+
+def _pieces_length(pieces):
+    return sum(end - start for source, start, end in pieces)
+
+
+class Edit(namedtuple("Edit", "offset removed inserted")):
+    """One journaled edit: the pieces removed at offset and the pieces put there instead"""
+    __slots__ = ()
+
+    @property
+    def removed_length(self):
+        return _pieces_length(self.removed)
+
+    @property
+    def inserted_length(self):
+        return _pieces_length(self.inserted)
+
+
+class EditJournal:
+    """Undo/redo history of a PieceTable, kept as piece references
+
+    Each step is a list of Edits applied in order. An Edit stores the
+    (source, start, end) pieces that were replaced and the pieces that
+    replaced them rather than the bytes themselves, so undoing a 50 MB
+    paste is a single splice that copies nothing. The sources of a piece
+    table are never modified, which keeps old pieces valid.
+
+    The history is bounded by max_steps and by max_bytes, the number of
+    bytes its steps refer to; the oldest steps are dropped first. This
+    bounds the history only: bytes typed or pasted stay in the table's
+    add buffer for as long as the table lives, whether or not a step
+    still refers to them. Small edits that follow on directly from the
+    previous one within coalesce_seconds are merged into one step, so
+    typing undoes as a unit.
+    Edits made inside a group() block are recorded as a single step too.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_steps=1000, coalesce_bytes=16, coalesce_seconds=1.0):
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self.coalesce_bytes = coalesce_bytes
+        self.coalesce_seconds = coalesce_seconds
+        self.size = 0
+        self._undo = deque()
+        self._redo = []
+        self._last_time = 0.0
+        self._coalescing = False
+        self._group = None  # Edits collected by an open group()
+
+    @staticmethod
+    def _step_size(step):
+        return sum(edit.removed_length + edit.inserted_length for edit in step)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def separate(self):
+        """Stop the next edit from being merged into the previous step"""
+        self._coalescing = False
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.size = 0
+        self._coalescing = False
+
+    def detach(self, source, replacement):
+        """Make every recorded piece that comes from source refer to replacement"""
+        def repoint(step):
+            return [Edit(edit.offset, _repoint(edit.removed, source, replacement),
+                         _repoint(edit.inserted, source, replacement)) for edit in step]
+        self._undo = deque(repoint(step) for step in self._undo)
+        self._redo = [repoint(step) for step in self._redo]
+
+    @contextmanager
+    def group(self):
+        """Record every edit made inside the with block as one undoable step"""
+        if self._group is not None:
+            # Nested groups join the outer one
+            yield
+            return
+        self._group = []
+        try:
+            yield
+        finally:
+            edits, self._group = self._group, None
+            self.record_step(edits)
+
+    def record(self, offset, removed, inserted):
+        """Record one edit, merging it into the previous step when it continues it"""
+        edit = Edit(offset, removed, inserted)
+        if self._group is not None:
+            self._group.append(edit)
+            return
+        now = time.monotonic()
+        small = edit.removed_length <= self.coalesce_bytes and edit.inserted_length <= self.coalesce_bytes
+        if (self._coalescing and small and not self._redo and self._undo and len(self._undo[-1]) == 1
+                and now - self._last_time <= self.coalesce_seconds):
+            last = self._undo[-1][0]
+            if offset == last.offset + last.inserted_length:
+                self._undo[-1] = [Edit(last.offset, last.removed + edit.removed, last.inserted + edit.inserted)]
+                self.size += edit.removed_length + edit.inserted_length
+                self._last_time = now
+                return
+        self.record_step([edit])
+        self._coalescing = small
+        self._last_time = now
+
+    def record_step(self, edits):
+        """Record edits that were applied in order as one undoable step"""
+        if not edits:
+            return
+        if self._group is not None:
+            self._group.extend(edits)
+            return
+        for step in self._redo:
+            self.size -= self._step_size(step)
+        self._redo.clear()
+        self._undo.append(list(edits))
+        self.size += self._step_size(edits)
+        self._coalescing = False
+        while self._undo and (self.size > self.max_bytes or len(self._undo) > self.max_steps):
+            self.size -= self._step_size(self._undo.popleft())
+
+    def undo(self, table):
+        """Revert the last step of table; returns its dirty range (see _dirty_range) or None"""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        for edit in reversed(step):
+            table._apply(edit.offset, edit.offset + edit.inserted_length, edit.removed)
+        self._redo.append(step)
+        self._coalescing = False
+        return self._dirty_range(step)
+
+    def redo(self, table):
+        """Re-apply the last undone step of table; returns its dirty range or None"""
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        for edit in step:
+            table._apply(edit.offset, edit.offset + edit.removed_length, edit.inserted)
+        self._undo.append(step)
+        self._coalescing = False
+        return self._dirty_range(step)
+
+    @staticmethod
+    def _dirty_range(step):
+        """Return (start, end) of the bytes a step touched; end is None if the length changed"""
+        start = min(edit.offset for edit in step)
+        if any(edit.removed_length != edit.inserted_length for edit in step):
+            return start, None
+        return start, max(edit.offset + edit.removed_length for edit in step)
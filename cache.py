@@ -0,0 +1,144 @@
+"""Content-addressed disk cache of converted styles
+
+Results are stored as <key>.sty files in one directory, where the key is
+a SHA-256 of the AUS bytes, the template bytes and the conversion
+options. Identical uploads therefore map to the same file no matter what
+they are called, and the cache can be shared by several processes (the
+server workers and batch.py) without any coordination beyond atomic
+renames. The directory is kept under max_bytes by evicting the least
+recently used entries; a hit refreshes an entry's modification time.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+# Bump when the converter's output changes so stale results are never served
+CACHE_VERSION = "1"
+
+HASH_BLOCK = 1024 * 1024
+
+
+class ResultCache:
+    """Size-bounded LRU cache of conversion results in a directory"""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_environment(cls):
+        """Create the cache configured by CONVERT_CACHE_DIR and CONVERT_CACHE_SIZE (bytes)"""
+        directory = os.environ.get("CONVERT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "aus2sty-cache")
+        return cls(directory, int(os.environ.get("CONVERT_CACHE_SIZE", 1024 * 1024 * 1024)))
+
+    @staticmethod
+    def key(aus_path, template_path=None, options=""):
+        """Return the cache key of converting aus_path with template_path and options"""
+        digest = hashlib.sha256(f"{CACHE_VERSION}\0{options}\0".encode("utf-8"))
+        for path in (template_path, aus_path):
+            if path is None:
+                digest.update(b"\0none\0")
+                continue
+            # Each input is framed by its length so (template, aus) pairs cannot collide
+            digest.update(f"\0{os.path.getsize(path)}\0".encode("ascii"))
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".sty")
+
+    def open(self, key, count_miss=True):
+        """Return the cached result for key opened for reading, or None on a miss
+
+        An open file stays readable even if another process evicts the
+        entry while it is being streamed. Pass count_miss=False when
+        re-checking a key whose miss was already counted.
+        """
+        path = self.path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            if count_miss:
+                with self._lock:
+                    self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return f
+
+    def copy_to(self, key, output_path):
+        """Copy the cached result for key to output_path; returns False on a miss"""
+        f = self.open(key)
+        if f is None:
+            return False
+        part_path = output_path + ".part"
+        try:
+            with f, open(part_path, "wb") as out:
+                shutil.copyfileobj(f, out, HASH_BLOCK)
+            os.replace(part_path, output_path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return True
+
+    def put(self, key, result_path):
+        """Store a copy of result_path under key and evict old entries; returns the cached path"""
+        path = self.path(key)
+        fd, part_path = tempfile.mkstemp(suffix=".part", dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(result_path, part_path)
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".sty"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process evicted it first, or it is open on Windows
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        return total
+
+    def stats(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return (f"Result cache: {self.hits:,} hits / {self.misses:,} misses ({ratio:.0f}%), "
+                f"{self.evictions:,} evictions")
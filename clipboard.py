@@ -0,0 +1,174 @@
+"""Application-wide clipboard for copied byte ranges"""
+import mmap
+import os
+import queue
+import tempfile
+import threading
+
+from buffers import SegmentedBuffer
+
+# Private copies larger than this are spilled to a temporary file
+SPILL_THRESHOLD = 64 * 1024 * 1024
+
+# Larger exports to the system clipboard go through a file instead of text
+SYSTEM_TEXT_LIMIT = 4 * 1024 * 1024
+
+# Bytes formatted or written per step of an export
+EXPORT_CHUNK = 1024 * 1024
+
+
+class Clipboard:
+    """The one clipboard shared by every viewer and editor
+
+    The copied range is kept as a SegmentedBuffer view that shares storage
+    with the buffer it was copied from, so copy and paste cost the same for
+    16 bytes or 300 MB. When a source is about to change underneath the
+    view (for example its file is overwritten by an export), materialize()
+    takes a private copy; copies above spill_threshold are written to a
+    temporary file and memory-mapped back in instead of held in memory.
+    clear() closes that file and drops the clipboard's hold on the mapping.
+    """
+
+    def __init__(self, spill_threshold=SPILL_THRESHOLD):
+        self.spill_threshold = spill_threshold
+        self.data = None
+        self.origin = ""
+        self._spill_file = None
+        self._spill_map = None
+
+    def set(self, data, origin=""):
+        """Hold data (bytes, mmap or SegmentedBuffer) by reference"""
+        self.clear()
+        self.data = data if isinstance(data, SegmentedBuffer) else SegmentedBuffer([data])
+        self.origin = origin
+
+    def clear(self):
+        self.data = None
+        self.origin = ""
+        self._close_spill()
+
+    def _close_spill(self):
+        """Close the spill file and let go of its map
+
+        Pastes splice the map in by reference, so it is not closed here;
+        it is unmapped when the last buffer reading from it is collected.
+        """
+        if self._spill_file is not None:
+            # The map holds its own handle, so closing the file does not invalidate it
+            self._spill_file.close()
+            self._spill_file = None
+        self._spill_map = None
+
+    def __bool__(self):
+        return self.data is not None and len(self.data) > 0
+
+    def __len__(self):
+        return len(self.data) if self.data is not None else 0
+
+    def __repr__(self):
+        return f"<Clipboard {len(self):,} bytes from {self.origin or 'unknown'}>"
+
+    def references(self, source):
+        """Return True if the clipboard still reads from source"""
+        return self.data is not None and any(item is source for item in self.data.sources())
+
+    def materialize(self, source=None):
+        """Replace the view by a private copy, if it reads from source (or from anything)
+
+        Returns True if a copy was taken.
+        """
+        if not self or (source is not None and not self.references(source)):
+            return False
+        if len(self.data) <= self.spill_threshold:
+            self.data = SegmentedBuffer([self.data.tobytes()])
+            return True
+        spill = tempfile.TemporaryFile(prefix="clipboard-")
+        self.data.write_to(spill)
+        spill.flush()
+        mapped = mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = SegmentedBuffer([mapped])
+        self._close_spill()
+        self._spill_file = spill
+        self._spill_map = mapped
+        return True
+
+    def hex_preview(self, max_bytes=50):
+        """Return the first bytes as hex, for log messages"""
+        if not self:
+            return ""
+        suffix = "..." if len(self.data) > max_bytes else ""
+        return self.data[:max_bytes].hex().upper() + suffix
+
+
+class SystemClipboardExport:
+    """Prepare a byte range for the system clipboard on a worker thread
+
+    Tk's clipboard only carries text, so raw bytes are always written to a
+    temporary file whose path is then put on the clipboard. Hex text up to
+    text_limit bytes is formatted chunk by chunk into the chunks queue for
+    the UI to append from the event loop; larger ranges are written to a
+    .hex.txt file instead. The UI polls progress/done like search.SearchJob.
+    The file outlives the export so its path can be pasted; discard() removes
+    it once the export is replaced or its window closes.
+    """
+
+    def __init__(self, data, mode="hex", text_limit=SYSTEM_TEXT_LIMIT, directory=None):
+        self.data = data if isinstance(data, SegmentedBuffer) else SegmentedBuffer([data])
+        self.mode = mode
+        self.directory = directory
+        self.to_file = mode != "hex" or len(self.data) > text_limit
+        self.chunks = queue.Queue()
+        self.path = None
+        self.progress = 0.0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def discard(self):
+        """Cancel the export and delete its temporary file, now or when the worker stops"""
+        with self._lock:
+            self.cancelled = True
+            if self.done:
+                self._remove_file()
+
+    def _remove_file(self):
+        if self.path is not None:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.path = None
+
+    def _pages(self):
+        for offset, page in self.data.iter_pages(EXPORT_CHUNK):
+            if self.cancelled:
+                return
+            yield page
+            self.progress = min(1.0, (offset + len(page)) / len(self.data))
+
+    def _run(self):
+        try:
+            if not self.to_file:
+                for page in self._pages():
+                    self.chunks.put(page.hex().upper())
+            else:
+                suffix = ".bin" if self.mode != "hex" else ".hex.txt"
+                with tempfile.NamedTemporaryFile(prefix="clipboard-", suffix=suffix, dir=self.directory,
+                                                 delete=False) as f:
+                    self.path = f.name
+                    for page in self._pages():
+                        f.write(page if self.mode != "hex" else page.hex().upper().encode("ascii"))
+        except Exception as e:
+            self.error = e
+        with self._lock:
+            if self.cancelled or self.error:
+                self._remove_file()
+            self.progress = 1.0
+            self.done = True
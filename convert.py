@@ -0,0 +1,135 @@
+"""Headless AUS to STY conversion
+
+    python convert.py song.aus [-t template.sty] [-o song.sty]
+
+Performs the same steps as the converter window: the MThd/MTrk header of
+the AUS replaces the header of the template style, and the audio chunks
+(AASM/AFil) of the AUS are appended after the template's sections. Both
+inputs are memory-mapped and the output is streamed to disk in fixed-size
+blocks, so neither file is ever held in memory as a whole.
+
+Without a template there is nothing to take sections from, so the AUS is
+its own template: the output is the AUS validated chunk by chunk and
+written back with its audio chunks last, which for a typical AUS (audio
+after the sections) is a byte-for-byte copy. Pass -t to get a style built
+on other sections.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+from buffers import SegmentedBuffer, map_file, write_buffer
+from sff import AUDIO_TAGS, ChunkIndex, SFFError
+
+BLOCK_SIZE = 1024 * 1024
+
+ConvertResult = namedtuple("ConvertResult", "output size elapsed")
+
+
+def _ranges(chunks):
+    """Merge the extents of consecutive chunks into (start, end) ranges"""
+    ranges = []
+    for chunk in chunks:
+        if ranges and ranges[-1][1] == chunk.offset:
+            ranges[-1] = (ranges[-1][0], chunk.end)
+        else:
+            ranges.append((chunk.offset, chunk.end))
+    return ranges
+
+
+def build_style(aus, template=None):
+    """Return the converted style as a SegmentedBuffer over aus and template
+
+    The result is the header of the AUS, the non-audio top-level sections
+    of the template and the audio chunks of the AUS. With no template the
+    sections come from the AUS itself, so the result is just a validated
+    copy of the AUS (audio chunks moved last). Only chunk headers are
+    read; the returned buffer refers to the inputs without copying them.
+    Raises SFFError if either input or the result is not a valid chunk
+    structure.
+    """
+    aus_index = ChunkIndex.build(aus)
+    audio = [chunk for chunk in aus_index.top_level() if chunk.tag in AUDIO_TAGS]
+    if not audio:
+        raise SFFError("No AASM/AFil audio chunks found in the AUS file")
+    template_index = aus_index if template is None else ChunkIndex.build(template)
+    aus = SegmentedBuffer([aus])
+    template = aus if template is None else SegmentedBuffer([template])
+
+    sections = [chunk for chunk in template_index.top_level()
+                if chunk.offset >= template_index.header_end and chunk.tag not in AUDIO_TAGS]
+    parts = [aus.view(0, aus_index.header_end)]
+    parts += [template.view(start, end) for start, end in _ranges(sections)]
+    parts += [aus.view(start, end) for start, end in _ranges(audio)]
+    style = SegmentedBuffer(parts)
+    ChunkIndex.build(style)
+    return style
+
+
+def convert_file(aus_path, output_path, template_path=None, block_size=BLOCK_SIZE):
+    """Convert aus_path (with an optional template style) and write output_path
+
+    The output is written to a .part file next to it and renamed into
+    place once complete, so a failed conversion never leaves a truncated
+    style behind. Returns a ConvertResult.
+    """
+    started = time.perf_counter()
+    part_path = output_path + ".part"
+    sources = []
+    style = None
+    try:
+        aus = map_file(aus_path)
+        sources.append(aus)
+        template = None
+        if template_path:
+            template = map_file(template_path)
+            sources.append(template)
+        style = build_style(aus, template)
+        with open(part_path, "wb") as f:
+            write_buffer(f, style, block_size)
+        size = len(style)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    finally:
+        # Unmap before the rename; Windows cannot replace a file that is still mapped
+        style = None
+        for source in sources:
+            if hasattr(source, "close"):
+                source.close()
+    os.replace(part_path, output_path)
+    return ConvertResult(output_path, size, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert an Audio Phraser (AUS) file to a style (STY)",
+        epilog="Without --template the output is a validated copy of the AUS, byte for byte when its "
+               "audio chunks already come last.")
+    parser.add_argument("aus", help="AUS file to convert")
+    parser.add_argument("-t", "--template",
+                        help="style whose sections are kept (default: none, which copies the AUS after validating it)")
+    parser.add_argument("-o", "--output", help="output style (default: the AUS path with a .sty extension)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="write block size in bytes")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.aus)[0] + ".sty"
+    try:
+        result = convert_file(args.aus, output, args.template, args.block_size)
+    except SFFError as e:
+        print(f"convert: invalid chunk structure: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"convert: {e}", file=sys.stderr)
+        return 1
+
+    rate = result.size / result.elapsed / 1e6 if result.elapsed else 0.0
+    print(f"Wrote {result.size:,} bytes to {result.output} in {result.elapsed * 1000:.1f} ms ({rate:.1f} MB/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Hex dump formatting shared by the hex viewers"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from buffers import SegmentedBuffer
+
+# Maps every byte to itself if printable ASCII, otherwise to "."
+ASCII_TABLE = bytes(b if 32 <= b <= 126 else ord(".") for b in range(256))
+
+
+def format_lines(data, offset=0, bytes_per_line=16, upper_offset=False, pad_ascii=False):
+    """Return the hex dump of data as text, one newline-terminated line per row
+
+    Each row is laid out as the 8-digit offset, the hex bytes starting at
+    column 10 and the ASCII column after them (column 59 for 16 bytes per
+    line). The hex and ASCII columns of the whole page are rendered with
+    one bytes.hex / bytes.translate call each and then sliced per row.
+    """
+    data = bytes(data)
+    if not data:
+        return ""
+    hex_text = data.hex(" ").upper()
+    ascii_text = data.translate(ASCII_TABLE).decode("ascii")
+    hex_width = bytes_per_line * 3 - 1
+    ascii_width = bytes_per_line if pad_ascii else 0
+    offset_format = "08X" if upper_offset else "08x"
+    step = bytes_per_line * 3
+    return "".join(
+        f"{offset + pos:{offset_format}}  {hex_text[row * step:row * step + hex_width]:<{hex_width}}  "
+        f"{ascii_text[pos:pos + bytes_per_line]:<{ascii_width}}\n"
+        for row, pos in enumerate(range(0, len(data), bytes_per_line))
+    )
+
+
+class PageCache:
+    """Bounded LRU cache of formatted hex dump pages with background prefetch
+
+    Pages of page_lines rows are keyed by (buffer id, page index, bytes per
+    line, edit generation, format options). The buffer's generation
+    attribute (see buffers.PieceTable) makes edited pages miss naturally.
+    After every lookup the neighbouring pages are formatted on a worker
+    thread so that scrolling back and forth only costs a widget insert.
+    The worker reads from a view of the buffer's pieces taken at lookup
+    time, never from the buffer the caller goes on editing.
+    """
+
+    def __init__(self, page_lines=64, max_pages=256, prefetch=2):
+        self.page_lines = page_lines
+        self.max_pages = max_pages
+        self.prefetch = prefetch
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = None
+
+    def _key(self, data, page, bytes_per_line, options):
+        return (id(data), page, bytes_per_line, getattr(data, "generation", 0), options)
+
+    def _format_page(self, data, page, bytes_per_line, options):
+        start = page * self.page_lines * bytes_per_line
+        end = min(start + self.page_lines * bytes_per_line, len(data))
+        return format_lines(data[start:end], start, bytes_per_line, *options)
+
+    def _store(self, key, data, text):
+        with self._lock:
+            # The buffer is kept with the page so a recycled id() cannot produce a false hit
+            self._pages[key] = (data, text)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def _get_page(self, data, page, bytes_per_line, options):
+        key = self._key(data, page, bytes_per_line, options)
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and entry[0] is data:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        text = self._format_page(data, page, bytes_per_line, options)
+        self._store(key, data, text)
+        return text
+
+    def get_lines(self, data, first_line, line_count, bytes_per_line=16, upper_offset=False, pad_ascii=False):
+        """Return the dump text of line_count rows starting at row first_line"""
+        total_lines = (len(data) + bytes_per_line - 1) // bytes_per_line
+        last_line = min(first_line + line_count, total_lines)
+        if first_line >= last_line:
+            return ""
+        options = (upper_offset, pad_ascii)
+        # Every row except the last one of the buffer has the same width
+        line_width = 8 + 2 + (bytes_per_line * 3 - 1) + 2 + bytes_per_line + 1
+        first_page = first_line // self.page_lines
+        last_page = (last_line - 1) // self.page_lines
+        parts = []
+        for page in range(first_page, last_page + 1):
+            text = self._get_page(data, page, bytes_per_line, options)
+            page_first = page * self.page_lines
+            start = max(first_line, page_first) - page_first
+            stop = min(last_line, page_first + self.page_lines) - page_first
+            parts.append(text[start * line_width:stop * line_width])
+        self._schedule_prefetch(data, first_page, last_page, bytes_per_line, options)
+        return "".join(parts)
+
+    def _schedule_prefetch(self, data, first_page, last_page, bytes_per_line, options):
+        if not self.prefetch:
+            return
+        if self._queue is None:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._prefetch_worker, args=(self._queue,), daemon=True).start()
+        page_count = (len(data) + self.page_lines * bytes_per_line - 1) // (self.page_lines * bytes_per_line)
+        pages = [page for distance in range(1, self.prefetch + 1)
+                 for page in (last_page + distance, first_page - distance) if 0 <= page < page_count]
+        if not pages:
+            return
+        # The piece list is copied here, on the caller's thread, so later edits cannot tear it
+        snapshot = data.view(0, len(data)) if isinstance(data, SegmentedBuffer) else data
+        for page in pages:
+            self._queue.put((data, snapshot, self._key(data, page, bytes_per_line, options),
+                             page, bytes_per_line, options))
+
+    def _prefetch_worker(self, jobs):
+        # close() drops self._queue, so the worker keeps its own reference until it sees None
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            data, snapshot, key, page, bytes_per_line, options = job
+            with self._lock:
+                if key in self._pages:
+                    continue
+            try:
+                text = self._format_page(snapshot, page, bytes_per_line, options)
+            except Exception:
+                # The buffer was closed under us; the page will simply miss later
+                continue
+            # Stored under the generation the snapshot was taken at, so a later edit still misses
+            self._store(key, data, text)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def close(self):
+        """Stop the prefetch worker"""
+        if self._queue is not None:
+            self._queue.put(None)
+            self._queue = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return f"Page cache: {self.hits:,} hits / {self.misses:,} misses ({ratio:.0f}%)"
+
+
+if __name__ == "__main__":
+    # Quick throughput check: python hexdump.py
+    sample = bytes(range(256)) * (8 * 1024)
+    started = time.perf_counter()
+    text = format_lines(sample)
+    elapsed = time.perf_counter() - started
+    print(f"Formatted {len(sample):,} bytes into {len(text):,} characters in {elapsed * 1000:.1f} ms "
+          f"({len(text) / elapsed / 1e6:.1f} MB/s of dump text)")
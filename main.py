@@ -1,8 +1,64 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
+import tkinter.font as tkfont
 import binascii
+import mmap
 import os
 import sys
+import time
+
+from buffers import MMAP_BY_DEFAULT, EditJournal, PieceTable, SegmentedBuffer, load_file, write_buffer
+from clipboard import Clipboard, SystemClipboardExport
+from hexdump import PageCache, format_lines
+from search import SearchJob, describe_match, find_all, parse_search_text
+from selection import HEX_COLUMN, Selection, ascii_column, index_to_offset
+from sff import ChunkIndex, ChunkLayout, SFFError
+
+# Bytes the undo history of each editor buffer may refer to before old steps are dropped
+UNDO_MEMORY_LIMIT = 256 * 1024 * 1024
+
+class RenderScheduler:
+    """Coalesce render requests so only the latest view position is drawn per frame
+
+    Scroll and resize handlers update the view position and call request();
+    the render callback runs at most once per frame_ms on the Tk event loop,
+    and every request that arrives while one is pending is counted as a
+    dropped intermediate frame.
+    """
+    def __init__(self, widget, render, frame_ms=16):
+        self.widget = widget
+        self.render = render
+        self.frame_ms = frame_ms
+        self.pending = False
+        self.rendered = 0
+        self.dropped = 0
+        self.last_render = 0.0
+
+    def request(self):
+        if self.pending:
+            self.dropped += 1
+            return
+        self.pending = True
+        delay = int(self.frame_ms - (time.perf_counter() - self.last_render) * 1000)
+        try:
+            if delay > 0:
+                self.widget.after(delay, self.run)
+            else:
+                self.widget.after_idle(self.run)
+        except tk.TclError:
+            self.pending = False  # Widget already destroyed
+
+    def run(self):
+        self.pending = False
+        self.last_render = time.perf_counter()
+        self.rendered += 1
+        try:
+            self.render()
+        except tk.TclError:
+            pass  # Widget destroyed while the render was queued
+
+    def stats(self):
+        return f"Frames: {self.rendered:,} drawn / {self.dropped:,} coalesced"
 
 class HexPreviewWindow:
     def __init__(self, parent, hex_data):
@@ -53,16 +109,7 @@ class HexPreviewWindow:
         try:
             hex_bytes = binascii.unhexlify(hex_data)
             self.byte_length = len(hex_bytes)  # Store the byte length for range validation
-            lines = []
-            for i in range(0, len(hex_bytes), 16):
-                chunk = hex_bytes[i:i + 16]
-                if len(chunk) > 0:
-                    hex_value = " ".join(f"{byte:02X}" for byte in chunk)
-                    ascii_value = ''.join(c if 32 <= ord(c) <= 126 else '.' for c in chunk.decode('ascii', errors='ignore'))
-                    hex_part = f"{hex_value:<47}"
-                    line = f"{i:08x}  {hex_part}  {ascii_value}\n"
-                    lines.append(line)
-            self.hex_text.insert(tk.END, "".join(lines).rstrip())
+            self.hex_text.insert(tk.END, format_lines(hex_bytes).rstrip())
         except binascii.Error:
             self.parent.log("Invalid hex data provided for preview.")
 
@@ -110,7 +157,7 @@ class HexPreviewWindow:
                     if hex_values:
                         hex_data.extend(hex_values)
                 hex_string = "".join(hex_data).replace(" ", "")
-                self.parent.copied_data = hex_string
+                self.parent.clipboard.set(binascii.unhexlify(hex_string), "preview")
                 self.parent.log(f"Copied selected hex from preview: {hex_string[:100]}... ({len(hex_string)//2} bytes)")
             else:
                 self.parent.log("No selection to copy in preview window.")
@@ -171,15 +218,7 @@ class HeaderReplacementWindow:
         if not data:
             self.parent.log("No AUS data to display.")
             return
-        lines = []
-        for i in range(0, len(data), 16):
-            chunk = data[i:i + 16]
-            hex_value = " ".join(f"{byte:02X}" for byte in chunk)
-            ascii_value = ''.join(c if 32 <= ord(c) <= 126 else '.' for c in chunk.decode('ascii', errors='ignore'))
-            hex_part = f"{hex_value:<47}"
-            line = f"{i:08x}  {hex_part}  {ascii_value}\n"
-            lines.append(line)
-        self.aus_text.insert(tk.END, "".join(lines).rstrip())
+        self.aus_text.insert(tk.END, format_lines(data).rstrip())
         self.parent.log(f"Loaded full raw AUS data into header replacement window: {len(data)} bytes.")
 
     def load_sty_data(self):
@@ -188,15 +227,7 @@ class HeaderReplacementWindow:
         if not data:
             self.parent.log("No STY data to display.")
             return
-        lines = []
-        for i in range(0, len(data), 16):
-            chunk = data[i:i + 16]
-            hex_value = " ".join(f"{byte:02X}" for byte in chunk)
-            ascii_value = ''.join(c if 32 <= ord(c) <= 126 else '.' for c in chunk.decode('ascii', errors='ignore'))
-            hex_part = f"{hex_value:<47}"
-            line = f"{i:08x}  {hex_part}  {ascii_value}\n"
-            lines.append(line)
-        self.sty_text.insert(tk.END, "".join(lines).rstrip())
+        self.sty_text.insert(tk.END, format_lines(data).rstrip())
         self.parent.log(f"Loaded full raw STY data into header replacement window: {len(data)} bytes.")
 
     def select_and_copy_aus(self):
@@ -216,7 +247,7 @@ class HeaderReplacementWindow:
                     if hex_values:
                         hex_data.extend(hex_values)
                 hex_string = "".join(hex_data).replace(" ", "")
-                self.parent.copied_data = hex_string
+                self.parent.clipboard.set(bytes.fromhex(hex_string), "AUS")
                 self.parent.log(f"Copied hex from AUS: {hex_string[:100]}...")
             else:
                 self.parent.log("No selection to copy from AUS.")
@@ -240,7 +271,7 @@ class HeaderReplacementWindow:
                     if hex_values:
                         hex_data.extend(hex_values)
                 hex_string = "".join(hex_data).replace(" ", "")
-                self.parent.copied_data = hex_string
+                self.parent.clipboard.set(bytes.fromhex(hex_string), "STY")
                 self.parent.log(f"Copied hex from STY: {hex_string[:100]}...")
             else:
                 self.parent.log("No selection to copy from STY.")
@@ -248,22 +279,22 @@ class HeaderReplacementWindow:
             self.parent.log("No selection to copy from STY.")
 
     def paste_to_aus(self):
-        if self.parent.copied_data:
+        if self.parent.clipboard:
             try:
-                hex_bytes = " ".join(self.parent.copied_data[i:i+2] for i in range(0, len(self.parent.copied_data), 2))
+                hex_bytes = self.parent.clipboard.data.tobytes().hex(" ").upper()
                 self.aus_text.insert(tk.INSERT, hex_bytes)
-                self.parent.log(f"Pasted hex to AUS: {self.parent.copied_data[:100]}...")
+                self.parent.log(f"Pasted hex to AUS: {self.parent.clipboard.hex_preview()}")
             except tk.TclError:
                 self.parent.log("Failed to paste hex data to AUS.")
         else:
             self.parent.log("No data to paste to AUS.")
 
     def paste_to_sty(self):
-        if self.parent.copied_data:
+        if self.parent.clipboard:
             try:
-                hex_bytes = " ".join(self.parent.copied_data[i:i+2] for i in range(0, len(self.parent.copied_data), 2))
+                hex_bytes = self.parent.clipboard.data.tobytes().hex(" ").upper()
                 self.sty_text.insert(tk.INSERT, hex_bytes)
-                self.parent.log(f"Pasted hex to STY: {self.parent.copied_data[:100]}...")
+                self.parent.log(f"Pasted hex to STY: {self.parent.clipboard.hex_preview()}")
             except tk.TclError:
                 self.parent.log("Failed to paste hex data to STY.")
         else:
@@ -309,6 +340,8 @@ class DataSelectionWindow:
         self.chunk_size = 1024 * 16  # 16KB chunks for rendering
         self.current_start = 0
         self.total_lines = (len(data) + 15) // 16  # Calculate total number of lines
+        self.selection = Selection()  # Buffer offsets, independent of the rendered page
+        self.export_job = None  # Latest SystemClipboardExport, running or finished
 
         # Configure window
         if sys.platform == "win32":
@@ -401,6 +434,7 @@ class DataSelectionWindow:
         # Bind events
         self.hex_editor.bind("<MouseWheel>", self._on_mousewheel)
         self.hex_editor.bind("<Shift-MouseWheel>", self._on_shift_mousewheel)
+        self.hex_editor.bind("<<Selection>>", self.on_selection_change)
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def load_visible_data(self):
@@ -409,16 +443,9 @@ class DataSelectionWindow:
         start_line = self.current_start
         end_line = min(start_line + (self.chunk_size // 16), self.total_lines)
         
-        lines = []
-        for i in range(start_line * 16, min(end_line * 16, len(self.data)), 16):
-            chunk = self.data[i:i + 16]
-            hex_value = " ".join(f"{byte:02X}" for byte in chunk)
-            ascii_value = ''.join(chr(b) if 32 <= b <= 126 else '.' for b in chunk)
-            hex_part = f"{hex_value:<47}"
-            line = f"{i:08x}  {hex_part}  {ascii_value}\n"
-            lines.append(line)
-        
-        self.hex_editor.insert(tk.END, "".join(lines))
+        start_byte = start_line * 16
+        self.hex_editor.insert(tk.END, format_lines(self.data[start_byte:min(end_line * 16, len(self.data))], start_byte))
+        self.selection.apply(self.hex_editor, start_line, end_line - start_line)
         self.status_var.set(f"Showing bytes {start_line*16:,} to {min(end_line*16, len(self.data)):,} of {len(self.data):,}")
 
     def on_vertical_scroll(self, *args):
@@ -472,55 +499,87 @@ class DataSelectionWindow:
         self.hex_editor.xview_scroll(-1 if event.delta > 0 else 1, "units")
 
     def on_closing(self):
+        self.discard_export()
         self.hex_editor.unbind("<MouseWheel>")
         self.hex_editor.unbind("<Shift-MouseWheel>")
         self.window.destroy()
 
     def select_all(self):
-        self.hex_editor.tag_add("sel", "1.0", tk.END)
+        self.selection.set(0, len(self.data))
+        self.load_visible_data()
         self.update_status()
 
     def clear_selection(self):
-        self.hex_editor.tag_remove("sel", "1.0", tk.END)
+        self.selection.clear()
+        self.load_visible_data()
         self.update_status()
 
+    def on_selection_change(self, event=None):
+        if self.selection.update_from_text(self.hex_editor, self.current_start, len(self.data)):
+            self.update_status()
+
     def copy_selected(self):
-        try:
-            if self.hex_editor.tag_ranges("sel"):
-                selection = self.hex_editor.get("sel.first", "sel.last")
-                self.parent.copied_data = self.extract_hex_data(selection)
-                self.status_var.set(f"Copied {len(self.parent.copied_data)//2} bytes")
-            else:
-                self.status_var.set("No selection to copy")
-        except tk.TclError:
+        if not self.selection:
             self.status_var.set("No selection to copy")
+            return
+        # A view of the buffer; nothing is copied or re-parsed from the text
+        self.parent.clipboard.set(self.selection.copy(self.data), "selection")
+        self.status_var.set(f"Copied {len(self.parent.clipboard):,} bytes")
 
     def copy_as_hex(self):
-        try:
-            if self.hex_editor.tag_ranges("sel"):
-                selection = self.hex_editor.get("sel.first", "sel.last")
-                hex_data = self.extract_hex_data(selection)
-                self.parent.root.clipboard_clear()
-                self.parent.root.clipboard_append(hex_data)
-                self.status_var.set(f"Copied {len(hex_data)//2} bytes as hex")
-            else:
-                self.status_var.set("No selection to copy")
-        except tk.TclError:
-            self.status_var.set("No selection to copy")
+        self.export_to_system_clipboard("hex")
 
     def copy_as_bytes(self):
-        try:
-            if self.hex_editor.tag_ranges("sel"):
-                selection = self.hex_editor.get("sel.first", "sel.last")
-                hex_data = self.extract_hex_data(selection)
-                bytes_data = binascii.unhexlify(hex_data)
-                self.parent.root.clipboard_clear()
-                self.parent.root.clipboard_append(bytes_data)
-                self.status_var.set(f"Copied {len(bytes_data)} bytes")
-            else:
-                self.status_var.set("No selection to copy")
-        except tk.TclError:
+        self.export_to_system_clipboard("bytes")
+
+    def export_to_system_clipboard(self, mode):
+        """Put the selection on the system clipboard without blocking the UI
+
+        Hex text is appended in chunks as a worker formats it; raw bytes and
+        very large ranges are written to a temporary file and its path is
+        copied instead, since Tk's clipboard cannot carry binary data.
+        """
+        if not self.selection:
             self.status_var.set("No selection to copy")
+            return
+        self.discard_export()
+        job = self.export_job = SystemClipboardExport(self.selection.copy(self.data), mode).start()
+        root = self.parent.root
+        root.clipboard_clear()
+
+        def poll():
+            if job is not self.export_job or not self.window.winfo_exists():
+                return
+            # Read done before draining, so no chunk queued after the check is left behind
+            finished = job.done
+            while not job.chunks.empty():
+                root.clipboard_append(job.chunks.get())
+            if not finished:
+                self.status_var.set(f"Copying {len(job.data):,} bytes... {job.progress * 100:.0f}%")
+                self.window.after(50, poll)
+                return
+            if job.error:
+                root.clipboard_clear()
+                self.status_var.set(f"Copy error: {job.error}")
+            elif job.path:
+                root.clipboard_clear()
+                root.clipboard_append(job.path)
+                self.status_var.set(f"Saved {len(job.data):,} bytes to {job.path} (path copied to clipboard)")
+            else:
+                self.status_var.set(f"Copied {len(job.data):,} bytes as hex")
+
+        poll()
+
+    def discard_export(self):
+        """Stop the latest export, drop any partial clipboard text and delete its file"""
+        job, self.export_job = self.export_job, None
+        if job is None:
+            return
+        # Finished hex text stays on the clipboard; a partial copy or a deleted path does not
+        stale = not job.done or job.path is not None
+        job.discard()
+        if stale:
+            self.parent.root.clipboard_clear()
 
     def find_next(self):
         search_text = self.search_var.get()
@@ -571,27 +630,11 @@ class DataSelectionWindow:
         self.status_var.set(f"Found {count} occurrences")
         self.hex_editor.see("1.0")
 
-    def extract_hex_data(self, text):
-        lines = text.strip().splitlines()
-        hex_data = []
-        for line in lines:
-            parts = line.split()
-            if len(parts) > 1:
-                hex_values = parts[1:17]  # Get hex values between offset and ASCII
-                hex_data.extend(hex_values)
-        return "".join(hex_data)
-
     def update_status(self):
-        try:
-            if self.hex_editor.tag_ranges("sel"):
-                start = self.hex_editor.index("sel.first")
-                end = self.hex_editor.index("sel.last")
-                selection = self.hex_editor.get(start, end)
-                hex_data = self.extract_hex_data(selection)
-                self.status_var.set(f"Selected: {len(hex_data)//2} bytes")
-            else:
-                self.status_var.set("No selection")
-        except tk.TclError:
+        if self.selection:
+            self.status_var.set(f"Selected: {len(self.selection):,} bytes "
+                                f"({self.selection.start:08X} to {self.selection.end - 1:08X})")
+        else:
             self.status_var.set("No selection")
 
 class AUSPreviewWindow:
@@ -608,6 +651,9 @@ class AUSPreviewWindow:
         self.data = data
         self.total_lines = (len(data) + 15) // 16
         self.visible_lines = 0  # Will be set after first load
+        self.page_cache = PageCache()
+        self.last_match_length = 1
+        self.selection = Selection()  # Buffer offsets, independent of the rendered page
 
         # Main container with grid
         self.window.grid_rowconfigure(1, weight=1)
@@ -631,9 +677,9 @@ class AUSPreviewWindow:
         self.end_range = ttk.Entry(range_frame, width=10)
         self.end_range.pack(side="left", padx=2)
 
-        # Quick selection button for 0x170 to end
-        ttk.Button(range_frame, text="Select From 0x170 to End", 
-                  command=self.select_from_170_to_end).pack(side="left", padx=2)
+        # Quick selection button for the audio chunks (AASM/AFil) to end
+        ttk.Button(range_frame, text="Select Audio to End", 
+                  command=self.select_audio_to_end).pack(side="left", padx=2)
 
         # Select and Get Range buttons
         ttk.Button(range_frame, text="Select Range", command=self.select_range).pack(side="left", padx=2)
@@ -679,6 +725,7 @@ class AUSPreviewWindow:
         status_bar.grid(row=2, column=0, sticky="ew", padx=5, pady=5)
 
         # Initialize view
+        self.scheduler = RenderScheduler(self.window, self.load_visible_data)
         self.hex_editor.update_idletasks()
         self.calculate_visible_lines()
         self.load_visible_data()
@@ -687,89 +734,79 @@ class AUSPreviewWindow:
         # Bind events
         self.hex_editor.bind("<MouseWheel>", self.on_mousewheel)
         self.hex_editor.bind("<Configure>", self.on_resize)
+        self.hex_editor.bind("<<Selection>>", self.on_selection_change)
+        self.window.bind("<Destroy>", self.on_destroy)
+
+    def on_destroy(self, event):
+        """Stop the page cache prefetch worker when the window goes away"""
+        if event.widget == self.window:
+            self.page_cache.close()
+
+    def select_offsets(self, start, end, message):
+        """Select bytes start..end (inclusive) and scroll so the start is visible"""
+        self.selection.set(start, end + 1)
+
+        # Update the range entry fields
+        self.start_range.delete(0, tk.END)
+        self.start_range.insert(0, f"{start:08X}")
+        self.end_range.delete(0, tk.END)
+        self.end_range.insert(0, f"{end:08X}")
+
+        # Show 2 lines before the selection; only the visible rows get tagged
+        max_start = max(0, self.total_lines - self.visible_lines)
+        self.current_start = max(0, min((start // 16) - 2, max_start))
+        self.load_visible_data()
+        self.update_status(f"{message} ({len(self.selection):,} bytes)")
+
+    def parse_range_entries(self):
+        """Return (start, end) from the range entries, or None after reporting the problem"""
+        # Get and validate start range
+        start_hex = self.start_range.get().strip().upper().replace('0X', '')
+        if not start_hex:
+            self.update_status("Please enter a start offset")
+            return None
+
+        # Get and validate end range
+        end_hex = self.end_range.get().strip().upper().replace('0X', '')
+        if not end_hex:
+            self.update_status("Please enter an end offset")
+            return None
+
+        # Convert hex to integers
+        try:
+            start = int(start_hex, 16)
+            end = int(end_hex, 16)
+        except ValueError:
+            self.update_status("Invalid hex values. Please enter valid hex numbers (e.g., FF or 0xFF)")
+            return None
+
+        # Validate range
+        if start < 0 or end >= len(self.data) or start > end:
+            self.update_status(f"Invalid range. Must be between 0 and {len(self.data)-1:08X}")
+            return None
+        return start, end
 
     def select_range(self):
         """Select hex range based on input values"""
         try:
-            # Get and validate start range
-            start_hex = self.start_range.get().strip().upper().replace('0X', '')
-            if not start_hex:
-                self.update_status("Please enter a start offset")
-            return
-
-            # Get and validate end range
-            end_hex = self.end_range.get().strip().upper().replace('0X', '')
-            if not end_hex:
-                self.update_status("Please enter an end offset")
-                return
-
-            # Convert hex to integers
-            try:
-                start = int(start_hex, 16)
-                end = int(end_hex, 16)
-            except ValueError:
-                self.update_status("Invalid hex values. Please enter valid hex numbers (e.g., FF or 0xFF)")
-                return
-
-            # Validate range
-            if start < 0 or end >= len(self.data) or start > end:
-                self.update_status(f"Invalid range. Must be between 0 and {len(self.data)-1:08X}")
-                return
-
-            # Calculate the lines where these offsets appear
-            start_line = (start // 16) - self.current_start + 1
-            end_line = (end // 16) - self.current_start + 1
-
-            # Calculate column positions
-            start_col = 10 + (start % 16) * 3
-            end_col = 10 + (end % 16) * 3 + 2
-
-            # Clear any existing selection
-            self.hex_editor.tag_remove('sel', '1.0', 'end')
-
-            # Add new selection
-            self.hex_editor.tag_add('sel', f"{start_line}.{start_col}", f"{end_line}.{end_col}")
-            self.hex_editor.see(f"{start_line}.0")
-
-            # Update status
-            self.update_status(f"Selected range: {start:08X} to {end:08X}")
-
+            offsets = self.parse_range_entries()
+            if offsets:
+                start, end = offsets
+                self.select_offsets(start, end, f"Selected range: {start:08X} to {end:08X}")
         except Exception as e:
             self.update_status(f"Error selecting range: {str(e)}")
 
     def get_range_data(self):
         """Get hex data between specified ranges and store in parent"""
         try:
-            # Get and validate start range
-            start_hex = self.start_range.get().strip().upper().replace('0X', '')
-            if not start_hex:
-                self.update_status("Please enter a start offset")
+            offsets = self.parse_range_entries()
+            if not offsets:
                 return
+            start, end = offsets
 
-            # Get and validate end range
-            end_hex = self.end_range.get().strip().upper().replace('0X', '')
-            if not end_hex:
-                self.update_status("Please enter an end offset")
-                return
-
-            # Convert hex to integers
-            try:
-                start = int(start_hex, 16)
-                end = int(end_hex, 16)
-            except ValueError:
-                self.update_status("Invalid hex values. Please enter valid hex numbers (e.g., FF or 0xFF)")
-                return
-
-            # Validate range
-            if start < 0 or end >= len(self.data) or start > end:
-                self.update_status(f"Invalid range. Must be between 0 and {len(self.data)-1:08X}")
-                return
-
-            # Extract only the selected range of data
-            range_data = self.data[start:end + 1]
-
-            # Store in parent's aus_copied_data
-            self.parent.aus_copied_data = range_data
+            # Put a view of the selected range on the clipboard
+            range_data = Selection(start, end + 1).copy(self.data)
+            self.parent.clipboard.set(range_data, "AUS")
 
             # Log success and close window
             self.parent.log(f"Copied {len(range_data)} bytes from AUS data (offset {start:08X} to {end:08X})")
@@ -788,7 +825,7 @@ class AUSPreviewWindow:
     def on_resize(self, event=None):
         """Handle window resize events"""
         self.calculate_visible_lines()
-        self.load_visible_data()
+        self.scheduler.request()
 
     def on_vertical_scroll(self, *args):
         """Handle scrollbar movement with proper scrolling"""
@@ -799,11 +836,7 @@ class AUSPreviewWindow:
             new_start = max(0, min(new_start, max_start))
             if new_start != self.current_start:
                 self.current_start = new_start
-                self.load_visible_data()
-                # Update scrollbar position
-                if self.total_lines > 0:
-                    self.vsb.set(new_start/self.total_lines, 
-                               min(1.0, (new_start + self.visible_lines)/self.total_lines))
+                self.scheduler.request()
         elif args[0] == "scroll":
             amount = int(args[1])
             if args[2] == "units":
@@ -816,11 +849,7 @@ class AUSPreviewWindow:
             
             if new_start != self.current_start:
                 self.current_start = new_start
-                self.load_visible_data()
-                # Update scrollbar position
-                if self.total_lines > 0:
-                    self.vsb.set(new_start/self.total_lines, 
-                               min(1.0, (new_start + self.visible_lines)/self.total_lines))
+                self.scheduler.request()
 
     def load_visible_data(self):
         """Load only the visible portion of data"""
@@ -835,18 +864,10 @@ class AUSPreviewWindow:
             end_byte = ((end_byte + 15) // 16) * 16
         end_byte = min(end_byte, len(self.data))
         
-        lines = []
-        for i in range(start_byte, end_byte, 16):
-            chunk = self.data[i:min(i + 16, len(self.data))]
-            # Pad the last line with spaces to maintain alignment
-            hex_value = " ".join(f"{byte:02X}" for byte in chunk)
-            hex_value = f"{hex_value:<47}"
-            ascii_value = ''.join(chr(b) if 32 <= b <= 126 else '.' for b in chunk)
-            ascii_value = f"{ascii_value:<16}"
-            line = f"{i:08x}  {hex_value}  {ascii_value}\n"
-            lines.append(line)
-        
-        self.hex_editor.insert(tk.END, "".join(lines))
+        # Pad the last line with spaces to maintain alignment
+        line_count = (end_byte - start_byte + 15) // 16
+        self.hex_editor.insert(tk.END, self.page_cache.get_lines(self.data, self.current_start, line_count, pad_ascii=True))
+        self.selection.apply(self.hex_editor, self.current_start, line_count)
         
         # Update scrollbar position
         if self.total_lines > 0:
@@ -854,7 +875,8 @@ class AUSPreviewWindow:
             last = min(1.0, (self.current_start + self.visible_lines) / self.total_lines)
             self.vsb.set(first, last)
         
-        self.update_status(f"Showing bytes {start_byte:,} to {end_byte:,} of {len(self.data):,}")
+        self.update_status(f"Showing bytes {start_byte:,} to {end_byte:,} of {len(self.data):,} | "
+                           f"{self.page_cache.stats()} | {self.scheduler.stats()}")
 
     def on_mousewheel(self, event):
         """Smooth scrolling with mouse wheel"""
@@ -870,35 +892,23 @@ class AUSPreviewWindow:
             
             if new_start != self.current_start:
                 self.current_start = new_start
-                self.load_visible_data()
-                # Update scrollbar position
-                if self.total_lines > 0:
-                    self.vsb.set(new_start/self.total_lines, 
-                               min(1.0, (new_start + self.visible_lines)/self.total_lines))
+                self.scheduler.request()
 
     def select_all(self):
-        self.hex_editor.tag_add("sel", "1.0", tk.END)
-        self.update_status("All text selected")
+        self.selection.set(0, len(self.data))
+        self.load_visible_data()
+        self.update_status(f"Selected all {len(self.data):,} bytes")
 
     def copy_selection(self):
-        """Copy selected hex data to parent's aus_copied_data"""
+        """Copy the selected bytes to the clipboard"""
         try:
-            if self.hex_editor.tag_ranges("sel"):
-                selection = self.hex_editor.get("sel.first", "sel.last")
-                hex_data = []
-                for line in selection.strip().splitlines():
-                    parts = line.split()
-                    if len(parts) > 1:
-                        hex_values = parts[1:17]  # Get hex values between offset and ASCII
-                        hex_data.extend(hex_values)
-                
-                # Convert hex strings to bytes
-                hex_string = "".join(hex_data)
-                self.parent.aus_copied_data = bytes.fromhex(hex_string)
-                
+            if self.selection:
+                # A view of the buffer; nothing is copied or re-parsed from the text
+                self.parent.clipboard.set(self.selection.copy(self.data), "AUS")
+
                 # Update status and close window
-                self.update_status(f"Copied {len(hex_data)} bytes")
-                self.parent.log(f"Copied {len(hex_data)} bytes from AUS data")
+                self.update_status(f"Copied {len(self.selection)} bytes")
+                self.parent.log(f"Copied {len(self.selection)} bytes from AUS data")
                 self.window.destroy()
             else:
                 self.update_status("No selection to copy")
@@ -908,22 +918,39 @@ class AUSPreviewWindow:
     def show_find_dialog(self):
         dialog = tk.Toplevel(self.window)
         dialog.title("Find")
-        dialog.geometry("300x150")
+        dialog.geometry("360x320")
         dialog.transient(self.window)
-        dialog.grab_set()
 
-        ttk.Label(dialog, text="Search for:").pack(pady=5)
+        ttk.Label(dialog, text="Search for (hex, text or pattern like F0 ?? 43 1? 4C):").pack(pady=5)
         search_var = tk.StringVar()
         entry = ttk.Entry(dialog, textvariable=search_var, width=40)
         entry.pack(pady=5)
         entry.focus_set()
 
+        # Every match, click to jump to it
+        results_list = tk.Listbox(dialog, font=("Courier", 9), height=10)
+        results_list.pack(fill="both", expand=True, padx=5, pady=5)
+        results = []
+
         def find():
             text = search_var.get()
             if text:
-                self.find_text(text)
-            dialog.destroy()
+                results[:] = self.find_text(text)
+                results_list.delete(0, "end")
+                length = self.last_match_length
+                for offset in results[:10000]:
+                    results_list.insert("end", describe_match(self.data, offset, length))
+                if len(results) > 10000:
+                    results_list.insert("end", f"... {len(results) - 10000:,} more")
+
+        def on_pick(event):
+            picked = results_list.curselection()
+            if picked and picked[0] < min(len(results), 10000):
+                offset = results[picked[0]]
+                self.goto_offset(offset)
+                self.update_status(f"Match {picked[0] + 1:,} of {len(results):,} at offset: {offset:08x}")
 
+        results_list.bind("<<ListboxSelect>>", on_pick)
         ttk.Button(dialog, text="Find", command=find).pack(pady=5)
         dialog.bind("<Return>", lambda e: find())
 
@@ -952,22 +979,27 @@ class AUSPreviewWindow:
         dialog.bind("<Return>", lambda e: goto())
 
     def find_text(self, text):
+        """Search the whole file and jump to the first match; returns every match offset"""
         try:
-            # Convert text to hex if it's a hex string
-            if all(c in "0123456789ABCDEFabcdef" for c in text):
-                search_bytes = bytes.fromhex(text)
-            else:
+            # Hex bytes, optionally with ?? wildcards, nibble masks and ranges, form a byte
+            # pattern; anything else (such as "what?") is searched for as literal text
+            try:
+                search_bytes = parse_search_text(text, "pattern")
+            except ValueError:
                 search_bytes = text.encode('ascii')
 
             # Search in raw data
-            pos = self.data.find(search_bytes)
-            if pos >= 0:
-                self.goto_offset(pos)
-                self.update_status(f"Found at offset: {pos:08x}")
+            self.last_match_length = len(search_bytes)
+            results = find_all(self.data, search_bytes)
+            if results:
+                self.goto_offset(results[0])
+                self.update_status(f"Found {len(results):,} matches, first at offset: {results[0]:08x}")
             else:
                 self.update_status("Text not found")
+            return results
         except Exception as e:
             self.update_status(f"Search error: {str(e)}")
+            return []
 
     def goto_offset(self, offset):
         if 0 <= offset < len(self.data):
@@ -996,38 +1028,27 @@ class AUSPreviewWindow:
 
     def on_selection_change(self, event=None):
         try:
-            if not hasattr(self, 'hex_editor'):
+            if not self.selection.update_from_text(self.hex_editor, self.current_start, len(self.data)):
                 return
-
-            selection = self.hex_editor.tag_ranges("sel")
-            if not selection:
+            if not self.selection:
                 self.status_var.set("No selection")
                 return
 
-            # Get the line and column of the selection
-            start_line = self.hex_editor.index(selection[0]).split('.')[0]
-            end_line = self.hex_editor.index(selection[1]).split('.')[0]
-            
-            # Calculate byte offsets
-            start_offset = (int(start_line) - 1) * 16
-            end_offset = (int(end_line) - 1) * 16
-            
             # Format offsets with 8 digits
-            start_hex = self.format_hex_offset(start_offset)
-            end_hex = self.format_hex_offset(end_offset)
-            
+            start_hex = self.format_hex_offset(self.selection.start)
+            end_hex = self.format_hex_offset(self.selection.end - 1)
+
             # Update status with the formatted offsets
-            self.status_var.set(f"Selection: {start_hex} to {end_hex}")
-            
+            self.status_var.set(f"Selection: {start_hex} to {end_hex} ({len(self.selection):,} bytes)")
+
             # Update the range inputs with the current selection
             self.start_range.delete(0, tk.END)
             self.start_range.insert(0, start_hex)
             self.end_range.delete(0, tk.END)
             self.end_range.insert(0, end_hex)
-            
+
         except Exception as e:
             self.status_var.set(f"Error updating selection: {str(e)}")
-            print(f"Debug - Error details: {str(e)}")  # For debugging
 
     def select_hex_range(self, editor, start_entry, end_entry):
         """Select hex range in specified editor"""
@@ -1060,24 +1081,6 @@ class AUSPreviewWindow:
         """Format hex offset as 8 digits with leading zeros"""
         return f"{offset:08X}"
 
-    def on_mousewheel(self, event):
-        """Handle mousewheel scrolling"""
-        editor = event.widget
-        if editor == self.sty_editor:
-            delta = -1 if event.delta > 0 else 1
-            max_start = max(0, self.sty_total_lines - self.sty_visible_lines)
-            new_start = max(0, min(self.sty_current_start + delta, max_start))
-            if new_start != self.sty_current_start:
-                self.sty_current_start = new_start
-                self.load_sty_data()
-        else:
-            delta = -1 if event.delta > 0 else 1
-            max_start = max(0, self.aus_total_lines - self.aus_visible_lines)
-            new_start = max(0, min(self.aus_current_start + delta, max_start))
-            if new_start != self.aus_current_start:
-                self.aus_current_start = new_start
-                self.load_aus_data()
-
     def select_last_n_bytes(self, n_bytes):
         """Select the last N bytes of the data"""
         try:
@@ -1089,75 +1092,25 @@ class AUSPreviewWindow:
             # Calculate start and end offsets
             end_offset = total_size - 1
             start_offset = max(0, end_offset - n_bytes + 1)
-
-            # Update the range entry fields
-            self.start_range.delete(0, tk.END)
-            self.start_range.insert(0, f"{start_offset:08X}")
-            self.end_range.delete(0, tk.END)
-            self.end_range.insert(0, f"{end_offset:08X}")
-
-            # Calculate the lines where these offsets appear
-            start_line = (start_offset // 16) - self.current_start + 1
-            end_line = (end_offset // 16) - self.current_start + 1
-
-            # Calculate column positions
-            start_col = 10 + (start_offset % 16) * 3
-            end_col = 10 + (end_offset % 16) * 3 + 2
-
-            # Ensure the end of the file is visible
-            self.current_start = max(0, (end_offset // 16) - self.visible_lines + 2)
-            self.load_visible_data()
-
-            # Clear any existing selection
-            self.hex_editor.tag_remove('sel', '1.0', 'end')
-
-            # Add new selection
-            start_line = (start_offset // 16) - self.current_start + 1
-            end_line = (end_offset // 16) - self.current_start + 1
-            self.hex_editor.tag_add('sel', f"{start_line}.{start_col}", f"{end_line}.{end_col}")
-            self.hex_editor.see(f"{end_line}.0")
-
-            # Update status
-            self.update_status(f"Selected last {n_bytes} bytes (offset {start_offset:08X} to {end_offset:08X})")
+            self.select_offsets(start_offset, end_offset,
+                                f"Selected last {n_bytes} bytes (offset {start_offset:08X} to {end_offset:08X})")
 
         except Exception as e:
             self.update_status(f"Error selecting last {n_bytes} bytes: {str(e)}")
 
-    def select_from_170_to_end(self):
-        """Select data from offset 0x170 to the end of file"""
+    def select_audio_to_end(self):
+        """Select data from the first audio chunk (AASM/AFil) to the end of file"""
         try:
-            # Set start offset to 0x170
-            start_offset = 0x170
+            # Locate the audio chunks from the file structure
+            audio_span = ChunkIndex.build(self.data).audio_span()
+            if audio_span is None:
+                self.update_status("No AASM/AFil chunks found in AUS data")
+                return
+            start_offset = audio_span[0]
             # Set end offset to last byte
             end_offset = len(self.data) - 1
-
-            # Update the range entry fields
-            self.start_range.delete(0, tk.END)
-            self.start_range.insert(0, f"{start_offset:08X}")
-            self.end_range.delete(0, tk.END)
-            self.end_range.insert(0, f"{end_offset:08X}")
-
-            # Ensure the range is visible
-            self.current_start = max(0, (start_offset // 16) - 2)  # Show 2 lines before selection
-            self.load_visible_data()
-
-            # Calculate the lines where these offsets appear
-            start_line = (start_offset // 16) - self.current_start + 1
-            end_line = (end_offset // 16) - self.current_start + 1
-
-            # Calculate column positions
-            start_col = 10 + (start_offset % 16) * 3
-            end_col = 10 + (end_offset % 16) * 3 + 2
-
-            # Clear any existing selection
-            self.hex_editor.tag_remove('sel', '1.0', 'end')
-
-            # Add new selection
-            self.hex_editor.tag_add('sel', f"{start_line}.{start_col}", f"{end_line}.{end_col}")
-            self.hex_editor.see(f"{start_line}.0")
-
-            # Update status
-            self.update_status(f"Selected range from {start_offset:08X} to {end_offset:08X}")
+            self.select_offsets(start_offset, end_offset,
+                                f"Selected range from {start_offset:08X} to {end_offset:08X}")
 
         except Exception as e:
             self.update_status(f"Error selecting range: {str(e)}")
@@ -1184,10 +1137,14 @@ class CombinedPreviewWindow:
         self.chunk_size = 1024 * 64  # 64KB chunks for better performance
         self.sty_current_start = 0
         self.aus_current_start = 0
-        
-        # Initialize data containers
-        self.sty_data = bytearray()
-        self.aus_data = bytes()
+        self.page_cache = PageCache()
+        self.sty_scheduler = RenderScheduler(self.window, self.load_sty_data)
+        self.aus_scheduler = RenderScheduler(self.window, self.load_aus_data)
+        
+        # Initialize data containers (piece tables; the Text widgets are only views)
+        self.sty_data = PieceTable()
+        self.aus_data = PieceTable()
+        self.chunk_layout = None
         self.sty_total_lines = 0
         self.aus_total_lines = 0
         self.sty_visible_lines = 0
@@ -1340,12 +1297,25 @@ class CombinedPreviewWindow:
         status_bar = ttk.Label(self.window, textvariable=self.status_var, relief="sunken")
         status_bar.pack(fill="x", padx=5, pady=5)
         
+        # Page cache statistics
+        self.cache_var = tk.StringVar()
+        cache_bar = ttk.Label(self.window, textvariable=self.cache_var, relief="sunken")
+        cache_bar.pack(fill="x", padx=5)
+        
         # Bottom button frame
         button_frame = ttk.Frame(self.window)
         button_frame.pack(fill="x", pady=5)
         
         ttk.Button(button_frame, text="Replace STY Header with AUS", 
                   command=self.replace_sty_header_with_aus).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Find", command=self.show_find_dialog).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Go to Offset", command=self.show_goto_dialog).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Replace", command=self.show_replace_dialog).pack(side="left", padx=5)
+
+        # Insert mode: paste inserts and delete removes, shifting the bytes after them
+        self.insert_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Insert mode (Ins)", variable=self.insert_mode,
+                        command=self.on_insert_mode_change).pack(side="left", padx=5)
         ttk.Button(button_frame, text="Apply and Close", 
                   command=self.apply_and_close).pack(side="right", padx=5)
 
@@ -1355,10 +1325,21 @@ class CombinedPreviewWindow:
             editor.bind("<<Selection>>", self.on_selection_change)
             editor.bind("<Configure>", self.on_editor_resize)
             editor.bind("<MouseWheel>", self.on_mousewheel)
+            editor.bind("<Key>", self.on_editor_key)
+            editor.bind("<Control-f>", lambda e: self.show_find_dialog())
+            editor.bind("<Control-g>", lambda e: self.show_goto_dialog())
+            editor.bind("<Control-z>", self.undo_change)
+            editor.bind("<Control-y>", self.redo_change)
+            editor.bind("<Control-Z>", self.redo_change)
+        self.window.bind("<Destroy>", self.on_destroy)
         
         # Initialize data and view
-        self.sty_data = self.parent.sty_data if self.parent.sty_data else bytes()
-        self.aus_data = self.parent.aus_data if self.parent.aus_data else bytes()
+        self.sty_data = PieceTable([self.parent.sty_data or b""])
+        self.aus_data = PieceTable([self.parent.aus_data or b""])
+        self.attach_journals()
+        self.attach_chunk_layout()
+        self.sty_selection = Selection()
+        self.aus_selection = Selection()
         
         self.sty_total_lines = (len(self.sty_data) + 15) // 16
         self.aus_total_lines = (len(self.aus_data) + 15) // 16
@@ -1382,28 +1363,12 @@ class CombinedPreviewWindow:
         try:
             self.sty_editor.delete(1.0, tk.END)
             
-            # Calculate chunk boundaries
-            start = self.sty_current_start * 16
-            end = min(start + (self.sty_visible_lines * 16), len(self.sty_data))
-            
-            # Format and display data
-            for i in range(start, end, 16):
-                # Get current chunk
-                chunk = self.sty_data[i:min(i+16, end)]
-                
-                # Format offset
-                offset = f"{i:08X}"
-                
-                # Format hex values
-                hex_values = " ".join(f"{b:02X}" for b in chunk)
-                hex_values = f"{hex_values:<47}"  # Pad to fixed width
-                
-                # Format ASCII representation
-                ascii_values = "".join(chr(b) if 32 <= b <= 126 else "." for b in chunk)
-                
-                # Combine all parts
-                line = f"{offset}  {hex_values}  {ascii_values}\n"
-                self.sty_editor.insert(tk.END, line)
+            # Format and display the visible rows in one insert, reusing cached pages
+            self.sty_editor.insert(tk.END, self.page_cache.get_lines(
+                self.sty_data, self.sty_current_start, self.sty_visible_lines, upper_offset=True))
+            self.sty_selection.apply(self.sty_editor, self.sty_current_start, self.sty_visible_lines)
+            self.cache_var.set(f"{self.page_cache.stats()} | STY {self.sty_scheduler.stats()} | "
+                               f"AUS {self.aus_scheduler.stats()}")
                 
         except Exception as e:
             self.status_var.set(f"Error loading STY data: {str(e)}")
@@ -1413,28 +1378,12 @@ class CombinedPreviewWindow:
         try:
             self.aus_editor.delete(1.0, tk.END)
             
-            # Calculate chunk boundaries
-            start = self.aus_current_start * 16
-            end = min(start + (self.aus_visible_lines * 16), len(self.aus_data))
-            
-            # Format and display data
-            for i in range(start, end, 16):
-                # Get current chunk
-                chunk = self.aus_data[i:min(i+16, end)]
-                
-                # Format offset
-                offset = f"{i:08X}"
-                
-                # Format hex values
-                hex_values = " ".join(f"{b:02X}" for b in chunk)
-                hex_values = f"{hex_values:<47}"  # Pad to fixed width
-                
-                # Format ASCII representation
-                ascii_values = "".join(chr(b) if 32 <= b <= 126 else "." for b in chunk)
-                
-                # Combine all parts
-                line = f"{offset}  {hex_values}  {ascii_values}\n"
-                self.aus_editor.insert(tk.END, line)
+            # Format and display the visible rows in one insert, reusing cached pages
+            self.aus_editor.insert(tk.END, self.page_cache.get_lines(
+                self.aus_data, self.aus_current_start, self.aus_visible_lines, upper_offset=True))
+            self.aus_selection.apply(self.aus_editor, self.aus_current_start, self.aus_visible_lines)
+            self.cache_var.set(f"{self.page_cache.stats()} | STY {self.sty_scheduler.stats()} | "
+                               f"AUS {self.aus_scheduler.stats()}")
                 
         except Exception as e:
             self.status_var.set(f"Error loading AUS data: {str(e)}")
@@ -1448,7 +1397,7 @@ class CombinedPreviewWindow:
             new_start = max(0, min(new_start, max_start))
             if new_start != self.sty_current_start:
                 self.sty_current_start = new_start
-                self.load_sty_data()
+                self.sty_scheduler.request()
         elif args[0] == "scroll":
             amount = int(args[1])
             if args[2] == "units":
@@ -1460,7 +1409,7 @@ class CombinedPreviewWindow:
             new_start = max(0, min(self.sty_current_start + delta, max_start))
             if new_start != self.sty_current_start:
                 self.sty_current_start = new_start
-                self.load_sty_data()
+                self.sty_scheduler.request()
                 
     def on_aus_scroll(self, *args):
         """Handle AUS scrollbar movement"""
@@ -1471,7 +1420,7 @@ class CombinedPreviewWindow:
             new_start = max(0, min(new_start, max_start))
             if new_start != self.aus_current_start:
                 self.aus_current_start = new_start
-                self.load_aus_data()
+                self.aus_scheduler.request()
         elif args[0] == "scroll":
             amount = int(args[1])
             if args[2] == "units":
@@ -1483,7 +1432,7 @@ class CombinedPreviewWindow:
             new_start = max(0, min(self.aus_current_start + delta, max_start))
             if new_start != self.aus_current_start:
                 self.aus_current_start = new_start
-                self.load_aus_data()
+                self.aus_scheduler.request()
                 
     def update_sty_scrollbar(self, *args):
         """Update STY scrollbar position"""
@@ -1500,195 +1449,47 @@ class CombinedPreviewWindow:
             self.aus_vsb.set(first, last)
 
     def copy_selection(self, editor):
-        """Copy selected data with both hex and ASCII representation"""
+        """Copy the selected bytes as a view of the editor's buffer"""
         try:
-            if editor.tag_ranges("sel"):
-                selection = editor.get("sel.first", "sel.last")
-                start_index = editor.index("sel.first")
-                start_line, start_col = map(int, start_index.split('.'))
-                
-                # Determine if selection started in ASCII section
-                is_ascii_selection = start_col >= 61
-                
-                lines = selection.strip().splitlines()
-                hex_data = []
-                ascii_data = []
-                
-                for line in lines:
-                    if len(line) >= 61:  # Make sure line is long enough
-                        if is_ascii_selection:
-                            # Get ASCII part (after column 61)
-                            ascii_part = line[61:77].rstrip()  # Limit to 16 chars
-                            ascii_data.append(ascii_part)
-                            # Convert ASCII to hex
-                            hex_data.extend(ord(c) for c in ascii_part)
-                        else:
-                            # Get hex values (between offset and ASCII)
-                            hex_values = line[10:57].split()
-                            hex_data.extend(int(h, 16) for h in hex_values if h)
-                            # Get corresponding ASCII
-                            ascii_part = line[61:77].rstrip()  # Limit to 16 chars
-                            ascii_data.append(ascii_part)
-                
-                # Store both hex and ASCII data
-                self.parent.clipboard_data = {
-                    'hex': bytes(hex_data),
-                    'ascii': "".join(ascii_data)
-                }
-                self.status_var.set(f"Copied {len(hex_data)} bytes")
+            selection = self.get_editor_selection(editor)
+            if selection:
+                # Piece table sources are never modified, so the view stays valid after later edits
+                origin = "STY editor" if editor == self.sty_editor else "AUS editor"
+                self.parent.clipboard.set(selection.copy(self.get_editor_buffer(editor)), origin)
+                self.status_var.set(f"Copied {len(selection):,} bytes")
             else:
                 self.status_var.set("No selection to copy")
         except Exception as e:
             self.status_var.set(f"Copy error: {str(e)}")
 
     def cut_selection(self, editor):
-        """Cut selected hex data"""
-        try:
-            if editor.tag_ranges("sel"):
-                selection = editor.get("sel.first", "sel.last")
-                hex_data = self.extract_hex_data(selection)
-                self.parent.clipboard_data = bytes.fromhex(hex_data)
-                editor.delete("sel.first", "sel.last")
-                self.status_var.set(f"Cut {len(self.parent.clipboard_data)} bytes")
-            else:
-                self.status_var.set("No selection to cut")
-        except Exception as e:
-            self.status_var.set(f"Cut error: {str(e)}")
-
-    def paste_at_cursor(self, editor):
-        """Paste data at cursor position with proper formatting"""
-        try:
-            if not self.parent.clipboard_data:
-                self.status_var.set("No data to paste")
-                return
-
-            # Get cursor position
-            cursor_pos = editor.index(tk.INSERT)
-            line, col = map(int, cursor_pos.split('.'))
-
-            # Determine if we're in the ASCII section (col >= 61)
-            is_ascii_section = col >= 61
-
-            # If there's a selection, replace it
-            if editor.tag_ranges("sel"):
-                editor.delete("sel.first", "sel.last")
-
-            # Get the data to paste
-            paste_data = self.parent.clipboard_data
-            
-            # Handle different paste formats
-            if isinstance(paste_data, dict):
-                hex_bytes = paste_data['hex']
-            elif isinstance(paste_data, (bytes, bytearray)):
-                hex_bytes = paste_data
-            else:
-                self.status_var.set("Invalid clipboard data format")
-                return
-
-            # Calculate byte position based on cursor
-            if is_ascii_section:
-                byte_pos = min(15, col - 61)  # ASCII section starts at column 61
-            else:
-                byte_pos = min(15, (col - 10) // 3)  # Hex section starts at column 10
-
-            # Process data line by line
-            remaining_bytes = hex_bytes
-            current_line = line
-            current_byte_pos = byte_pos
-
-            while remaining_bytes:
-                # Get current line content
-                try:
-                    line_content = editor.get(f"{current_line}.0", f"{current_line}.end")
-                except tk.TclError:
-                    line_content = ""
-
-                # Parse or create line components
-                if line_content and len(line_content) >= 61:
-                    try:
-                        offset = int(line_content[:8], 16)
-                        hex_values = line_content[10:57].split()
-                        ascii_part = line_content[61:77]
-                    except (ValueError, IndexError):
-                        offset = (current_line - 1) * 16
-                        hex_values = ["00"] * 16
-                        ascii_part = "." * 16
-                else:
-                    offset = (current_line - 1) * 16
-                    hex_values = ["00"] * 16
-                    ascii_part = "." * 16
-
-                # Convert components to lists for modification
-                hex_list = hex_values if len(hex_values) == 16 else ["00"] * 16
-                ascii_list = list(ascii_part.ljust(16, '.'))
-
-                # Calculate how many bytes to process in this line
-                bytes_in_line = min(16 - current_byte_pos, len(remaining_bytes))
-                chunk = remaining_bytes[:bytes_in_line]
-                remaining_bytes = remaining_bytes[bytes_in_line:]
-
-                # Update hex and ASCII representations
-                for i, b in enumerate(chunk):
-                    pos = current_byte_pos + i
-                    if pos < 16:
-                        hex_list[pos] = f"{b:02X}"
-                        ascii_list[pos] = chr(b) if 32 <= b <= 126 else '.'
-
-                # Format the line with strict spacing
-                hex_str = " ".join(hex_list)
-                ascii_str = "".join(ascii_list)
-                formatted_line = f"{offset:08X}  {hex_str:<47}  {ascii_str}"
-
-                # Replace the entire line
-                editor.delete(f"{current_line}.0", f"{current_line}.end")
-                editor.insert(f"{current_line}.0", formatted_line)
-
-                # Move to next line
-                current_line += 1
-                current_byte_pos = 0
-
-            self.status_var.set(f"Pasted {len(hex_bytes)} bytes")
-            
-        except Exception as e:
-            self.status_var.set(f"Paste error: {str(e)}")
-
-    def extract_hex_data(self, text):
-        """Extract hex values from text selection"""
-        hex_data = []
-        for line in text.strip().splitlines():
-            parts = line.split()
-            if len(parts) > 1:
-                hex_values = parts[1:17]  # Get hex values between offset and ASCII
-                hex_data.extend(hex_values)
-        return "".join(hex_data)
+        """Copy the selected bytes, then delete them (zero-fill them in overwrite mode)"""
+        if not self.get_editor_selection(editor):
+            self.status_var.set("No selection to cut")
+            return
+        self.copy_selection(editor)
+        self.delete_selection(editor)
 
     def on_selection_change(self, event=None):
         """Track selection changes and update status"""
         try:
-            editor = self.window.focus_get()
-            if not isinstance(editor, tk.Text):
+            editor = event.widget if event else self.window.focus_get()
+            if editor not in (self.sty_editor, self.aus_editor):
                 return
 
-            if editor.tag_ranges("sel"):
-                # Get selection indices
-                start = editor.index("sel.first")
-                end = editor.index("sel.last")
-                
-                # Convert text positions to line and column
-                start_line, start_col = map(int, start.split('.'))
-                end_line, end_col = map(int, end.split('.'))
-                
-                # Calculate byte offsets
-                start_offset = (start_line - 1) * 16
-                end_offset = (end_line - 1) * 16
-                
+            selection = self.get_editor_selection(editor)
+            first_line = self.sty_current_start if editor == self.sty_editor else self.aus_current_start
+            if not selection.update_from_text(editor, first_line, len(self.get_editor_buffer(editor))):
+                return
+
+            if selection:
                 # Format offsets
-                start_hex = self.format_hex_offset(start_offset)
-                end_hex = self.format_hex_offset(end_offset)
-                
+                start_hex = self.format_hex_offset(selection.start)
+                end_hex = self.format_hex_offset(selection.end - 1)
+
                 # Update status and range inputs
-                self.status_var.set(f"Selection: {start_hex} to {end_hex}")
-                
+                self.status_var.set(f"Selection: {start_hex} to {end_hex} ({len(selection):,} bytes)")
+
                 # Update appropriate range inputs
                 if editor == self.sty_editor:
                     self.sty_start_offset.delete(0, tk.END)
@@ -1714,18 +1515,24 @@ class CombinedPreviewWindow:
             # Convert hex to int
             start_offset = int(start_hex, 16)
             end_offset = int(end_hex, 16)
-            
-            # Calculate lines to select
-            start_line = (start_offset // 16) + 1
-            end_line = (end_offset // 16) + 1
-            
-            # Select the range
-            editor.tag_remove('sel', '1.0', 'end')
-            editor.tag_add('sel', f"{start_line}.0", f"{end_line}.0")
-            editor.see(f"{start_line}.0")
+            data = self.get_editor_buffer(editor)
+            if not 0 <= start_offset <= end_offset < len(data):
+                self.status_var.set(f"Invalid range. Must be between 0 and {len(data)-1:08X}")
+                return
+
+            # Select by offset and scroll to the start; only the visible rows get tagged
+            self.get_editor_selection(editor).set(start_offset, end_offset + 1)
+            visible_lines = self.sty_visible_lines if editor == self.sty_editor else self.aus_visible_lines
+            first_line = max(0, min(start_offset // 16 - 2, (len(data) + 15) // 16 - visible_lines))
+            if editor == self.sty_editor:
+                self.sty_current_start = first_line
+            else:
+                self.aus_current_start = first_line
+            self.refresh_editor(editor)
             
             # Update status
-            self.status_var.set(f"Selected range: {self.format_hex_offset(start_offset)} to {self.format_hex_offset(end_offset)}")
+            self.status_var.set(f"Selected range: {self.format_hex_offset(start_offset)} to "
+                                f"{self.format_hex_offset(end_offset)} ({end_offset - start_offset + 1:,} bytes)")
             
         except ValueError:
             self.status_var.set("Invalid hex value. Please enter valid hex numbers.")
@@ -1736,12 +1543,161 @@ class CombinedPreviewWindow:
         """Format hex offset as 8 digits with leading zeros"""
         return f"{offset:08X}"
 
+    def on_destroy(self, event):
+        """Stop the page cache prefetch worker when the window goes away"""
+        if event.widget == self.window:
+            self.page_cache.close()
+
+    def attach_journals(self):
+        """Record the edits of both buffers for undo/redo"""
+        for data in (self.sty_data, self.aus_data):
+            data.journal = EditJournal(max_bytes=UNDO_MEMORY_LIMIT)
+
+    def attach_chunk_layout(self):
+        """Track the chunk tree of the STY buffer so length fields can be fixed up on apply"""
+        try:
+            self.chunk_layout = ChunkLayout.build(self.sty_data)
+        except SFFError:
+            # Not a chunked file (yet); nothing to keep in step
+            self.chunk_layout = None
+        self.sty_data.on_edit = self.chunk_layout.edit if self.chunk_layout else None
+
+    def fix_chunk_lengths(self):
+        """Patch the length fields of every chunk whose payload was resized"""
+        layout = self.chunk_layout
+        if layout is None:
+            return
+        if layout.stale:
+            self.parent.log(f"Warning: chunk lengths not updated, {layout.stale}")
+            return
+        # The patches are overwrites of header bytes; do not feed them back into the layout
+        self.sty_data.on_edit = None
+        try:
+            # All patches undo together, as one step
+            with self.sty_data.journal.group():
+                patched = layout.apply(self.sty_data)
+        finally:
+            self.sty_data.on_edit = layout.edit
+        if patched:
+            self.parent.log(f"Updated {patched} chunk length field{'s' if patched != 1 else ''}")
+
+    def get_editor_buffer(self, editor):
+        """Return the piece table shown in the given editor"""
+        return self.sty_data if editor == self.sty_editor else self.aus_data
+
+    def get_editor_selection(self, editor):
+        """Return the offset-based selection of the given editor"""
+        return self.sty_selection if editor == self.sty_editor else self.aus_selection
+
+    def refresh_editor(self, editor):
+        """Redraw an editor after its buffer changed"""
+        if editor == self.sty_editor:
+            self.sty_total_lines = (len(self.sty_data) + 15) // 16
+            self.load_sty_data()
+        else:
+            self.aus_total_lines = (len(self.aus_data) + 15) // 16
+            self.load_aus_data()
+
+    def repaint_range(self, editor, start, end=None):
+        """Repaint only the visible rows that show buffer offsets [start, end)
+
+        end=None marks everything from start on as dirty, which is what an
+        edit that changes the buffer length needs. The dirty rows are
+        formatted with one format_lines call and swapped in with a single
+        delete and insert, so the rest of the page is left alone.
+        """
+        data = self.get_editor_buffer(editor)
+        total_lines = (len(data) + 15) // 16
+        is_sty = editor == self.sty_editor
+        first_line = self.sty_current_start if is_sty else self.aus_current_start
+        visible_lines = self.sty_visible_lines if is_sty else self.aus_visible_lines
+
+        # A deletion near the end can leave the page past the last row; pull it back and redraw it all
+        last_page_start = max(0, total_lines - visible_lines)
+        if first_line > last_page_start:
+            first_line, start, end = last_page_start, 0, None
+        if is_sty:
+            self.sty_total_lines, self.sty_current_start = total_lines, first_line
+        else:
+            self.aus_total_lines, self.aus_current_start = total_lines, first_line
+
+        first_row = max(first_line, start // 16)
+        last_row = first_line + visible_lines if end is None else (max(start, end - 1) // 16) + 1
+        last_row = min(last_row, first_line + visible_lines)
+        if first_row < last_row:
+            text = format_lines(data[first_row * 16:min(last_row, total_lines) * 16], first_row * 16,
+                                upper_offset=True)
+            first_index = f"{first_row - first_line + 1}.0"
+            editor.delete(first_index, "end" if end is None else f"{last_row - first_line + 1}.0")
+            editor.insert(first_index, text)
+            self.get_editor_selection(editor).apply(editor, first_line, visible_lines)
+        # The thumb size depends on total_lines, which a length-changing edit just moved
+        if is_sty:
+            self.update_sty_scrollbar()
+        else:
+            self.update_aus_scrollbar()
+
+    def index_to_offset(self, editor, index):
+        """Convert a Text index in the hex or ASCII column to a buffer offset"""
+        first_line = self.sty_current_start if editor == self.sty_editor else self.aus_current_start
+        return index_to_offset(editor.index(index), first_line)
+
+    def show_offset(self, editor, offset, length=1):
+        """Scroll editor so offset is visible and highlight length bytes from it"""
+        data = self.get_editor_buffer(editor)
+        visible_lines = self.sty_visible_lines if editor == self.sty_editor else self.aus_visible_lines
+        total_lines = (len(data) + 15) // 16
+        first_line = max(0, min(offset // 16 - 5, total_lines - visible_lines))  # Show 5 lines before target
+        if editor == self.sty_editor:
+            self.sty_current_start = first_line
+            self.load_sty_data()
+        else:
+            self.aus_current_start = first_line
+            self.load_aus_data()
+
+        # Tag the highlighted bytes row by row, only for the rows on screen
+        editor.tag_remove("found", "1.0", tk.END)
+        end = min(offset + max(1, length), len(data))
+        pos = offset
+        while pos < end:
+            row = pos // 16 - first_line
+            if row >= visible_lines:
+                break
+            row_end = min(end, (pos // 16 + 1) * 16)
+            start_col = 10 + (pos % 16) * 3
+            end_col = 10 + ((row_end - 1) % 16) * 3 + 2
+            editor.tag_add("found", f"{row + 1}.{start_col}", f"{row + 1}.{end_col}")
+            pos = row_end
+        editor.tag_config("found", background="yellow")
+        editor.tag_raise("found")
+        editor.mark_set(tk.INSERT, f"{offset // 16 - first_line + 1}.{10 + (offset % 16) * 3}")
+
+    def on_editor_key(self, event):
+        """Keep the Text widgets read-only; edits go through the buffers"""
+        if event.keysym == "Delete":
+            self.delete_selection(event.widget)
+            return "break"
+        if event.keysym == "Insert":
+            self.insert_mode.set(not self.insert_mode.get())
+            self.on_insert_mode_change()
+            return "break"
+        if event.keysym in ("BackSpace", "Return", "Tab") or (event.char and event.char.isprintable()):
+            return "break"
+        return None
+
+    def on_insert_mode_change(self):
+        if self.insert_mode.get():
+            self.status_var.set("Insert mode: paste inserts, delete removes bytes")
+        else:
+            self.status_var.set("Overwrite mode: paste overwrites, delete zero-fills bytes")
+
     def apply_and_close(self):
         """Apply changes and close the window"""
         try:
-            # Get final STY data
-            sty_content = self.sty_editor.get(1.0, tk.END)
-            final_data = self.get_hex_data(sty_content)
+            self.fix_chunk_lengths()
+
+            # Hand the piece table over; export streams its pieces to disk
+            final_data = self.sty_data
             
             # Update parent's STY data
             self.parent.sty_data = final_data
@@ -1775,7 +1731,7 @@ class CombinedPreviewWindow:
 
     def append_aus_to_sty(self):
         """Append the copied AUS data to STY"""
-        if not self.aus_copied_data:
+        if not self.parent.clipboard:
             messagebox.showerror("Error", "No AUS data to append. Please select and copy data from AUS file first.")
             return
         if not self.sty_data:
@@ -1783,17 +1739,17 @@ class CombinedPreviewWindow:
             return
             
         try:
-            # Create new combined data
-            new_data = self.sty_data + self.aus_copied_data
+            # Create new combined data without copying either buffer
+            new_data = SegmentedBuffer([self.sty_data, self.parent.clipboard.data])
             
             # Update STY data
             self.sty_data = new_data
             
             # Log the operation
-            self.log(f"Successfully appended {len(self.aus_copied_data)} bytes from AUS to STY data")
+            self.log(f"Successfully appended {len(self.parent.clipboard)} bytes from AUS to STY data")
             self.log(f"New STY data size: {len(self.sty_data)} bytes")
             
-            messagebox.showinfo("Success", f"Successfully appended {len(self.aus_copied_data)} bytes to STY data")
+            messagebox.showinfo("Success", f"Successfully appended {len(self.parent.clipboard)} bytes to STY data")
         except Exception as e:
             self.log(f"Error appending AUS data: {str(e)}")
             messagebox.showerror("Error", f"Failed to append AUS data: {str(e)}")
@@ -1807,21 +1763,14 @@ class CombinedPreviewWindow:
             new_start = max(0, min(self.sty_current_start + delta, max_start))
             if new_start != self.sty_current_start:
                 self.sty_current_start = new_start
-                self.load_sty_data()
+                self.sty_scheduler.request()
         else:
             delta = -1 if event.delta > 0 else 1
             max_start = max(0, self.aus_total_lines - self.aus_visible_lines)
             new_start = max(0, min(self.aus_current_start + delta, max_start))
             if new_start != self.aus_current_start:
                 self.aus_current_start = new_start
-                self.load_aus_data()
-
-    def toggle_hex_mode(self):
-        """Toggle between hex and ASCII paste modes"""
-        if self.parent.clipboard_data and isinstance(self.parent.clipboard_data, dict):
-            current_format = self.parent.clipboard_data.get('format', 'hex')
-            self.parent.clipboard_data['format'] = 'ascii' if current_format == 'hex' else 'hex'
-            self.status_var.set(f"Paste mode: {self.parent.clipboard_data['format'].upper()}")
+                self.aus_scheduler.request()
 
     def save_changes(self):
         """Save changes to the parent's data"""
@@ -1840,162 +1789,6 @@ class CombinedPreviewWindow:
         except Exception as e:
             self.status_var.set(f"Error reloading data: {str(e)}")
 
-    def copy_selection(self, event=None):
-        """Copy selected data to clipboard"""
-        try:
-            if not self.hex_editor.tag_ranges("sel"):
-                return "break"
-                
-            selection = self.hex_editor.get("sel.first", "sel.last")
-            start_index = self.hex_editor.index("sel.first")
-            start_line, start_col = map(int, start_index.split('.'))
-            
-            # Determine if selection started in ASCII section
-            is_ascii_selection = start_col >= 61
-            
-            lines = selection.strip().splitlines()
-            hex_data = []
-            ascii_data = []
-            
-            for line in lines:
-                if len(line) >= 61:  # Make sure line is long enough
-                    if is_ascii_selection:
-                        # Get ASCII part (after column 61)
-                        ascii_part = line[61:77].rstrip()
-                        ascii_data.append(ascii_part)
-                        # Convert ASCII to hex
-                        hex_data.extend(ord(c) for c in ascii_part)
-                    else:
-                        # Get hex values (between offset and ASCII)
-                        hex_values = line[10:57].split()
-                        hex_data.extend(int(h, 16) for h in hex_values if h)
-                        # Get corresponding ASCII
-                        ascii_part = line[61:77].rstrip()
-                        ascii_data.append(ascii_part)
-            
-            # Store both hex and ASCII data
-            self.parent.clipboard_data = {
-                'hex': bytes(hex_data),
-                'ascii': "".join(ascii_data)
-            }
-            
-            self.status_var.set(f"Copied {len(hex_data)} bytes")
-            return "break"
-        except Exception as e:
-            self.status_var.set(f"Copy error: {str(e)}")
-            return "break"
-
-    def cut_selection(self, event=None):
-        """Cut selected data"""
-        if not self.hex_editor.tag_ranges("sel"):
-            return "break"
-            
-        # First copy
-        self.copy_selection()
-        
-        # Then delete
-        self.hex_editor.delete("sel.first", "sel.last")
-        
-        return "break"
-
-    def paste_at_cursor(self, event=None):
-        """Paste data at cursor position"""
-        try:
-            if not self.parent.clipboard_data:
-                return "break"
-
-            # Get cursor position
-            cursor_pos = self.hex_editor.index(tk.INSERT)
-            line, col = map(int, cursor_pos.split('.'))
-
-            # Determine if we're in the ASCII section (col >= 61)
-            is_ascii_section = col >= 61
-
-            # If there's a selection, replace it
-            if self.hex_editor.tag_ranges("sel"):
-                self.hex_editor.delete("sel.first", "sel.last")
-
-            # Get the data to paste
-            paste_data = self.parent.clipboard_data
-            
-            # Handle different paste formats
-            if isinstance(paste_data, dict):
-                hex_bytes = paste_data['hex']
-            elif isinstance(paste_data, (bytes, bytearray)):
-                hex_bytes = paste_data
-            else:
-                self.status_var.set("Invalid clipboard data format")
-                return "break"
-
-            # Calculate byte position based on cursor
-            if is_ascii_section:
-                byte_pos = min(15, col - 61)  # ASCII section starts at column 61
-            else:
-                byte_pos = min(15, (col - 10) // 3)  # Hex section starts at column 10
-
-            # Process data line by line
-            remaining_bytes = hex_bytes
-            current_line = line
-            current_byte_pos = byte_pos
-
-            while remaining_bytes:
-                # Get current line content
-                try:
-                    line_content = self.hex_editor.get(f"{current_line}.0", f"{current_line}.end")
-                except tk.TclError:
-                    line_content = ""
-
-                # Parse or create line components
-                if line_content and len(line_content) >= 61:
-                    try:
-                        offset = int(line_content[:8], 16)
-                        hex_values = line_content[10:57].split()
-                        ascii_part = line_content[61:77]
-                    except (ValueError, IndexError):
-                        offset = (current_line - 1) * 16
-                        hex_values = ["00"] * 16
-                        ascii_part = "." * 16
-                else:
-                    offset = (current_line - 1) * 16
-                    hex_values = ["00"] * 16
-                    ascii_part = "." * 16
-
-                # Convert components to lists for modification
-                hex_list = hex_values if len(hex_values) == 16 else ["00"] * 16
-                ascii_list = list(ascii_part.ljust(16, '.'))
-
-                # Calculate how many bytes to process in this line
-                bytes_in_line = min(16 - current_byte_pos, len(remaining_bytes))
-                chunk = remaining_bytes[:bytes_in_line]
-                remaining_bytes = remaining_bytes[bytes_in_line:]
-
-                # Update hex and ASCII representations
-                for i, b in enumerate(chunk):
-                    pos = current_byte_pos + i
-                    if pos < 16:
-                        hex_list[pos] = f"{b:02X}"
-                        ascii_list[pos] = chr(b) if 32 <= b <= 126 else '.'
-
-                # Format the line with strict spacing
-                hex_str = " ".join(hex_list)
-                ascii_str = "".join(ascii_list)
-                formatted_line = f"{offset:08X}  {hex_str:<47}  {ascii_str}"
-
-                # Replace the entire line
-                self.hex_editor.delete(f"{current_line}.0", f"{current_line}.end")
-                self.hex_editor.insert(f"{current_line}.0", formatted_line)
-
-                # Move to next line
-                current_line += 1
-                current_byte_pos = 0
-
-            self.status_var.set(f"Pasted {len(hex_bytes)} bytes")
-            return "break"
-            
-        except Exception as e:
-            self.status_var.set(f"Paste error: {str(e)}")
-            return "break"
-
     def show_replace_dialog(self):
         """Show replace dialog"""
         dialog = tk.Toplevel(self.window)
@@ -2097,21 +1890,35 @@ class CombinedPreviewWindow:
         return None
 
     def undo_change(self, event=None):
-        """Undo last change"""
-        try:
-            self.hex_editor.edit_undo()
-            self.status_var.set("Undo")
-        except tk.TclError:
-            self.status_var.set("Nothing to undo")
-        return "break"
+        """Undo the last edit of the focused buffer"""
+        return self.step_journal(event, undo=True)
 
     def redo_change(self, event=None):
-        """Redo last undone change"""
+        """Redo the last undone edit of the focused buffer"""
+        return self.step_journal(event, undo=False)
+
+    def step_journal(self, event, undo):
+        editor = event.widget if event else self.window.focus_get()
+        if editor not in (self.sty_editor, self.aus_editor):
+            editor = self.sty_editor
+        data = self.get_editor_buffer(editor)
+        action = "Undo" if undo else "Redo"
+        if data.journal is None:
+            self.status_var.set(f"Nothing to {action.lower()}")
+            return "break"
         try:
-            self.hex_editor.edit_redo()
-            self.status_var.set("Redo")
-        except tk.TclError:
-            self.status_var.set("Nothing to redo")
+            # The journal splices the old pieces back in; no bytes are copied
+            dirty = data.journal.undo(data) if undo else data.journal.redo(data)
+        except Exception as e:
+            self.status_var.set(f"{action} error: {str(e)}")
+            return "break"
+        if dirty is None:
+            self.status_var.set(f"Nothing to {action.lower()}")
+            return "break"
+        start, end = dirty
+        self.get_editor_selection(editor).clear()
+        self.repaint_range(editor, start, end)
+        self.status_var.set(f"{action} at {self.format_hex_offset(start)}")
         return "break"
 
     def calculate_visible_lines(self):
@@ -2127,17 +1934,22 @@ class CombinedPreviewWindow:
         """Handle editor resize events"""
         self.calculate_visible_lines()
         if event.widget == self.sty_editor:
-            self.load_sty_data()
+            self.sty_scheduler.request()
         else:
-            self.load_aus_data()
+            self.aus_scheduler.request()
             
     def show_find_dialog(self):
-        """Show find dialog for searching hex or text"""
+        """Show find dialog that searches the whole buffer on a worker thread"""
         dialog = tk.Toplevel(self.window)
         dialog.title("Find")
-        dialog.geometry("300x150")
+        dialog.geometry("400x360")
         dialog.transient(self.window)
-        dialog.grab_set()
+
+        # Search the editor that had focus when the dialog was opened
+        editor = self.window.focus_get()
+        if not isinstance(editor, tk.Text):
+            editor = self.sty_editor  # Default to STY editor
+        state = {"job": None, "results": [], "index": -1, "length": 0}
 
         # Search frame
         search_frame = ttk.Frame(dialog)
@@ -2156,51 +1968,95 @@ class CombinedPreviewWindow:
         search_type = tk.StringVar(value="hex")
         ttk.Radiobutton(options_frame, text="Hex", variable=search_type, value="hex").pack(side="left", padx=5)
         ttk.Radiobutton(options_frame, text="Text", variable=search_type, value="text").pack(side="left", padx=5)
+        ttk.Radiobutton(options_frame, text="Pattern (?? 4? [10-1F])", variable=search_type,
+                        value="pattern").pack(side="left", padx=5)
+
+        result_var = tk.StringVar()
+        ttk.Label(dialog, textvariable=result_var).pack(fill="x", padx=10)
+
+        # Every match, click to jump to it; only the first 10,000 are listed
+        results_list = tk.Listbox(dialog, font=("Courier", 9), height=10)
+        results_list.pack(fill="both", expand=True, padx=5, pady=5)
+        list_limit = 10000
+
+        def show_hit(step, index=None):
+            results = state["results"]
+            if not results:
+                return
+            state["index"] = (state["index"] + step) % len(results) if index is None else index
+            offset = results[state["index"]]
+            if state["index"] < list_limit:
+                results_list.selection_clear(0, "end")
+                results_list.selection_set(state["index"])
+                results_list.see(state["index"])
+            self.show_offset(editor, offset, state["length"])
+            result_var.set(f"Match {state['index'] + 1:,} of {len(results):,} at {self.format_hex_offset(offset)}")
+
+        def poll():
+            job = state["job"]
+            if job is None or not dialog.winfo_exists():
+                return
+            if not job.done:
+                result_var.set(f"Searching... {job.progress * 100:.0f}% ({len(job.results):,} found)")
+                dialog.after(50, poll)
+                return
+            if job.error:
+                result_var.set(f"Search error: {job.error}")
+                return
+            state["results"] = job.results
+            state["index"] = -1
+            results_list.delete(0, "end")
+            for offset in job.results[:list_limit]:
+                results_list.insert("end", describe_match(job.data, offset, state["length"]))
+            if len(job.results) > list_limit:
+                results_list.insert("end", f"... {len(job.results) - list_limit:,} more (use Next/Previous)")
+            self.status_var.set(f"Found {len(job.results):,} matches in {len(job.data):,} bytes "
+                                f"({job.elapsed * 1000:.0f} ms)")
+            if job.results:
+                show_hit(1)
+            else:
+                result_var.set("No matches found")
 
         def find():
             search_text = search_var.get().strip()
             if not search_text:
                 return
-
-            editor = self.window.focus_get()
-            if not isinstance(editor, tk.Text):
-                editor = self.sty_editor  # Default to STY editor
-
-            # Convert search text based on type
             try:
-                if search_type.get() == "hex":
-                    search_bytes = bytes.fromhex(search_text.replace(" ", ""))
-                else:
-                    search_bytes = search_text.encode('ascii', errors='ignore')
-
-                # Remove previous highlights
-                editor.tag_remove("found", "1.0", tk.END)
-
-                # Search in visible text
-                start_pos = "1.0"
-                while True:
-                    start_pos = editor.search(search_text, start_pos, tk.END)
-                    if not start_pos:
-                        break
-                    end_pos = f"{start_pos}+{len(search_text)}c"
-                    editor.tag_add("found", start_pos, end_pos)
-                    editor.tag_config("found", background="yellow")
-                    start_pos = end_pos
-
-                editor.tag_raise("found")
-                self.status_var.set(f"Found matches for: {search_text}")
+                search_bytes = parse_search_text(search_text, search_type.get())
+            except ValueError as e:
+                self.status_var.set(f"Invalid search value: {e}")
+                return
+            if not search_bytes:
+                return
+            if state["job"] is not None:
+                state["job"].cancel()
+            state["length"] = len(search_bytes)
+            state["job"] = SearchJob(self.get_editor_buffer(editor), search_bytes).start()
+            poll()
+
+        def on_pick(event):
+            picked = results_list.curselection()
+            if picked and picked[0] < min(len(state["results"]), list_limit) and picked[0] != state["index"]:
+                show_hit(0, picked[0])
+
+        def close():
+            if state["job"] is not None:
+                state["job"].cancel()
+            dialog.destroy()
 
-            except ValueError:
-                self.status_var.set("Invalid search value")
+        results_list.bind("<<ListboxSelect>>", on_pick)
 
         # Buttons
         button_frame = ttk.Frame(dialog)
         button_frame.pack(fill="x", padx=5, pady=5)
-        ttk.Button(button_frame, text="Find", command=find).pack(side="right", padx=5)
-        ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Find All", command=find).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Next", command=lambda: show_hit(1)).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Previous", command=lambda: show_hit(-1)).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Close", command=close).pack(side="right", padx=5)
 
-        # Bind Enter key
-        dialog.bind("<Return>", lambda e: find())
+        # Bind Enter key: first search, then step through the matches
+        dialog.bind("<Return>", lambda e: show_hit(1) if state["results"] else find())
+        dialog.protocol("WM_DELETE_WINDOW", close)
 
     def show_goto_dialog(self):
         """Show dialog for jumping to specific offset"""
@@ -2226,19 +2082,12 @@ class CombinedPreviewWindow:
                 editor = self.window.focus_get()
                 if not isinstance(editor, tk.Text):
                     editor = self.sty_editor  # Default to STY editor
+                if not 0 <= offset < len(self.get_editor_buffer(editor)):
+                    self.status_var.set("Offset out of range")
+                    return
 
-                # Calculate line and column
-                line = (offset // 16) + 1
-                col = 10 + (offset % 16) * 3  # Position in hex section
-
-                # Ensure the line is visible
-                editor.see(f"{line}.0")
-                editor.mark_set(tk.INSERT, f"{line}.{col}")
-                
-                # Highlight the position
-                editor.tag_remove("found", "1.0", tk.END)
-                editor.tag_add("found", f"{line}.{col}", f"{line}.{col+2}")
-                editor.tag_config("found", background="yellow")
+                # Scroll the virtual view to the offset and highlight it
+                self.show_offset(editor, offset)
 
                 self.status_var.set(f"Moved to offset: {offset:08X}")
                 dialog.destroy()
@@ -2259,10 +2108,15 @@ class CombinedPreviewWindow:
         """Show dialog for find and replace operations"""
         dialog = tk.Toplevel(self.window)
         dialog.title("Find and Replace")
-        dialog.geometry("400x200")
+        dialog.geometry("440x360")
         dialog.transient(self.window)
         dialog.grab_set()
 
+        # Replace in the editor that had focus when the dialog was opened
+        editor = self.window.focus_get()
+        if not isinstance(editor, tk.Text):
+            editor = self.sty_editor  # Default to STY editor
+
         # Find frame
         find_frame = ttk.LabelFrame(dialog, text="Find")
         find_frame.pack(fill="x", padx=5, pady=5)
@@ -2288,235 +2142,136 @@ class CombinedPreviewWindow:
         replace_type = tk.StringVar(value="hex")
         ttk.Radiobutton(options_frame, text="Hex", variable=replace_type, value="hex").pack(side="left", padx=5)
         ttk.Radiobutton(options_frame, text="Text", variable=replace_type, value="text").pack(side="left", padx=5)
+        ttk.Radiobutton(options_frame, text="Pattern", variable=replace_type, value="pattern").pack(side="left", padx=5)
 
-        def replace_all():
+        # Preview of the first hits as "offset  old -> new"
+        preview_list = tk.Listbox(dialog, font=("Courier", 9), height=8)
+        preview_list.pack(fill="both", expand=True, padx=5, pady=5)
+        preview_limit = 100
+
+        def parse():
             find_text = find_var.get().strip()
             replace_text = replace_var.get().strip()
             if not find_text:
-                return
-
-            editor = self.window.focus_get()
-            if not isinstance(editor, tk.Text):
-                editor = self.sty_editor  # Default to STY editor
-
+                return None
             try:
-                # Convert search and replace text based on type
-                if replace_type.get() == "hex":
-                    find_bytes = bytes.fromhex(find_text.replace(" ", ""))
-                    replace_bytes = bytes.fromhex(replace_text.replace(" ", ""))
-                else:
-                    find_bytes = find_text.encode('ascii', errors='ignore')
-                    replace_bytes = replace_text.encode('ascii', errors='ignore')
-
-                # Perform replacement
-                content = editor.get("1.0", tk.END)
-                new_content = content.replace(find_text, replace_text)
-                
-                if new_content != content:
-                    editor.delete("1.0", tk.END)
-                    editor.insert("1.0", new_content)
-                    self.status_var.set(f"Replaced all occurrences of {find_text}")
-                else:
-                    self.status_var.set("No matches found")
+                # Patterns are replaced with hex bytes
+                find_bytes = parse_search_text(find_text, replace_type.get())
+                replace_bytes = parse_search_text(replace_text, "text" if replace_type.get() == "text" else "hex")
+            except ValueError as e:
+                self.status_var.set(f"Invalid search value: {e}")
+                return None
+            if not find_bytes:
+                return None
+            return find_bytes, replace_bytes
+
+        def collect(find_bytes):
+            # Left-to-right, non-overlapping matches: the hits a sequential replace would make
+            return find_all(self.get_editor_buffer(editor), find_bytes, overlapping=False)
+
+        def preview():
+            parsed = parse()
+            if parsed is None:
+                return
+            find_bytes, replace_bytes = parsed
+            data = self.get_editor_buffer(editor)
+            offsets = collect(find_bytes)
+            preview_list.delete(0, "end")
+            new_text = replace_bytes.hex(" ").upper() or "(delete)"
+            for offset in offsets[:preview_limit]:
+                preview_list.insert("end", f"{describe_match(data, offset, len(find_bytes))} -> {new_text}")
+            if len(offsets) > preview_limit:
+                preview_list.insert("end", f"... {len(offsets) - preview_limit:,} more")
+            self.status_var.set(f"{len(offsets):,} occurrences would be replaced")
 
-            except ValueError:
-                self.status_var.set("Invalid hex values")
+        def replace_all():
+            parsed = parse()
+            if parsed is None:
+                return
+            find_bytes, replace_bytes = parsed
+            data = self.get_editor_buffer(editor)
+            started = time.perf_counter()
+            # Collect every offset first, then rebuild the piece list once
+            count = data.replace_all(collect(find_bytes), len(find_bytes), replace_bytes)
+            elapsed = time.perf_counter() - started
+            preview_list.delete(0, "end")
+            if count:
+                self.refresh_editor(editor)
+                self.status_var.set(f"Replaced {count:,} occurrences of {find_var.get().strip()} "
+                                    f"({elapsed * 1000:.0f} ms)")
+            else:
+                self.status_var.set("No matches found")
 
         # Buttons
         button_frame = ttk.Frame(dialog)
         button_frame.pack(fill="x", padx=5, pady=5)
         ttk.Button(button_frame, text="Replace All", command=replace_all).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Preview", command=preview).pack(side="right", padx=5)
         ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side="right", padx=5)
 
         find_entry.focus_set()
 
     def delete_selection(self, editor):
-        """Delete selected data while maintaining line structure and preventing overlaps"""
+        """Remove the selected bytes in insert mode, zero-fill them in overwrite mode"""
         try:
-            if not editor.tag_ranges("sel"):
+            # The selection is kept in buffer offsets, so it may extend past the visible rows
+            data = self.get_editor_buffer(editor)
+            selection = self.get_editor_selection(editor)
+            start = selection.start
+            end = min(len(data), selection.end)
+            if end <= start:
                 self.status_var.set("No selection to delete")
                 return
 
-            # Get selection range
-            sel_start = editor.index("sel.first")
-            sel_end = editor.index("sel.last")
-            start_line, start_col = map(int, sel_start.split('.'))
-            end_line, end_col = map(int, sel_end.split('.'))
-
-            # Process each line in the selection
-            for line in range(start_line, end_line + 1):
-                # Get current line content
-                line_content = editor.get(f"{line}.0", f"{line}.end")
-                if not line_content or len(line_content) < 8:  # Ensure minimum length for offset
-                    continue
-
-                # Parse line components
-                try:
-                    # Extract offset
-                    offset = int(line_content[:8], 16)
-                    
-                    # Extract hex values (columns 10-57)
-                    hex_part = line_content[10:58] if len(line_content) >= 58 else ""
-                    hex_values = hex_part.split()
-                    
-                    # Ensure we have exactly 16 hex values
-                    hex_values.extend(["00"] * (16 - len(hex_values)))
-                    
-                    # Extract ASCII part (columns 61-77)
-                    ascii_part = line_content[61:77] if len(line_content) >= 77 else ""
-                    ascii_list = list(ascii_part.ljust(16, '.'))
-                    
-                except (ValueError, IndexError) as e:
-                    print(f"Error parsing line {line}: {str(e)}")
-                    continue
-
-                # Calculate byte positions to delete based on selection
-                if line == start_line and line == end_line:
-                    # Single line selection
-                    if start_col >= 61:  # ASCII section
-                        start_byte = min(15, start_col - 61)
-                        end_byte = min(16, end_col - 61)
-                    else:  # Hex section
-                        start_byte = min(15, (start_col - 10) // 3)
-                        end_byte = min(16, (end_col - 10) // 3 + 1)
-                elif line == start_line:
-                    # First line of multi-line selection
-                    if start_col >= 61:
-                        start_byte = min(15, start_col - 61)
-                    else:
-                        start_byte = min(15, (start_col - 10) // 3)
-                    end_byte = 16
-                elif line == end_line:
-                    # Last line of multi-line selection
-                    start_byte = 0
-                    if end_col >= 61:
-                        end_byte = min(16, end_col - 61)
-                    else:
-                        end_byte = min(16, (end_col - 10) // 3 + 1)
-                else:
-                    # Middle lines - delete entire line
-                    start_byte = 0
-                    end_byte = 16
-
-                # Ensure valid byte range
-                start_byte = max(0, min(start_byte, 15))
-                end_byte = max(start_byte + 1, min(end_byte, 16))
-
-                # Replace selected bytes with zeros
-                for i in range(start_byte, end_byte):
-                    hex_values[i] = "00"
-                    ascii_list[i] = "."
-
-                # Format the line with strict spacing
-                hex_str = " ".join(hex_values)
-                ascii_str = "".join(ascii_list[:16])
-                
-                # Ensure proper spacing in the formatted line
-                new_line = f"{offset:08X}  {hex_str:<47}  {ascii_str}"
+            if self.insert_mode.get():
+                # Cut the range out of the piece table; everything after it shifts down
+                data.delete(start, end - start)
+                selection.clear()
+                self.repaint_range(editor, start)
+                self.status_var.set(f"Deleted {end - start} bytes at {self.format_hex_offset(start)}")
+                return
 
-                # Replace the line content
-                editor.delete(f"{line}.0", f"{line}.end")
-                editor.insert(f"{line}.0", new_line)
+            # Replace selected bytes with zeros and repaint just the rows they are on
+            data.replace(start, end - start, bytes(end - start))
+            self.repaint_range(editor, start, end)
 
-            self.status_var.set("Selection deleted")
+            self.status_var.set(f"Zeroed {end - start} bytes at {self.format_hex_offset(start)}")
 
         except Exception as e:
             self.status_var.set(f"Delete error: {str(e)}")
-            print(f"Delete error details: {str(e)}")  # For debugging
 
     def paste_at_cursor(self, editor):
-        """Paste data at cursor position with improved ASCII handling"""
+        """Insert or overwrite the clipboard data at the cursor position"""
         try:
-            if not self.parent.clipboard_data:
+            if not self.parent.clipboard:
                 self.status_var.set("No data to paste")
                 return
 
-            # Get cursor position
-            cursor_pos = editor.index(tk.INSERT)
-            line, col = map(int, cursor_pos.split('.'))
-
-            # Determine if we're in the ASCII section (col >= 61)
-            is_ascii_section = col >= 61
-
-            # If there's a selection, replace it
-            if editor.tag_ranges("sel"):
-                editor.delete("sel.first", "sel.last")
-
-            # Get the data to paste
-            paste_data = self.parent.clipboard_data
-            
-            # Handle different paste formats
-            if isinstance(paste_data, dict):
-                hex_bytes = paste_data['hex']
-            elif isinstance(paste_data, (bytes, bytearray)):
-                hex_bytes = paste_data
-            else:
-                self.status_var.set("Invalid clipboard data format")
+            # The clipboard is a view; pasting splices its pieces in without copying
+            hex_bytes = self.parent.clipboard.data
+
+            # Paste over the selection if there is one, otherwise at the cursor
+            data = self.get_editor_buffer(editor)
+            selection = self.get_editor_selection(editor)
+            offset = selection.start if selection else self.index_to_offset(editor, tk.INSERT)
+            offset = min(offset, len(data))
+
+            if self.insert_mode.get():
+                # Replace the selection (or insert at the cursor); the bytes after it shift
+                data.replace(offset, len(selection) if selection else 0, hex_bytes)
+                selection.clear()
+                self.repaint_range(editor, offset)
+                self.status_var.set(f"Inserted {len(hex_bytes)} bytes at {self.format_hex_offset(offset)}")
                 return
 
-            # Calculate byte position based on cursor
-            if is_ascii_section:
-                byte_pos = min(15, col - 61)  # ASCII section starts at column 61
-            else:
-                byte_pos = min(15, (col - 10) // 3)  # Hex section starts at column 10
-
-            # Process data line by line
-            remaining_bytes = hex_bytes
-            current_line = line
-            current_byte_pos = byte_pos
-
-            while remaining_bytes:
-                # Get current line content
-                try:
-                    line_content = editor.get(f"{current_line}.0", f"{current_line}.end")
-                except tk.TclError:
-                    line_content = ""
-
-                # Parse or create line components
-                if line_content and len(line_content) >= 61:
-                    try:
-                        offset = int(line_content[:8], 16)
-                        hex_values = line_content[10:57].split()
-                        ascii_part = line_content[61:77]
-                    except (ValueError, IndexError):
-                        offset = (current_line - 1) * 16
-                        hex_values = ["00"] * 16
-                        ascii_part = "." * 16
-                else:
-                    offset = (current_line - 1) * 16
-                    hex_values = ["00"] * 16
-                    ascii_part = "." * 16
-
-                # Convert components to lists for modification
-                hex_list = hex_values if len(hex_values) == 16 else ["00"] * 16
-                ascii_list = list(ascii_part.ljust(16, '.'))
-
-                # Calculate how many bytes to process in this line
-                bytes_in_line = min(16 - current_byte_pos, len(remaining_bytes))
-                chunk = remaining_bytes[:bytes_in_line]
-                remaining_bytes = remaining_bytes[bytes_in_line:]
-
-                # Update hex and ASCII representations
-                for i, b in enumerate(chunk):
-                    pos = current_byte_pos + i
-                    if pos < 16:  # Ensure we don't spill over
-                        hex_list[pos] = f"{b:02X}"
-                        ascii_list[pos] = chr(b) if 32 <= b <= 126 else '.'
-
-                # Format the line with strict spacing
-                hex_str = " ".join(hex_list)
-                ascii_str = "".join(ascii_list[:16])  # Limit ASCII to 16 characters
-                formatted_line = f"{offset:08X}  {hex_str:<47}  {ascii_str}"
-
-                # Replace the line
-                editor.delete(f"{current_line}.0", f"{current_line}.end")
-                editor.insert(f"{current_line}.0", formatted_line)
+            # Overwrite in the buffer, extending it past the end if needed
+            old_length = len(data)
+            data.replace(offset, len(hex_bytes), hex_bytes)
 
-                # Move to next line
-                current_line += 1
-                current_byte_pos = 0
+            # Repaint only the visible rows the paste touched; a longer buffer dirties the rest of the page
+            self.repaint_range(editor, offset, offset + len(hex_bytes) if len(data) == old_length else None)
 
-            self.status_var.set(f"Pasted {len(hex_bytes)} bytes")
+            self.status_var.set(f"Pasted {len(hex_bytes)} bytes at {self.format_hex_offset(offset)}")
 
         except Exception as e:
             self.status_var.set(f"Paste error: {str(e)}")
@@ -2524,27 +2279,233 @@ class CombinedPreviewWindow:
     def replace_sty_header_with_aus(self):
         """Replace the STY file structure with AUS file header"""
         try:
-            # Get the AUS header (first 170 bytes)
-            aus_header = self.aus_data[:170]
-            
-            # Get the STY data after the header (after 170 bytes)
-            sty_data_after_header = self.sty_data[170:]
+            # Write pending length fields first, so the STY is scanned as it will be saved
+            self.fix_chunk_lengths()
+
+            # Locate the MThd/MTrk header of both files from their chunk structure
+            aus_header_end = ChunkIndex.build(self.aus_data).header_end
+            sty_header_end = ChunkIndex.build(self.sty_data).header_end
+
+            # Get the AUS header
+            aus_header = self.aus_data.view(0, aus_header_end)
             
-            # Combine AUS header with remaining STY data
-            self.sty_data = bytearray(aus_header) + bytearray(sty_data_after_header)
+            # Splice the AUS header over the STY header (no bytes are copied)
+            self.sty_data.replace(0, sty_header_end, aus_header)
+            self.sty_total_lines = (len(self.sty_data) + 15) // 16
+
+            # The header chunks are new, so track the tree from scratch
+            self.attach_chunk_layout()
             
             # Update the STY editor display
             self.sty_current_start = 0
             self.load_sty_data()
             
             # Update status
-            self.status_var.set(f"Replaced STY header with AUS header. New STY size: {len(self.sty_data):,} bytes")
+            self.status_var.set(f"Replaced STY header ({sty_header_end:,} bytes) with AUS header "
+                                f"({aus_header_end:,} bytes). New STY size: {len(self.sty_data):,} bytes")
             self.parent.log("Successfully replaced STY header with AUS header")
             
+        except SFFError as e:
+            self.parent.log(f"Cannot replace STY header: {str(e)}")
+            messagebox.showerror("Error", f"Invalid STY/AUS structure: {str(e)}")
         except Exception as e:
             self.parent.log(f"Error replacing STY header with AUS header: {str(e)}")
             messagebox.showerror("Error", f"Failed to replace STY header with AUS header: {str(e)}")
 
+class CanvasHexView:
+    """Hex view that draws only the visible rows onto a Canvas
+
+    One text item per visible row is created up front and its text is
+    updated in place when scrolling, so Tk never re-lays out a whole Text
+    widget. Rows use the same column layout as the Text viewers (offset at
+    column 0, hex at column 10, ASCII at column 59), and the selection is
+    the same offset-based Selection object.
+    """
+    def __init__(self, master, data, font=("Courier", 10), page_cache=None):
+        self.data = data
+        self.total_lines = (len(data) + 15) // 16
+        self.first_line = 0
+        self.selection = Selection()
+        self.anchor = None
+        self.page_cache = page_cache or PageCache()
+        self.on_change = None  # Called after every redraw
+
+        self.frame = ttk.Frame(master)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.canvas = tk.Canvas(self.frame, background="white", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scheduler = RenderScheduler(self.canvas, self.redraw)
+        self.vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scroll)
+        self.vsb.grid(row=0, column=1, sticky="ns")
+
+        self.font = tkfont.Font(font=font)
+        self.char_width = self.font.measure("0")
+        self.line_height = self.font.metrics("linespace")
+
+        # Reusable canvas items: one text item and two selection rectangles per row
+        self.row_items = []
+        self.hex_rects = []
+        self.ascii_rects = []
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_to(self.first_line - 3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_to(self.first_line + 3))
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.line_height)
+
+    def on_resize(self, event=None):
+        """Create or drop row items so they exactly cover the canvas"""
+        rows = self.visible_rows() + 1
+        while len(self.row_items) < rows:
+            y = len(self.row_items) * self.line_height
+            self.hex_rects.append(self.canvas.create_rectangle(0, y, 0, y, fill="lightblue", width=0, state="hidden"))
+            self.ascii_rects.append(self.canvas.create_rectangle(0, y, 0, y, fill="lightblue", width=0, state="hidden"))
+            self.row_items.append(self.canvas.create_text(2, y, anchor="nw", font=self.font, text=""))
+        while len(self.row_items) > rows:
+            self.canvas.delete(self.row_items.pop(), self.hex_rects.pop(), self.ascii_rects.pop())
+        self.scroll_to(self.first_line)
+
+    def scroll_to(self, line):
+        max_start = max(0, self.total_lines - self.visible_rows())
+        self.first_line = max(0, min(line, max_start))
+        self.scheduler.request()
+
+    def redraw(self):
+        """Update the text of the existing row items in place"""
+        lines = self.page_cache.get_lines(self.data, self.first_line, len(self.row_items)).split("\n")
+        for row, item in enumerate(self.row_items):
+            self.canvas.itemconfigure(item, text=lines[row] if row < len(lines) else "")
+        self.draw_selection()
+        if self.total_lines > 0:
+            self.vsb.set(self.first_line / self.total_lines,
+                         min(1.0, (self.first_line + self.visible_rows()) / self.total_lines))
+        if self.on_change:
+            self.on_change()
+
+    def draw_selection(self):
+        for row in range(len(self.row_items)):
+            line_start = (self.first_line + row) * 16
+            if self.selection and self.selection.start < line_start + 16 and self.selection.end > line_start:
+                first = max(self.selection.start, line_start) - line_start
+                last = min(self.selection.end, line_start + 16) - line_start
+                y0 = row * self.line_height
+                y1 = y0 + self.line_height
+                self.canvas.coords(self.hex_rects[row], 2 + (HEX_COLUMN + first * 3) * self.char_width, y0,
+                                   2 + (HEX_COLUMN + last * 3 - 1) * self.char_width, y1)
+                self.canvas.coords(self.ascii_rects[row], 2 + (ascii_column() + first) * self.char_width, y0,
+                                   2 + (ascii_column() + last) * self.char_width, y1)
+                state = "normal"
+            else:
+                state = "hidden"
+            self.canvas.itemconfigure(self.hex_rects[row], state=state)
+            self.canvas.itemconfigure(self.ascii_rects[row], state=state)
+
+    def offset_at(self, x, y):
+        """Return the buffer offset under canvas coordinates x, y"""
+        row = max(0, int(y) // self.line_height)
+        col = max(0, (int(x) - 2) // self.char_width)
+        return min(len(self.data), index_to_offset(f"{row + 1}.{col}", self.first_line))
+
+    def select(self, start, end):
+        """Select [start, end) in buffer offsets, or clear with start=None"""
+        if start is None:
+            self.selection.clear()
+        else:
+            self.selection.set(start, end)
+        self.draw_selection()
+        if self.on_change:
+            self.on_change()
+
+    def on_click(self, event):
+        self.anchor = self.offset_at(event.x, event.y)
+        self.select(self.anchor, min(len(self.data), self.anchor + 1))
+
+    def on_drag(self, event):
+        if self.anchor is None:
+            return
+        offset = self.offset_at(event.x, event.y)
+        start, end = sorted((self.anchor, offset))
+        self.select(start, min(len(self.data), end + 1))
+
+    def on_scroll(self, *args):
+        """Handle scrollbar movement"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total_lines))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "units":
+                self.scroll_to(self.first_line + amount)
+            else:  # pages
+                self.scroll_to(self.first_line + amount * self.visible_rows())
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.first_line + (-3 if event.delta > 0 else 3))
+
+class CanvasPreviewWindow:
+    def __init__(self, parent, data):
+        self.parent = parent
+        self.data = data
+        self.window = tk.Toplevel(parent.root)
+        self.window.title("AUS Data Preview - Canvas Renderer")
+        self.window.geometry("800x700")
+
+        # Toolbar
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(fill="x", padx=5, pady=5)
+        ttk.Label(toolbar, text="Go to offset (hex):").pack(side="left", padx=5)
+        self.goto_var = tk.StringVar()
+        goto_entry = ttk.Entry(toolbar, textvariable=self.goto_var, width=10)
+        goto_entry.pack(side="left", padx=5)
+        goto_entry.bind("<Return>", lambda e: self.goto_offset())
+        ttk.Button(toolbar, text="Go", command=self.goto_offset).pack(side="left", padx=5)
+        ttk.Button(toolbar, text="Copy Selection", command=self.copy_selection).pack(side="left", padx=5)
+
+        # Canvas view
+        self.view = CanvasHexView(self.window, data, font=("Consolas", 10))
+        self.view.frame.pack(fill="both", expand=True, padx=5)
+        self.view.on_change = self.update_status
+
+        # Status bar
+        self.status_var = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.status_var, relief="sunken").pack(fill="x", padx=5, pady=5)
+        self.window.bind("<Destroy>", self.on_destroy)
+
+    def on_destroy(self, event):
+        if event.widget == self.window:
+            self.view.page_cache.close()
+
+    def goto_offset(self):
+        try:
+            offset = int(self.goto_var.get().strip().replace("0x", ""), 16)
+        except ValueError:
+            self.status_var.set("Invalid offset value")
+            return
+        if 0 <= offset < len(self.data):
+            self.view.scroll_to(offset // 16 - 5)  # Show 5 lines before target
+            self.view.select(offset, offset + 1)
+
+    def copy_selection(self):
+        if not self.view.selection:
+            self.status_var.set("No selection to copy")
+            return
+        start, end = self.view.selection.start, self.view.selection.end
+        self.parent.clipboard.set(self.view.selection.copy(self.data), "AUS")
+        self.parent.log(f"Copied {end - start} bytes from AUS data (offset {start:08X} to {end - 1:08X})")
+
+    def update_status(self):
+        start_byte = self.view.first_line * 16
+        end_byte = min(len(self.data), start_byte + self.view.visible_rows() * 16)
+        message = f"Showing bytes {start_byte:,} to {end_byte:,} of {len(self.data):,}"
+        if self.view.selection:
+            start, end = self.view.selection.start, self.view.selection.end
+            message += f" | Selection: {start:08X} to {end - 1:08X} ({end - start:,} bytes)"
+        self.status_var.set(f"{message} | {self.view.page_cache.stats()} | {self.view.scheduler.stats()}")
+
 class FileConverterApp:
     def __init__(self, root):
         self.root = root
@@ -2555,10 +2516,12 @@ class FileConverterApp:
         self.aus_path = tk.StringVar()
         self.sty_path = tk.StringVar()
         self.output_path = tk.StringVar()
+        self.use_mmap = tk.BooleanVar(value=MMAP_BY_DEFAULT)
         self.aus_data = None
         self.sty_data = None
-        self.aus_copied_data = None
-        self.clipboard_data = None
+        self.maps = {}  # Loaded file path -> its mmap, closed by release_map
+        self.windows = []  # Open previews and editors, which may read from those maps
+        self.clipboard = Clipboard()  # Shared by every viewer and editor
         
         # Main container
         main_frame = ttk.Frame(self.root, padding=10)
@@ -2573,6 +2536,7 @@ class FileConverterApp:
         ttk.Entry(files_frame, textvariable=self.aus_path, width=50).grid(row=0, column=1, padx=5)
         ttk.Button(files_frame, text="Browse", command=self.browse_aus).grid(row=0, column=2, padx=5)
         ttk.Button(files_frame, text="Preview", command=self.preview_aus).grid(row=0, column=3, padx=5)
+        ttk.Button(files_frame, text="Fast Preview", command=self.fast_preview_aus).grid(row=0, column=4, padx=5)
         
         # STY file
         ttk.Label(files_frame, text="STY File:").grid(row=1, column=0, sticky="w", padx=5)
@@ -2584,6 +2548,10 @@ class FileConverterApp:
         ttk.Entry(files_frame, textvariable=self.output_path, width=50).grid(row=2, column=1, padx=5)
         ttk.Button(files_frame, text="Browse", command=self.browse_output).grid(row=2, column=2, padx=5)
         
+        # Memory-map files instead of reading them into memory
+        ttk.Checkbutton(files_frame, text="Memory-map input files (read-only)",
+                        variable=self.use_mmap).grid(row=3, column=1, sticky="w", padx=5)
+        
         # Step 2-4: Data Operations
         ops_frame = ttk.LabelFrame(main_frame, text="Step 2-4: Data Operations", padding=5)
         ops_frame.pack(fill="x", pady=5)
@@ -2612,19 +2580,69 @@ class FileConverterApp:
     def browse_aus(self):
         filepath = filedialog.askopenfilename(filetypes=[("AUS Files", "*.aus")])
         if filepath:
+            # The old file is about to be dropped; only other holders need a copy of it
+            self.aus_data = None
+            self.release_map(self.aus_path.get())
             self.aus_path.set(filepath)
-            with open(filepath, 'rb') as f:
-                self.aus_data = f.read()
-            self.log(f"Loaded AUS file: {filepath}")
+            self.aus_data = self.load(filepath)
+            self.log(f"Loaded AUS file: {filepath}{' (memory-mapped)' if self.use_mmap.get() else ''}")
             
     def browse_sty(self):
         filepath = filedialog.askopenfilename(filetypes=[("STY Files", "*.sty")])
         if filepath:
+            self.sty_data = None
+            self.release_map(self.sty_path.get())
             self.sty_path.set(filepath)
-            with open(filepath, 'rb') as f:
-                self.sty_data = f.read()
-            self.log(f"Loaded STY file: {filepath}")
-            
+            self.sty_data = self.load(filepath)
+            self.log(f"Loaded STY file: {filepath}{' (memory-mapped)' if self.use_mmap.get() else ''}")
+            
+    def load(self, path):
+        """Load path, remembering its mapping so release_map can close it"""
+        key = os.path.abspath(path)
+        if key in self.maps:
+            # Already mapped as the other input; share the one mapping
+            return self.maps[key]
+        data = load_file(path, self.use_mmap.get())
+        if isinstance(data, mmap.mmap):
+            self.maps[key] = data
+        return data
+
+    def release_map(self, path):
+        """Unmap a loaded file, first copying whatever still reads from the mapping
+
+        The STY/AUS buffers and open editors (including their undo history)
+        may refer to the map by piece; they are switched over to one shared
+        copy, and the clipboard materializes its own, so closing the map
+        cannot pull data out from under them. Previews that show the file itself are closed, since it
+        is no longer the loaded file. Returns True if path was mapped.
+        """
+        data = self.maps.pop(os.path.abspath(path), None) if path else None
+        if data is None:
+            return False
+        # The clipboard takes its own copy, spilled to disk when large
+        self.clipboard.materialize(data)
+        buffers = []
+        for holder in [self] + self.windows:
+            buffers += [getattr(holder, "aus_data", None), getattr(holder, "sty_data", None)]
+        buffers = [buffer for buffer in buffers
+                   if isinstance(buffer, SegmentedBuffer) and any(source is data for source in buffer.sources())]
+        # Copy only if something still needs the contents
+        copy = data[:] if buffers or data is self.aus_data or data is self.sty_data else None
+        for buffer in buffers:
+            buffer.detach(data, copy)
+        if self.aus_data is data:
+            self.aus_data = copy
+        if self.sty_data is data:
+            self.sty_data = copy
+        for window in list(self.windows):
+            if not window.window.winfo_exists():
+                self.windows.remove(window)
+            elif getattr(window, "data", None) is data:
+                window.window.destroy()
+                self.windows.remove(window)
+        data.close()
+        return True
+
     def browse_output(self):
         filepath = filedialog.asksaveasfilename(defaultextension=".sty", filetypes=[("STY Files", "*.sty")])
         if filepath:
@@ -2635,7 +2653,14 @@ class FileConverterApp:
         if not self.aus_data:
             messagebox.showerror("Error", "Please load an AUS file first")
             return
-        AUSPreviewWindow(self, self.aus_data)
+        self.windows.append(AUSPreviewWindow(self, self.aus_data))
+        
+    def fast_preview_aus(self):
+        """Preview the AUS data with the canvas renderer"""
+        if not self.aus_data:
+            messagebox.showerror("Error", "Please load an AUS file first")
+            return
+        self.windows.append(CanvasPreviewWindow(self, self.aus_data))
         
     def open_combined_editor(self):
         """Open combined editor with appended STY and AUS data"""
@@ -2648,11 +2673,12 @@ class FileConverterApp:
             self.sty_data = bytes()
             self.log("Created new STY data buffer")
 
-        # Create temporary appended data for editing
-        appended_sty = bytearray(self.sty_data + self.aus_data)
+        # Present STY followed by AUS as one editable buffer without copying either file
+        appended_sty = PieceTable([self.sty_data, self.aus_data])
 
         # Create the editor window
         editor = CombinedPreviewWindow(self)
+        self.windows.append(editor)
         
         # Configure window for maximum visibility
         if sys.platform == "win32":
@@ -2662,7 +2688,9 @@ class FileConverterApp:
             
         # Update editor data
         editor.sty_data = appended_sty  # Load appended STY data
-        editor.aus_data = self.aus_data  # Load full AUS data for reference
+        editor.aus_data = PieceTable([self.aus_data])  # Load full AUS data for reference
+        editor.attach_journals()
+        editor.attach_chunk_layout()
         
         # Calculate total lines
         editor.sty_total_lines = (len(editor.sty_data) + 15) // 16
@@ -2703,8 +2731,29 @@ class FileConverterApp:
             return
             
         try:
-            with open(self.output_path.get(), 'wb') as f:
-                f.write(self.sty_data)
+            # Refuse to write a file whose chunk lengths no longer match its contents
+            ChunkIndex.build(self.sty_data)
+        except SFFError as e:
+            self.log(f"Refusing to export inconsistent STY data: {str(e)}")
+            messagebox.showerror("Error", f"The STY data has an invalid chunk structure and was not exported:\n{str(e)}")
+            return
+
+        try:
+            # A file that is still mapped cannot be replaced on Windows; copy and unmap it first
+            output = os.path.abspath(self.output_path.get())
+            if self.release_map(output):
+                self.log(f"Unmapped {output} before replacing it")
+            # Write next to the output and rename it into place, so a mapped
+            # input keeps reading the old file and a failure leaves it intact
+            part_path = output + ".part"
+            try:
+                with open(part_path, 'wb') as f:
+                    write_buffer(f, self.sty_data)
+                os.replace(part_path, output)
+            except BaseException:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
             self.log(f"Successfully exported to {self.output_path.get()}")
             messagebox.showinfo("Success", "File exported successfully!")
         except Exception as e:
@@ -2717,7 +2766,7 @@ class FileConverterApp:
 
     def append_aus_to_sty(self):
         """Append the copied AUS data to STY"""
-        if not self.aus_copied_data:
+        if not self.clipboard:
             messagebox.showerror("Error", "No AUS data to append. Please select and copy data from AUS file first.")
             return
         if not self.sty_data:
@@ -2725,17 +2774,17 @@ class FileConverterApp:
             return
             
         try:
-            # Create new combined data
-            new_data = self.sty_data + self.aus_copied_data
+            # Create new combined data without copying either buffer
+            new_data = SegmentedBuffer([self.sty_data, self.clipboard.data])
             
             # Update STY data
             self.sty_data = new_data
             
             # Log the operation
-            self.log(f"Successfully appended {len(self.aus_copied_data)} bytes from AUS to STY data")
+            self.log(f"Successfully appended {len(self.clipboard)} bytes from {self.clipboard.origin or 'AUS'} to STY data")
             self.log(f"New STY data size: {len(self.sty_data)} bytes")
             
-            messagebox.showinfo("Success", f"Successfully appended {len(self.aus_copied_data)} bytes to STY data")
+            messagebox.showinfo("Success", f"Successfully appended {len(self.clipboard)} bytes to STY data")
         except Exception as e:
             self.log(f"Error appending AUS data: {str(e)}")
             messagebox.showerror("Error", f"Failed to append AUS data: {str(e)}")
@@ -0,0 +1,184 @@
+"""Whole-buffer byte search used by the hex editors"""
+import re
+import threading
+import time
+
+from buffers import SegmentedBuffer
+
+# Scan window per find() call; keeps each call short so a worker thread
+# releases the GIL often enough for the Tk event loop to stay responsive
+SEARCH_CHUNK = 4 * 1024 * 1024
+
+
+# One byte of a pattern: exact "F0", wildcard "??", nibble mask "4?"/"?C" or range "[10-1F]"
+PATTERN_TOKEN = re.compile(r"\[([0-9A-F]{2})-([0-9A-F]{2})\]|([0-9A-F?])([0-9A-F?])")
+
+
+class BytePattern:
+    """Fixed-length byte pattern with wildcards, compiled once to a bytes regex
+
+    Syntax, one token per byte (whitespace between tokens is optional):
+    "F0" matches that byte, "??" any byte, "4?" or "?C" any byte with that
+    high or low nibble, and "[10-1F]" any byte in the inclusive range.
+    For example "F0 ?? 43 1? 4C" matches XG SysEx headers for any length
+    and device number.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        source = re.sub(r"\s+", "", text.upper().replace("0X", ""))
+        parts = []
+        pos = 0
+        while pos < len(source):
+            match = PATTERN_TOKEN.match(source, pos)
+            if not match:
+                raise ValueError(f"Invalid pattern at {source[pos:pos + 4]!r}")
+            parts.append(self._token_regex(match))
+            pos = match.end()
+        if not parts:
+            raise ValueError("Empty pattern")
+        self.length = len(parts)
+        self.exact = all(isinstance(part, bytes) for part in parts)
+        self.literal = b"".join(parts) if self.exact else None
+        body = b"".join(re.escape(part) if isinstance(part, bytes) else part.encode("ascii") for part in parts)
+        # Lookahead so overlapping matches are all reported
+        self.regex = re.compile(b"(?=(" + body + b"))", re.DOTALL)
+
+    @staticmethod
+    def _token_regex(match):
+        low, high, high_nibble, low_nibble = match.groups()
+        if low is not None:
+            first, last = int(low, 16), int(high, 16)
+            if first > last:
+                raise ValueError(f"Invalid range [{low}-{high}]")
+            return f"[\\x{first:02x}-\\x{last:02x}]"
+        if high_nibble == "?" and low_nibble == "?":
+            return "."
+        if high_nibble == "?":
+            return "[" + "".join(f"\\x{h:x}{low_nibble.lower()}" for h in range(16)) + "]"
+        if low_nibble == "?":
+            return f"[\\x{high_nibble.lower()}0-\\x{high_nibble.lower()}f]"
+        return bytes((int(high_nibble + low_nibble, 16),))
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return f"BytePattern({self.text!r})"
+
+
+def parse_search_text(text, mode="hex"):
+    """Convert what the user typed into the bytes or BytePattern to search for"""
+    if mode == "hex":
+        return bytes.fromhex(text.replace(" ", "").replace("0x", "").replace("0X", ""))
+    if mode == "pattern":
+        pattern = BytePattern(text)
+        return pattern.literal if pattern.exact else pattern
+    return text.encode("ascii", errors="ignore")
+
+
+def find_all(data, needle, start=0, end=None, limit=None, overlapping=True, should_stop=None):
+    """Return the offsets of every occurrence of needle in data[start:end]
+
+    data can be any buffer whose slices are bytes-like: bytes, bytearray,
+    mmap or a buffers.SegmentedBuffer. needle is a bytes object or a
+    BytePattern. The scan copies one SEARCH_CHUNK window at a time, searches
+    it locally and calls should_stop(offset) between windows.
+    """
+    end = len(data) if end is None else min(end, len(data))
+    if not needle:
+        return []
+    if isinstance(needle, BytePattern):
+        return _find_pattern(data, needle, start, end, limit, overlapping, should_stop)
+    results = []
+    step = 1 if overlapping else len(needle)
+    pos = start
+    while pos <= end - len(needle):
+        # Read the window once and search it locally; a SegmentedBuffer.find per hit is far slower
+        window_end = min(end, pos + SEARCH_CHUNK + len(needle) - 1)
+        window = data[pos:window_end]
+        next_pos = window_end - len(needle) + 1
+        hit = window.find(needle)
+        while hit >= 0:
+            results.append(pos + hit)
+            if limit and len(results) >= limit:
+                return results
+            next_pos = max(next_pos, pos + hit + step)
+            hit = window.find(needle, hit + step)
+        pos = next_pos
+        if should_stop and should_stop(pos):
+            break
+    return results
+
+
+def _find_pattern(data, pattern, start, end, limit, overlapping, should_stop):
+    results = []
+    next_allowed = start
+    for window_start in range(start, max(start, end - pattern.length + 1), SEARCH_CHUNK):
+        # Windows overlap by length - 1 bytes; only matches starting in this window count
+        window_stop = min(window_start + SEARCH_CHUNK, end - pattern.length + 1)
+        window = data[window_start:min(end, window_stop + pattern.length - 1)]
+        for match in pattern.regex.finditer(window):
+            hit = window_start + match.start()
+            if hit >= window_stop:
+                break
+            if hit < next_allowed:
+                continue
+            results.append(hit)
+            if limit and len(results) >= limit:
+                return results
+            next_allowed = hit + (1 if overlapping else pattern.length)
+        if should_stop and should_stop(window_stop):
+            break
+    return results
+
+
+def describe_match(data, offset, length, max_bytes=16):
+    """Return one results-list line: the offset and the matched bytes in hex"""
+    matched = bytes(data[offset:offset + min(length, max_bytes)])
+    suffix = " ..." if length > max_bytes else ""
+    return f"{offset:08X}  {matched.hex(' ').upper()}{suffix}"
+
+
+class SearchJob:
+    """Run find_all on a worker thread
+
+    The UI polls done/progress from the Tk event loop and can cancel the
+    job at any time; results holds the offsets found so far. A
+    SegmentedBuffer is searched through a view of its pieces taken when
+    the job is created, so edits made meanwhile do not reach the worker;
+    data is that view and the offsets refer to it.
+    """
+
+    def __init__(self, data, needle, limit=None):
+        self.data = data.view(0, len(data)) if isinstance(data, SegmentedBuffer) else data
+        self.needle = needle
+        self.limit = limit
+        self.results = []
+        self.progress = 0.0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self.elapsed = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _should_stop(self, offset):
+        self.progress = offset / len(self.data) if len(self.data) else 1.0
+        return self.cancelled
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.results = find_all(self.data, self.needle, limit=self.limit, should_stop=self._should_stop)
+        except Exception as e:
+            self.error = e
+        self.elapsed = time.perf_counter() - started
+        self.progress = 1.0
+        self.done = True
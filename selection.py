@@ -0,0 +1,100 @@
+"""Offset-based selection shared by the Text hex views"""
+from buffers import SegmentedBuffer
+
+# Column layout of hexdump.format_lines rows
+HEX_COLUMN = 10
+
+
+def ascii_column(bytes_per_line=16):
+    # The hex column is bytes_per_line * 3 - 1 characters wide, then two spaces
+    return HEX_COLUMN + bytes_per_line * 3 - 1 + 2
+
+
+def index_to_offset(index, first_line, bytes_per_line=16):
+    """Map a "line.col" Text index of a dump rendered from row first_line to a buffer offset"""
+    line, col = map(int, str(index).split("."))
+    if col >= ascii_column(bytes_per_line):
+        byte_pos = col - ascii_column(bytes_per_line)
+    else:
+        byte_pos = max(0, (col - HEX_COLUMN) // 3)
+    return (first_line + line - 1) * bytes_per_line + min(bytes_per_line - 1, byte_pos)
+
+
+class Selection:
+    """Selected byte range [start, end) in buffer coordinates
+
+    The range does not depend on what is rendered, so it survives scrolling
+    and can be much larger than the page on screen. apply() maps it to "sel"
+    tag ranges for the visible rows only, and copy() returns a view of the
+    buffer instead of re-parsing the selected text.
+    """
+
+    def __init__(self, start=0, end=0):
+        self.start = 0
+        self.end = 0
+        # Tag ranges last written by apply(), to tell our own redraws from user edits
+        self.rendered = ()
+        self.set(start, end)
+
+    def set(self, start, end):
+        self.start, self.end = (start, end) if start <= end else (end, start)
+
+    def clear(self):
+        self.start = self.end = 0
+
+    def __bool__(self):
+        return self.end > self.start
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Selection({self.start:08X}, {self.end:08X})"
+
+    def copy(self, data):
+        """Return the selected bytes of data as a view that shares its storage"""
+        if not isinstance(data, SegmentedBuffer):
+            data = SegmentedBuffer([data])
+        return data.view(self.start, min(self.end, len(data)))
+
+    def tag_ranges(self, first_line, line_count, bytes_per_line=16):
+        """Return (start, end) Text indices covering the selection on rows first_line.."""
+        ranges = []
+        if not self:
+            return ranges
+        first_row = max(first_line, self.start // bytes_per_line)
+        last_row = min(first_line + line_count, (self.end - 1) // bytes_per_line + 1)
+        for row in range(first_row, last_row):
+            row_start = row * bytes_per_line
+            first = max(self.start, row_start) - row_start
+            last = min(self.end, row_start + bytes_per_line) - row_start
+            line = row - first_line + 1
+            ranges.append((f"{line}.{HEX_COLUMN + first * 3}", f"{line}.{HEX_COLUMN + last * 3 - 1}"))
+            ascii_start = ascii_column(bytes_per_line)
+            ranges.append((f"{line}.{ascii_start + first}", f"{line}.{ascii_start + last}"))
+        return ranges
+
+    def apply(self, text, first_line, line_count, bytes_per_line=16, tag="sel"):
+        """Tag the visible part of the selection in a Text widget"""
+        text.tag_remove(tag, "1.0", "end")
+        for start, end in self.tag_ranges(first_line, line_count, bytes_per_line):
+            text.tag_add(tag, start, end)
+        self.rendered = tuple(str(index) for index in text.tag_ranges(tag))
+
+    def update_from_text(self, text, first_line, data_length, bytes_per_line=16):
+        """Adopt a selection the user made with the mouse; returns True if it changed
+
+        Redraws delete and re-tag the text, which fires <<Selection>> as
+        well; those are recognised by comparing against what apply() wrote.
+        """
+        ranges = tuple(str(index) for index in text.tag_ranges("sel"))
+        if ranges == self.rendered:
+            return False
+        self.rendered = ranges
+        if not ranges:
+            self.clear()
+            return True
+        start = index_to_offset(text.index(ranges[0]), first_line, bytes_per_line)
+        end = index_to_offset(text.index(f"{ranges[-1]} - 1c"), first_line, bytes_per_line) + 1
+        self.set(min(start, data_length), min(end, data_length))
+        return True
@@ -1,18 +1,93 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import subprocess
+from werkzeug.utils import secure_filename
+import os
+import shutil
+import tempfile
+import threading
+
+from cache import ResultCache
+from convert import BLOCK_SIZE
+from service import JobFailed, JobTimeout, PoolBusy, SingleFlight, WorkerPool, convert_cached
+from sff import SFFError
 
 app = Flask(__name__)
 CORS(app)
 
+_pool = None
+_pool_lock = threading.Lock()
+result_cache = ResultCache.from_environment()
+flights = SingleFlight()
+
+def get_pool():
+    """Return the conversion pool, starting its workers on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool.from_environment()
+        return _pool
+
+def stream_file(f, cleanup_dir):
+    """Yield an open file in blocks, then close it and remove the job's scratch directory"""
+    try:
+        with f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                yield block
+    finally:
+        shutil.rmtree(cleanup_dir, ignore_errors=True)
+
 @app.route('/run-script', methods=['GET'])
 def run_script():
+    # The GUI cannot run behind a web server; conversions go through /convert
+    return jsonify({'output': 'POST an AUS file as "aus" (and optionally a style as "template") to /convert',
+                    'error': ''})
+
+@app.route('/convert', methods=['POST'])
+def convert():
+    """Convert an uploaded AUS file on a pool worker and return the STY bytes"""
+    upload = request.files.get('aus')
+    if upload is None:
+        return jsonify({'error': 'Missing "aus" file upload'}), 400
+    template = request.files.get('template')
+
+    # Jobs travel to the workers as file paths, so the uploads are saved once and never pickled
+    work_dir = tempfile.mkdtemp(prefix='convert-')
     try:
-        # Run the main.py script and capture the output
-        result = subprocess.run(['python', 'main.py'], capture_output=True, text=True)
-        return jsonify({'output': result.stdout, 'error': result.stderr})
-    except Exception as e:
-        return jsonify({'error': str(e)})
+        aus_path = os.path.join(work_dir, 'input.aus')
+        upload.save(aus_path)
+        template_path = None
+        if template:
+            template_path = os.path.join(work_dir, 'template.sty')
+            template.save(template_path)
+        # Repeated uploads come from the result cache, identical concurrent ones share one job
+        output_path = os.path.join(work_dir, 'output.sty')
+        result = convert_cached(get_pool(), result_cache, flights, aus_path, output_path, template_path)
+    except PoolBusy as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    except JobTimeout as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return jsonify({'error': str(e)}), 504
+    except SFFError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return jsonify({'error': f'Invalid chunk structure: {e}'}), 422
+    except (JobFailed, OSError) as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return jsonify({'error': str(e)}), 500
+
+    name = os.path.splitext(secure_filename(upload.filename or '') or 'converted')[0] + '.sty'
+    return Response(stream_file(result, work_dir),
+                    mimetype='application/octet-stream',
+                    headers={'Content-Disposition': f'attachment; filename="{name}"',
+                             'Content-Length': str(os.fstat(result.fileno()).st_size)})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({'pool': get_pool().stats(), 'cache': result_cache.stats(), 'flights': flights.stats()})
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Start the workers before the first request; the reloader would start a second pool
+    get_pool()
+    app.run(debug=True, use_reloader=False, threaded=True)
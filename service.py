@@ -0,0 +1,435 @@
+"""Pre-started worker processes that run conversions for the web server
+
+A WorkerPool keeps a fixed number of converter processes warm. Each
+request thread hands its job (input and output file paths, never the
+bytes themselves) to an idle worker over a pipe and waits for the reply.
+At most workers + queue_size jobs are admitted at once; beyond that
+submit() raises PoolBusy with an estimate of when to retry, so a burst
+of uploads gets a fast 429 instead of an ever longer wait. An admitted
+job that finds no idle worker within queue_timeout is turned away with
+PoolBusy before it is sent anywhere. A job that runs past its timeout,
+counted from when it reaches a worker, has that worker killed and
+replaced, and workers are recycled after max_jobs jobs to bound memory
+growth.
+
+convert_cached() puts the result cache and a SingleFlight in front of
+the pool: repeated inputs are served from the cache, and concurrent
+requests for the same input share one job instead of each queuing their
+own. convert_cached_async() and AsyncSingleFlight do the same for the
+asyncio server without tying up a thread per waiting request.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from convert import convert_file
+from sff import SFFError
+
+
+class PoolBusy(Exception):
+    """Raised when the job queue is full or no worker frees up in time
+
+    retry_after is a suggested wait in seconds.
+    """
+
+    def __init__(self, retry_after, message="Conversion queue is full"):
+        super().__init__(f"{message}, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    """Raised when a conversion does not finish within the pool's timeout"""
+
+
+class JobFailed(Exception):
+    """Raised when a conversion fails in the worker for a reason other than bad input"""
+
+
+def _worker_main(conn):
+    """Worker process loop: convert (aus, output, template) jobs until told to stop"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        aus_path, output_path, template_path = job
+        try:
+            result = convert_file(aus_path, output_path, template_path)
+            conn.send(("ok", result.size))
+        except SFFError as e:
+            conn.send(("invalid", str(e)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self, timeout=5):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """Fixed pool of converter processes with a bounded queue
+
+    submit() blocks the calling (request) thread until its job is done.
+    Workers are started with the "spawn" method so they behave the same on
+    every platform and do not inherit the web server's threads.
+    """
+
+    def __init__(self, workers=None, queue_size=32, timeout=120.0, max_jobs=50, queue_timeout=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.queue_timeout = timeout if queue_timeout is None else queue_timeout
+        self.max_jobs = max_jobs
+        self.completed = 0
+        self.rejected = 0
+        self.average_time = 1.0  # Moving average of job time, for Retry-After
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(self.workers):
+            self._idle.put(_Worker(self._context))
+
+    @classmethod
+    def from_environment(cls):
+        """Create a pool configured by the CONVERT_* environment variables"""
+        queue_timeout = os.environ.get("CONVERT_QUEUE_TIMEOUT")
+        return cls(int(os.environ.get("CONVERT_WORKERS", os.cpu_count() or 1)),
+                   int(os.environ.get("CONVERT_QUEUE_SIZE", 64)),
+                   float(os.environ.get("CONVERT_TIMEOUT", 120)),
+                   int(os.environ.get("CONVERT_MAX_JOBS", 50)),
+                   float(queue_timeout) if queue_timeout else None)
+
+    @property
+    def pending(self):
+        """Jobs admitted and not yet finished, running or waiting"""
+        return self._pending
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, rounded up to at least 1"""
+        waves = self._pending / self.workers
+        return max(1, math.ceil(waves * self.average_time))
+
+    def submit(self, aus_path, output_path, template_path=None):
+        """Convert aus_path into output_path on a worker; returns the output size
+
+        Raises PoolBusy if the queue is full or no worker becomes idle
+        within queue_timeout, JobTimeout if the job runs on its worker
+        longer than timeout, SFFError for invalid input and JobFailed for
+        any other error in the worker.
+        """
+        self.admit()
+        try:
+            return self.run(aus_path, output_path, template_path)
+        finally:
+            self.release_slot()
+
+    def admit(self):
+        """Take one of the workers + queue_size job slots, or raise PoolBusy
+
+        submit() does this itself. Callers that hand the job to a thread
+        pool call admit() first, so a full queue is reported before a thread
+        is tied up, and release_slot() once run() has returned.
+        """
+        if self._closed:
+            raise RuntimeError("Worker pool is closed")
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy(self.retry_after())
+        with self._lock:
+            self._pending += 1
+
+    def release_slot(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, aus_path, output_path, template_path=None):
+        """Run an admitted job on the next idle worker; see submit()"""
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            # Nothing was sent, so no worker is charged for the wait
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy(self.retry_after(), f"No worker became free within {self.queue_timeout:.0f} s")
+        # The run timeout starts when the job reaches a worker, not when it was admitted
+        started = time.monotonic()
+        try:
+            worker.conn.send((aus_path, output_path, template_path))
+            if not worker.conn.poll(self.timeout):
+                # The worker may be stuck in the conversion; the only safe stop is to kill it
+                worker.kill()
+                worker = _Worker(self._context)
+                raise JobTimeout(f"Conversion did not finish within {self.timeout:.0f} s")
+            reply = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            # The worker died under the job (e.g. killed for memory); replace it
+            worker.kill()
+            worker = _Worker(self._context)
+            raise JobFailed(f"Worker process exited: {e}")
+        finally:
+            self._release(worker, time.monotonic() - started)
+
+        status, value = reply
+        if status == "invalid":
+            raise SFFError(value)
+        if status == "error":
+            raise JobFailed(value)
+        return value
+
+    def _release(self, worker, elapsed):
+        with self._lock:
+            self.completed += 1
+            self.average_time = 0.8 * self.average_time + 0.2 * elapsed
+        worker.jobs += 1
+        if worker.jobs >= self.max_jobs and not self._closed:
+            # Recycle long-lived workers so fragmentation and leaks cannot accumulate
+            worker.stop()
+            worker = _Worker(self._context)
+        if self._closed:
+            worker.stop()
+        else:
+            self._idle.put(worker)
+
+    def stats(self):
+        return (f"Workers: {self.workers}, pending {self._pending}, completed {self.completed:,}, "
+                f"rejected {self.rejected:,}, average {self.average_time * 1000:.0f} ms")
+
+    def close(self):
+        """Stop the idle workers; busy ones stop when their job finishes"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run one call per key at a time and hand its outcome to every concurrent caller
+
+    The first caller for a key runs the function; callers that arrive
+    while it is running wait for it and get the same result or exception.
+    """
+
+    def __init__(self):
+        self.shared = 0  # Calls answered by another caller's run
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, function):
+        """Return (result, shared), where shared is True if another caller ran function"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = function()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self):
+        return f"Single flight: {len(self._flights)} in flight, {self.shared:,} requests shared a job"
+
+
+def convert_cached(pool, cache, flights, aus_path, output_path, template_path=None):
+    """Return the converted style opened for reading
+
+    A cache hit is returned directly. On a miss, the first request for an
+    input runs the conversion on the pool and stores it in the cache;
+    identical requests arriving meanwhile wait for that job and then read
+    its cached result. Blocks, so async callers run it on an executor.
+    """
+    key = cache.key(aus_path, template_path)
+    result = cache.open(key)
+    if result is not None:
+        return result
+
+    def run():
+        nonlocal result
+        # A job for this key may have finished between our miss and taking the lead
+        result = cache.open(key, count_miss=False)
+        if result is not None:
+            return cache.path(key)
+        pool.submit(aus_path, output_path, template_path)
+        return cache.put(key, output_path)
+
+    cached_path, shared = flights.do(key, run)
+    if result is not None:
+        return result
+    if not shared:
+        return open(output_path, "rb")
+    try:
+        return open(cached_path, "rb")
+    except FileNotFoundError:
+        # Evicted before we got to it (cache smaller than the result); convert our own copy
+        pool.submit(aus_path, output_path, template_path)
+        return open(output_path, "rb")
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop
+
+    The first caller for a key starts function() as a task; callers that
+    arrive while it runs await the same task. The task is shielded, so a
+    leader that is cancelled (its client disconnected) does not cancel the
+    shared job. function is called synchronously by the leader, before it
+    can be cancelled, so it can take over anything the job needs.
+    """
+
+    def __init__(self):
+        self.shared = 0  # Calls answered by another caller's run
+        self._flights = {}
+
+    async def do(self, key, function):
+        """Return (result, shared), where shared is True if another caller ran function"""
+        task = self._flights.get(key)
+        if task is not None:
+            self.shared += 1
+            return await asyncio.shield(task), True
+        task = self._flights[key] = asyncio.ensure_future(function())
+        task.add_done_callback(lambda done: self._flights.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def stats(self):
+        return f"Single flight: {len(self._flights)} in flight, {self.shared:,} requests shared a job"
+
+
+async def run_admitted(pool, executor, function, *args):
+    """Run function(*args) on executor once pool has admitted the job
+
+    Raises PoolBusy without using a thread when the queue is full, so an
+    executor of workers + queue_size threads never has to queue.
+    """
+    pool.admit()
+
+    def job():
+        try:
+            return function(*args)
+        finally:
+            pool.release_slot()
+
+    return await asyncio.get_running_loop().run_in_executor(executor, job)
+
+
+def _claim_inputs(job_dir, *paths):
+    """Link (or copy) each input into job_dir and return the new paths; None stays None"""
+    claimed = []
+    for i, path in enumerate(paths):
+        if path is None:
+            claimed.append(None)
+            continue
+        target = os.path.join(job_dir, f"input{i}")
+        try:
+            # A hard link costs nothing and survives the request directory being removed
+            os.link(path, target)
+        except OSError:
+            shutil.copyfile(path, target)
+        claimed.append(target)
+    return claimed
+
+
+def _convert_and_store(pool, cache, key, aus_path, template_path, job_dir):
+    """Convert into job_dir and store the result under key; returns the cached path"""
+    output_path = os.path.join(job_dir, "output.sty")
+    pool.run(aus_path, output_path, template_path)
+    return cache.put(key, output_path)
+
+
+async def convert_cached_async(pool, cache, flights, executor, aus_path, output_path, template_path=None):
+    """Coroutine version of convert_cached for an AsyncSingleFlight
+
+    Hashing runs on the loop's default executor and only admitted pool jobs
+    use executor. The shared job works on its own copies of the inputs in
+    its own directory, so it is unaffected by the leading request
+    finishing, or being cancelled and removing its upload, first.
+    """
+    loop = asyncio.get_running_loop()
+    key = await loop.run_in_executor(None, cache.key, aus_path, template_path)
+    result = cache.open(key)
+    if result is not None:
+        return result
+
+    def run():
+        # Runs in the leader's own step, before anything is awaited
+        job_dir = tempfile.mkdtemp(prefix="convert-job-")
+        try:
+            inputs = _claim_inputs(job_dir, aus_path, template_path)
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return convert_job(job_dir, *inputs)
+
+    async def convert_job(job_dir, job_aus_path, job_template_path):
+        try:
+            # A job for this key may have finished between our miss and taking the lead
+            hit = cache.open(key, count_miss=False)
+            if hit is not None:
+                hit.close()
+                return cache.path(key)
+            return await run_admitted(pool, executor, _convert_and_store, pool, cache, key,
+                                      job_aus_path, job_template_path, job_dir)
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    cached_path, shared = await flights.do(key, run)
+    try:
+        return open(cached_path, "rb")
+    except FileNotFoundError:
+        # Evicted before we got to it (cache smaller than the result); convert our own copy
+        await run_admitted(pool, executor, pool.run, aus_path, output_path, template_path)
+        return open(output_path, "rb")
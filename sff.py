@@ -0,0 +1,281 @@
+"""Chunk index for Yamaha SFF1/SFF2 style (STY) and Audio Phraser (AUS) files"""
+import struct
+from collections import namedtuple
+
+# Chunks whose payload is itself a sequence of chunks
+CONTAINER_TAGS = frozenset(("CASM", "CSEG", "AASM", "ASEG", "AFil"))
+
+# Leading chunks that make up the SMF header of a style
+HEADER_TAGS = ("MThd", "MTrk")
+
+# Top-level chunks that carry the audio phrase data of an AUS file
+AUDIO_TAGS = ("AASM", "AFil")
+
+CHUNK_HEADER = struct.Struct(">4sI")
+
+
+class SFFError(ValueError):
+    """Raised when a file does not have a valid SFF chunk structure"""
+
+
+class Chunk(namedtuple("Chunk", "tag offset length depth parent")):
+    """A chunk entry: header offset, payload length, nesting depth and parent index"""
+    __slots__ = ()
+
+    @property
+    def data_offset(self):
+        return self.offset + CHUNK_HEADER.size
+
+    @property
+    def end(self):
+        return self.offset + CHUNK_HEADER.size + self.length
+
+
+class ChunkIndex:
+    """Flat, pre-order index of every chunk in a file"""
+
+    def __init__(self, chunks, size):
+        self.chunks = chunks
+        self.size = size
+
+    @classmethod
+    def build(cls, data):
+        """Walk the chunk headers of data once and return the index
+
+        Only the 8-byte header of each chunk is read, so any sliceable
+        buffer (bytes, mmap, memoryview) works and the cost is
+        proportional to the number of chunks, not the file size.
+        """
+        size = len(data)
+        chunks = []
+        # Each frame is (end of enclosing payload, parent index, depth)
+        stack = [(size, -1, 0)]
+        offset = 0
+        while stack:
+            limit, parent, depth = stack[-1]
+            if offset >= limit:
+                stack.pop()
+                continue
+            if offset + CHUNK_HEADER.size > limit:
+                raise SFFError(f"Truncated chunk header at offset {offset:08X}")
+            raw_tag, length = CHUNK_HEADER.unpack(bytes(data[offset:offset + CHUNK_HEADER.size]))
+            if not raw_tag.isalnum():
+                raise SFFError(f"Invalid chunk tag {raw_tag!r} at offset {offset:08X}")
+            tag = raw_tag.decode("ascii")
+            end = offset + CHUNK_HEADER.size + length
+            if end > limit:
+                raise SFFError(f"Chunk {tag} at offset {offset:08X} overruns its container "
+                               f"({end:08X} > {limit:08X})")
+            chunks.append(Chunk(tag, offset, length, depth, parent))
+            if tag in CONTAINER_TAGS and length:
+                stack.append((end, len(chunks) - 1, depth + 1))
+                offset += CHUNK_HEADER.size
+            else:
+                offset = end
+
+        if not chunks or chunks[0].tag != "MThd":
+            raise SFFError("Missing MThd header chunk")
+        return cls(chunks, size)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __getitem__(self, index):
+        return self.chunks[index]
+
+    def top_level(self):
+        return [chunk for chunk in self.chunks if chunk.depth == 0]
+
+    def find(self, tag, top_level_only=False):
+        """Return the first chunk with the given tag, or None"""
+        for chunk in self.chunks:
+            if chunk.tag == tag and (chunk.depth == 0 or not top_level_only):
+                return chunk
+        return None
+
+    def find_all(self, tag):
+        return [chunk for chunk in self.chunks if chunk.tag == tag]
+
+    def children(self, index):
+        return [chunk for chunk in self.chunks if chunk.parent == index]
+
+    def ancestors(self, index):
+        """Return the indices of all containers enclosing chunk index, innermost first"""
+        result = []
+        parent = self.chunks[index].parent
+        while parent >= 0:
+            result.append(parent)
+            parent = self.chunks[parent].parent
+        return result
+
+    @property
+    def header_end(self):
+        """Offset just past the SMF header (MThd and the first MTrk)"""
+        top = self.top_level()
+        if len(top) > 1 and top[1].tag == "MTrk":
+            return top[1].end
+        return top[0].end
+
+    def span(self, *tags):
+        """Return (start, end) covering all top-level chunks with the given tags, or None"""
+        matches = [chunk for chunk in self.top_level() if chunk.tag in tags]
+        if not matches:
+            return None
+        return matches[0].offset, matches[-1].end
+
+    def audio_span(self):
+        return self.span(*AUDIO_TAGS)
+
+    def describe(self):
+        """Return a printable outline of the chunk tree"""
+        return "\n".join(f"{'  ' * chunk.depth}{chunk.tag} @ {chunk.offset:08X} ({chunk.length:,} bytes)"
+                         for chunk in self.chunks)
+
+
+class _ShiftTree:
+    """Fenwick tree of offset shifts: add a delta to every chunk from an index on"""
+
+    def __init__(self, size):
+        self.tree = [0] * (size + 1)
+
+    def add_from(self, index, delta):
+        index += 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def shift(self, index):
+        index += 1
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+
+class ChunkLayout:
+    """Chunk tree of an editable buffer, kept in step with its edits
+
+    edit() is called with every change to the buffer (see PieceTable.on_edit).
+    An edit that changes the length of a chunk payload adds the difference
+    to the length of the innermost chunk containing it and of each of its
+    ancestors (O(depth)), and shifts the header offsets of all later chunks
+    through a Fenwick tree (O(log n)); no part of the buffer is re-read.
+    apply() then patches just the length fields that changed.
+
+    Insertions exactly at a chunk boundary belong to the enclosing chunk,
+    so bytes inserted at the end of a payload are attributed to its parent.
+    Edits that cut through a chunk header or only part of a chunk cannot be
+    fixed up; they set stale, and the file has to be re-validated with
+    ChunkIndex.build before it is written.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.lengths = [chunk.length for chunk in index]
+        self.removed = set()
+        self.dirty = set()
+        self.stale = None  # Reason the layout no longer describes the buffer
+        self.size = index.size
+        self._shifts = _ShiftTree(len(index))
+
+    @classmethod
+    def build(cls, data):
+        return cls(ChunkIndex.build(data))
+
+    def offset(self, i):
+        return self.index[i].offset + self._shifts.shift(i)
+
+    def end(self, i):
+        return self.offset(i) + CHUNK_HEADER.size + self.lengths[i]
+
+    def _first_at_or_after(self, pos):
+        """Return the index of the first chunk whose header offset is >= pos"""
+        low, high = 0, len(self.index)
+        while low < high:
+            middle = (low + high) // 2
+            if self.offset(middle) < pos:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _containing(self, pos, last):
+        """Walk up from chunk last to the innermost live chunk whose extent contains pos"""
+        i = last
+        while i >= 0:
+            if i not in self.removed and self.offset(i) <= pos < self.end(i):
+                return i
+            i = self.index[i].parent
+        return -1
+
+    def edit(self, start, old_length, new_length):
+        """Record that old_length bytes at start were replaced by new_length bytes"""
+        if self.stale:
+            return
+        stop = start + old_length
+        delta = new_length - old_length
+        self.size += delta
+
+        if delta == 0:
+            # Overwrites only matter if they touch a chunk header
+            i = self._first_at_or_after(start - CHUNK_HEADER.size + 1)
+            while i < len(self.index) and self.offset(i) < stop:
+                if i not in self.removed:
+                    self.stale = f"chunk header at {self.offset(i):08X} was overwritten"
+                    return
+                i += 1
+            return
+
+        # Innermost chunk whose payload holds start; start == header offset belongs to the parent
+        parent = self._containing(start, self._first_at_or_after(start + 1) - 1)
+        if parent >= 0 and self.offset(parent) == start:
+            parent = self.index[parent].parent
+        if parent >= 0 and start < self.offset(parent) + CHUNK_HEADER.size:
+            self.stale = f"edit at {start:08X} cuts into the {self.index[parent].tag} header"
+            return
+
+        if old_length:
+            if parent >= 0 and stop > self.end(parent):
+                self.stale = f"edit at {start:08X} runs past the end of {self.index[parent].tag}"
+                return
+            # Every chunk holding the last removed byte must be removed completely
+            i = self._containing(stop - 1, self._first_at_or_after(stop) - 1)
+            while i != parent and i >= 0:
+                if self.offset(i) < start or self.end(i) > stop:
+                    self.stale = f"edit at {start:08X} removes only part of {self.index[i].tag}"
+                    return
+                i = self.index[i].parent
+
+        # Chunks inside the removed range collapse onto start, later ones shift by delta
+        first = self._first_at_or_after(start)
+        after = self._first_at_or_after(stop) if old_length else first
+        for i in range(first, after):
+            # Chunks removed earlier move too, so header offsets stay sorted for the bisects
+            self.removed.add(i)
+            self.dirty.discard(i)
+            move = start - self.offset(i)
+            if move:
+                self._shifts.add_from(i, move)
+                self._shifts.add_from(i + 1, -move)
+        self._shifts.add_from(after, delta)
+
+        while parent >= 0:
+            self.lengths[parent] += delta
+            self.dirty.add(parent)
+            parent = self.index[parent].parent
+
+    def fixups(self):
+        """Return (offset, bytes) patches for every length field that changed"""
+        return [(self.offset(i) + 4, struct.pack(">I", self.lengths[i])) for i in sorted(self.dirty)]
+
+    def apply(self, data):
+        """Write the pending length fields into data; returns the number patched"""
+        patches = self.fixups()
+        for offset, value in patches:
+            data[offset:offset + 4] = value
+        self.dirty.clear()
+        return len(patches)
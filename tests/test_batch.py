@@ -0,0 +1,35 @@
+import json
+import os
+import shutil
+
+import batch
+
+SAMPLE_AUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annapesha.aus")
+
+
+def test_bad_file_fails_alone(tmp_path):
+    source = tmp_path / "library"
+    (source / "sub").mkdir(parents=True)
+    shutil.copyfile(SAMPLE_AUS, source / "good.aus")
+    (source / "sub" / "bad.aus").write_bytes(b"not an aus file")
+    output = tmp_path / "styles"
+
+    summary = batch.run_batch(str(source), str(output), workers=1)
+
+    assert (summary["converted"], summary["failed"]) == (1, 1)
+    assert os.path.exists(output / "good.sty")
+    with open(output / "batch-summary.json", encoding="utf-8") as f:
+        failed = [entry for entry in json.load(f)["files"] if entry["status"] == "failed"]
+    assert [entry["input"] for entry in failed] == [str(source / "sub" / "bad.aus")]
+    assert failed[0]["error"].startswith("SFFError: ")
+
+
+def test_unexpected_error_is_recorded(tmp_path, monkeypatch):
+    def broken(aus_path, output_path, template_path=None):
+        raise ValueError("unpack requires a buffer of 4 bytes")
+
+    monkeypatch.setattr(batch, "convert_file", broken)
+    job = (SAMPLE_AUS, str(tmp_path / "out.sty"), None, "none", 0, None, None)
+    entry = batch.convert_one(job)
+    assert entry["status"] == "failed"
+    assert entry["error"] == "ValueError: unpack requires a buffer of 4 bytes"
@@ -0,0 +1,67 @@
+import mmap
+import random
+
+import pytest
+
+from buffers import EditJournal, PieceTable, SegmentedBuffer
+
+
+def test_detach_moves_pieces_and_journal_to_the_copy():
+    source = mmap.mmap(-1, 100)
+    source.write(bytes(range(100)))
+    table = PieceTable([source])
+    table.journal = EditJournal()
+    table.replace(10, 20, b"new")
+    view = SegmentedBuffer([source]).view(50, 60)
+    copy = source[:]
+
+    assert table.detach(source, copy)
+    assert view.detach(source, copy)
+    source.close()
+
+    assert table.tobytes() == bytes(range(10)) + b"new" + bytes(range(30, 100))
+    assert view.tobytes() == bytes(range(50, 60))
+    # Undo splices the journaled pieces back in; they must not read the closed map
+    table.journal.undo(table)
+    assert table.tobytes() == bytes(range(100))
+
+
+def test_detach_without_matching_pieces_is_a_no_op():
+    buffer = SegmentedBuffer([b"abc", b"def"])
+    assert not buffer.detach(object(), b"")
+    assert buffer.tobytes() == b"abcdef"
+
+
+def split_randomly(rng, data):
+    """Cut data into pieces of 1-3 bytes so that matches straddle several of them"""
+    pieces, pos = [], 0
+    while pos < len(data):
+        size = rng.randint(1, 3)
+        pieces.append(data[pos:pos + size])
+        pos += size
+    return SegmentedBuffer(pieces)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_matches_bytes_find_across_pieces(seed):
+    rng = random.Random(seed)
+    data = bytes(rng.choice(b"ab") for _ in range(200))
+    buffer = split_randomly(rng, data)
+    for _ in range(50):
+        sub = bytes(rng.choice(b"ab") for _ in range(rng.randint(0, 6)))
+        start = rng.randint(-5, 210)
+        end = rng.choice([None, rng.randint(-5, 210)])
+        assert buffer.find(sub, start, end) == data.find(sub, start, end), (sub, start, end)
+
+
+def test_slices_and_views_cross_pieces():
+    data = bytes(range(100))
+    buffer = split_randomly(random.Random(0), data)
+    assert buffer[:] == data
+    assert buffer[17:83] == data[17:83]
+    assert buffer[::7] == data[::7]
+    assert buffer[-1] == 99
+    assert buffer.view(10, 90)[5:15] == data[15:25]
+    pages = list(buffer.iter_pages(16, 3, 50))
+    assert [offset for offset, _ in pages] == [3, 19, 35]
+    assert b"".join(bytes(page) for _, page in pages) == data[3:50]
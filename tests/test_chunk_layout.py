@@ -0,0 +1,91 @@
+import random
+import struct
+
+import pytest
+
+from buffers import PieceTable
+from sff import CHUNK_HEADER, CONTAINER_TAGS, ChunkIndex, ChunkLayout
+
+# Whole chunks inserted by the edits; the layout does not track them
+INSERTED_TAG = "Junk"
+
+
+def chunk(tag, payload=b""):
+    return tag.encode("ascii") + struct.pack(">I", len(payload)) + payload
+
+
+def sample_style(rng):
+    """A small style: SMF header, nested CASM sections and AASM/AFil audio"""
+    def leaves(tags):
+        return b"".join(chunk(tag, bytes(rng.randrange(256) for _ in range(rng.randint(1, 40)))) for tag in tags)
+
+    casm = chunk("CASM", b"".join(chunk("CSEG", leaves(["Sdec", "Ctab", "Cntt"])) for _ in range(3)))
+    aasm = chunk("AASM", chunk("ASEG", leaves(["Anam", "Adat"])) + chunk("ASEG", leaves(["Anam"])))
+    afil = chunk("AFil", leaves(["Adat", "Adat", "Adat"]))
+    return chunk("MThd", bytes(6)) + chunk("MTrk", bytes(20)) + casm + aasm + afil
+
+
+def random_edit(rng, table, layout):
+    """Make one edit the layout can follow: inside a payload or of whole chunks"""
+    live = [i for i in range(len(layout.index)) if i not in layout.removed]
+    i = rng.choice(live)
+    container = layout.index[i].tag in CONTAINER_TAGS
+    start, end = layout.offset(i) + CHUNK_HEADER.size, layout.end(i)
+    kind = rng.random()
+    if kind < 0.4:
+        if container:
+            offset, data = start, chunk(INSERTED_TAG, b"ab")
+        else:
+            if end - start < 2:
+                return
+            offset, data = rng.randint(start + 1, end - 1), bytes(rng.randint(1, 20))
+        table.insert(offset, data)
+    elif kind < 0.7:
+        if container or end - start < 2:
+            return
+        first = rng.randint(start, end - 1)
+        table.delete(first, rng.randint(first + 1, end) - first)
+    elif kind < 0.85:
+        if layout.index[i].tag in ("MThd", "MTrk"):
+            return
+        table.delete(layout.offset(i), layout.end(i) - layout.offset(i))
+    else:
+        if container or end - start < 2:
+            return
+        first = rng.randint(start, end - 1)
+        table.replace(first, rng.randint(first, end) - first, b"\x01" * rng.randint(0, 9))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_fixups_match_rebuilt_index(seed):
+    rng = random.Random(seed)
+    table = PieceTable([sample_style(rng)])
+    layout = ChunkLayout.build(table)
+    table.on_edit = layout.edit
+    for _ in range(12):
+        random_edit(rng, table, layout)
+        assert not layout.stale
+        assert layout.size == len(table)
+
+    table.on_edit = None
+    layout.apply(table)
+    rebuilt = ChunkIndex.build(table)
+    tracked = [(layout.index[i].tag, layout.offset(i), layout.lengths[i])
+               for i in range(len(layout.index)) if i not in layout.removed]
+    assert tracked == [(c.tag, c.offset, c.length) for c in rebuilt if c.tag != INSERTED_TAG]
+
+
+def test_header_overwrite_marks_layout_stale():
+    table = PieceTable([sample_style(random.Random(0))])
+    layout = ChunkLayout.build(table)
+    casm = layout.index[2]
+    layout.edit(casm.offset + 4, 4, 4)
+    assert layout.stale
+
+
+def test_partial_chunk_removal_marks_layout_stale():
+    table = PieceTable([sample_style(random.Random(0))])
+    layout = ChunkLayout.build(table)
+    leaf = next(c for c in layout.index if c.tag == "Sdec")
+    layout.edit(leaf.offset + CHUNK_HEADER.size + 1, leaf.length + CHUNK_HEADER.size, 0)
+    assert layout.stale
@@ -0,0 +1,56 @@
+import os
+import struct
+
+import pytest
+
+from convert import build_style, convert_file, main
+from sff import SFFError
+
+
+def chunk(tag, payload=b""):
+    return tag.encode("ascii") + struct.pack(">I", len(payload)) + payload
+
+
+AUS_HEADER = chunk("MThd", b"\x00\x00\x00\x01\x01\xe0") + chunk("MTrk", b"aus track")
+AUS_AUDIO = chunk("AASM", chunk("ASEG", chunk("Anam", b"loop"))) + chunk("AFil", chunk("Adat", bytes(64)))
+AUS = AUS_HEADER + chunk("CASM", chunk("CSEG", chunk("Sdec", b"aus"))) + AUS_AUDIO
+TEMPLATE_SECTIONS = chunk("CASM", chunk("CSEG", chunk("Sdec", b"template"))) + chunk("OTSc", b"ots")
+TEMPLATE = (chunk("MThd", bytes(6)) + chunk("MTrk", b"template track") + TEMPLATE_SECTIONS
+            + chunk("AFil", chunk("Adat", b"old audio")))
+
+
+def test_build_style_takes_header_and_audio_from_aus_and_sections_from_template():
+    style = build_style(AUS, TEMPLATE)
+    assert style.tobytes() == AUS_HEADER + TEMPLATE_SECTIONS + AUS_AUDIO
+    # The result refers to the inputs instead of copying them
+    assert {id(source) for source in style.sources()} == {id(AUS), id(TEMPLATE)}
+
+
+def test_build_style_without_template_moves_audio_last():
+    assert build_style(AUS).tobytes() == AUS
+    audio_first = AUS_HEADER + AUS_AUDIO + chunk("CASM")
+    assert build_style(audio_first).tobytes() == AUS_HEADER + chunk("CASM") + AUS_AUDIO
+
+
+def test_build_style_requires_audio():
+    with pytest.raises(SFFError, match="No AASM/AFil"):
+        build_style(AUS_HEADER + chunk("CASM"), TEMPLATE)
+    with pytest.raises(SFFError):
+        build_style(AUS, TEMPLATE[:-2])
+
+
+def test_convert_file_streams_the_style(tmp_path):
+    (tmp_path / "song.aus").write_bytes(AUS)
+    (tmp_path / "template.sty").write_bytes(TEMPLATE)
+    output = str(tmp_path / "song.sty")
+    result = convert_file(str(tmp_path / "song.aus"), output, str(tmp_path / "template.sty"), block_size=7)
+    with open(output, "rb") as f:
+        assert f.read() == AUS_HEADER + TEMPLATE_SECTIONS + AUS_AUDIO
+    assert result.size == os.path.getsize(output)
+
+
+def test_failed_conversion_leaves_no_output(tmp_path, capsys):
+    (tmp_path / "bad.aus").write_bytes(AUS_HEADER)
+    assert main([str(tmp_path / "bad.aus")]) == 1
+    assert "invalid chunk structure" in capsys.readouterr().err
+    assert os.listdir(tmp_path) == ["bad.aus"]
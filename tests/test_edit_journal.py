@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from buffers import EditJournal, PieceTable
+
+
+def random_bytes(rng, count):
+    return bytes(rng.randrange(256) for _ in range(count))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_undo_all_restores_original_and_redo_restores_final(seed):
+    rng = random.Random(seed)
+    original = random_bytes(rng, 300)
+    table = PieceTable([original])
+    # Odd seeds coalesce small edits, even seeds never do
+    table.journal = journal = EditJournal(coalesce_seconds=10 if seed % 2 else 0)
+    for _ in range(40):
+        choice = rng.random()
+        size = len(table)
+        if choice < 0.5:
+            offset = rng.randint(0, size)
+            table.replace(offset, rng.randint(0, min(5, size - offset)), random_bytes(rng, rng.randint(0, 5)))
+            if rng.random() < 0.5:
+                journal.separate()
+        elif choice < 0.6 and size > 10:
+            offsets = sorted(rng.sample(range(0, size - 2, 3), 3))
+            table.replace_all(offsets, 2, b"xyz")
+        elif choice < 0.7:
+            with journal.group():
+                table.replace(0, 1, b"<")
+                table.replace(len(table) - 1, 1, b">")
+        elif choice < 0.85:
+            journal.undo(table)
+        else:
+            journal.redo(table)
+
+    final = table.tobytes()
+    undone = 0
+    while journal.can_undo():
+        journal.undo(table)
+        undone += 1
+    assert table.tobytes() == original
+    for _ in range(undone):
+        journal.redo(table)
+    assert table.tobytes() == final
+
+
+def test_group_undoes_as_one_step():
+    table = PieceTable([bytes(range(64))])
+    table.journal = journal = EditJournal()
+    with journal.group():
+        table[0:4] = b"aaaa"
+        table.insert(20, b"inserted")
+        table.delete(40, 3)
+    changed = table.tobytes()
+    assert journal.undo(table) == (0, None)
+    assert table.tobytes() == bytes(range(64))
+    assert not journal.can_undo()
+    journal.redo(table)
+    assert table.tobytes() == changed
+
+
+def test_typing_coalesces_into_one_step():
+    table = PieceTable([b""])
+    table.journal = journal = EditJournal()
+    for i, char in enumerate(b"hello"):
+        table.insert(i, bytes((char,)))
+    journal.undo(table)
+    assert table.tobytes() == b""
+    assert not journal.can_undo()
+
+
+def test_new_edit_clears_redo():
+    table = PieceTable([b"abcdef"])
+    table.journal = journal = EditJournal()
+    table.replace(0, 1, b"X")
+    journal.undo(table)
+    table.replace(1, 1, b"Y")
+    assert not journal.can_redo()
+    assert journal.redo(table) is None
+
+
+def test_history_is_bounded_by_bytes():
+    table = PieceTable([bytes(100)])
+    table.journal = journal = EditJournal(max_bytes=50, coalesce_seconds=0)
+    for offset in range(0, 100, 20):
+        table.replace(offset, 20, bytes(20))
+    assert journal.size <= 50
+    while journal.can_undo():
+        journal.undo(table)
+    assert len(table) == 100
+
+
+def test_coalescing_after_whole_history_was_evicted():
+    table = PieceTable([b""])
+    table.journal = journal = EditJournal(max_bytes=10)
+    # Small enough to coalesce but over the cap, so its step is dropped at once
+    table.insert(0, b"0123456789ab")
+    assert not journal.can_undo()
+    table.insert(12, b"c")
+    journal.undo(table)
+    assert table.tobytes() == b"0123456789ab"
@@ -0,0 +1,30 @@
+import time
+
+from buffers import PieceTable
+from hexdump import PageCache, format_lines
+
+
+def wait_for_pages(cache, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(cache._pages) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_prefetched_pages_follow_edits():
+    table = PieceTable([bytes(range(256)) * 16])
+    cache = PageCache(page_lines=8, prefetch=2)
+    try:
+        cache.get_lines(table, 0, 8, upper_offset=True)
+        # Edit the page being prefetched; whatever the worker stored must not be served for it
+        table.replace(8 * 16, 4, b"EDIT")
+        wait_for_pages(cache, 3)
+        assert cache.get_lines(table, 8, 8, upper_offset=True) == format_lines(
+            table[8 * 16:16 * 16], 8 * 16, upper_offset=True)
+        # The page after it was prefetched at the current generation and is a hit
+        wait_for_pages(cache, 5)
+        hits = cache.hits
+        assert cache.get_lines(table, 16, 8, upper_offset=True) == format_lines(
+            table[16 * 16:24 * 16], 16 * 16, upper_offset=True)
+        assert cache.hits == hits + 1
+    finally:
+        cache.close()
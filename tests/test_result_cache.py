@@ -0,0 +1,67 @@
+import os
+
+from cache import ResultCache
+
+
+def make_result(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(name.encode("ascii")[:1] * size)
+    return str(path)
+
+
+def store(cache, tmp_path, key, size, mtime):
+    """Put a result of size bytes under key and date it mtime, so LRU order is explicit"""
+    path = cache.put(key, make_result(tmp_path, key, size))
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_eviction_keeps_cache_under_max_bytes(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    store(cache, tmp_path, "a", 100, 1000)
+    store(cache, tmp_path, "b", 100, 2000)
+    assert cache.evictions == 0
+
+    store(cache, tmp_path, "c", 100, 3000)
+    assert cache.evictions == 1
+    assert cache.open("a") is None
+    for key in ("b", "c"):
+        with cache.open(key) as f:
+            assert len(f.read()) == 100
+    sizes = [entry.stat().st_size for entry in os.scandir(cache.directory)]
+    assert sum(sizes) <= 250
+
+
+def test_hit_refreshes_entry(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    store(cache, tmp_path, "a", 100, 1000)
+    store(cache, tmp_path, "b", 100, 2000)
+    # Reading "a" makes it the most recently used, so "b" is evicted instead
+    cache.open("a").close()
+    cache.put("c", make_result(tmp_path, "c", 100))
+    assert cache.open("b") is None
+    with cache.open("a") as f:
+        assert len(f.read()) == 100
+
+
+def test_oversized_result_is_evicted_at_once(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=50)
+    path = cache.put("big", make_result(tmp_path, "big", 100))
+    assert not os.path.exists(path)
+    assert cache.evict() == 0
+
+
+def test_key_depends_on_content_and_template(tmp_path):
+    first = make_result(tmp_path, "x1", 10)
+    same = make_result(tmp_path, "x2", 10)
+    other = make_result(tmp_path, "y", 10)
+    assert ResultCache.key(first) == ResultCache.key(same)
+    assert ResultCache.key(first) != ResultCache.key(other)
+    assert ResultCache.key(first) != ResultCache.key(first, other)
+
+
+def test_miss_counts_once_when_rechecked(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert cache.open("missing") is None
+    assert cache.open("missing", count_miss=False) is None
+    assert (cache.hits, cache.misses) == (0, 1)
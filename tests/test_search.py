@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+import search
+from buffers import PieceTable, SegmentedBuffer
+from search import BytePattern, SearchJob, find_all, parse_search_text
+
+
+def brute_force(data, needle, overlapping=True):
+    results, pos = [], data.find(needle)
+    while pos >= 0:
+        results.append(pos)
+        pos = data.find(needle, pos + (1 if overlapping else len(needle)))
+    return results
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_all_across_windows(seed, monkeypatch):
+    # Tiny windows so that many matches straddle a window boundary
+    monkeypatch.setattr(search, "SEARCH_CHUNK", 7)
+    rng = random.Random(seed)
+    data = bytes(rng.choice(b"ab") for _ in range(300))
+    buffer = SegmentedBuffer([data[:100], data[100:101], data[101:]])
+    for _ in range(20):
+        needle = bytes(rng.choice(b"ab") for _ in range(rng.randint(1, 9)))
+        for overlapping in (True, False):
+            assert find_all(buffer, needle, overlapping=overlapping) == brute_force(data, needle, overlapping)
+        start, end = sorted(rng.sample(range(301), 2))
+        assert find_all(data, needle, start, end) == [start + hit for hit in brute_force(data[start:end], needle)]
+
+
+def test_find_all_limit_and_stop(monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_CHUNK", 10)
+    data = b"x" * 100
+    assert find_all(data, b"xx", limit=5) == [0, 1, 2, 3, 4]
+    stops = []
+    results = find_all(data, b"x", should_stop=lambda offset: stops.append(offset) or len(stops) == 2)
+    assert results == list(range(20))
+
+
+def test_search_job_reads_a_snapshot():
+    table = PieceTable([b"..AB.." * 100])
+    job = SearchJob(table, b"AB")
+    # Edits made after the job was created are not seen by it
+    table.replace(0, len(table), b"nothing here")
+    job.start()._thread.join()
+    assert job.error is None
+    assert job.results == list(range(2, 600, 6))
+    assert bytes(job.data[2:4]) == b"AB"
+
+
+def pattern_matches(pattern, value):
+    return bool(pattern.regex.match(bytes([value])))
+
+
+def test_byte_pattern_tokens():
+    assert [v for v in range(256) if pattern_matches(BytePattern("4?"), v)] == list(range(0x40, 0x50))
+    assert [v for v in range(256) if pattern_matches(BytePattern("?c"), v)] == list(range(0x0C, 0x100, 0x10))
+    assert [v for v in range(256) if pattern_matches(BytePattern("[10-1f]"), v)] == list(range(0x10, 0x20))
+    # "??" matches newlines too
+    assert all(pattern_matches(BytePattern("??"), v) for v in range(256))
+    exact = BytePattern("0x2E 5c")
+    assert exact.exact and exact.literal == b".\\" and len(exact) == 2
+
+
+@pytest.mark.parametrize("text", ["", "F", "G0", "[20-10]", "F0 [1-2]"])
+def test_byte_pattern_rejects_bad_syntax(text):
+    with pytest.raises(ValueError):
+        BytePattern(text)
+
+
+def test_parse_search_text_uses_literal_for_exact_patterns():
+    assert parse_search_text("F0 43", "pattern") == b"\xf0C"
+    assert isinstance(parse_search_text("F0 ?? 43", "pattern"), BytePattern)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pattern_search_across_windows(seed, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_CHUNK", 5)
+    rng = random.Random(seed)
+    data = bytes(rng.choice(b"\x10\x43\x4c\xf0") for _ in range(300))
+    pattern = BytePattern("F0 ?? 4? [40-4C]")
+    expected = [m.start() for m in pattern.regex.finditer(data)]
+    assert find_all(SegmentedBuffer([data[:150], data[150:]]), pattern) == expected
+    # Non-overlapping results skip any match that starts inside the previous one
+    kept = []
+    for hit in expected:
+        if not kept or hit >= kept[-1] + len(pattern):
+            kept.append(hit)
+    assert find_all(data, pattern, overlapping=False) == kept
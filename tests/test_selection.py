@@ -0,0 +1,55 @@
+import pytest
+
+from buffers import SegmentedBuffer
+from hexdump import format_lines
+from selection import Selection, index_to_offset
+
+DATA = bytes(range(65, 91)) * 8  # Printable, so the ASCII column shows the bytes themselves
+
+
+def text_at(lines, start, end):
+    """Read a Text-style "line.col" range out of rendered dump lines"""
+    line, first = map(int, start.split("."))
+    end_line, last = map(int, end.split("."))
+    assert line == end_line
+    return lines[line - 1][first:last]
+
+
+@pytest.mark.parametrize("start, end", [(0, 1), (5, 40), (16, 32), (31, 33), (3, 200), (150, 208)])
+def test_tag_ranges_cover_exactly_the_selected_bytes(start, end):
+    first_line, line_count = 2, 6
+    lines = format_lines(DATA[first_line * 16:(first_line + line_count) * 16], first_line * 16).splitlines()
+    ranges = Selection(start, end).tag_ranges(first_line, line_count)
+    hex_parts = [text_at(lines, *r) for r in ranges[0::2]]
+    ascii_parts = [text_at(lines, *r) for r in ranges[1::2]]
+    # Only the part of the selection on the visible rows is tagged
+    visible = DATA[max(start, first_line * 16):min(end, (first_line + line_count) * 16)]
+    assert bytes.fromhex(" ".join(hex_parts)) == visible
+    assert "".join(ascii_parts).encode("ascii") == visible
+
+
+def test_selection_off_screen_has_no_ranges():
+    assert Selection(0, 16).tag_ranges(2, 6) == []
+    assert Selection(200, 208).tag_ranges(2, 6) == []
+    assert Selection().tag_ranges(0, 6) == []
+
+
+def test_index_to_offset_from_both_columns():
+    # Row 3 on screen, from first_line 2, is buffer row 4
+    assert index_to_offset("3.10", 2) == 64
+    assert index_to_offset("3.14", 2) == 65
+    assert index_to_offset("3.57", 2) == 79
+    assert index_to_offset("3.59", 2) == 64
+    assert index_to_offset("3.74", 2) == 79
+    # Offset and separator columns clamp to the row's first byte
+    assert index_to_offset("3.0", 2) == 64
+
+
+def test_copy_is_a_view_and_selection_is_normalised():
+    selection = Selection(40, 10)
+    assert (selection.start, selection.end, len(selection)) == (10, 40, 30)
+    copied = selection.copy(DATA)
+    assert isinstance(copied, SegmentedBuffer)
+    assert copied.sources()[0] is DATA
+    assert copied.tobytes() == DATA[10:40]
+    assert len(Selection(200, 300).copy(DATA)) == 8
@@ -0,0 +1,54 @@
+import struct
+
+import pytest
+
+from buffers import SegmentedBuffer
+from sff import ChunkIndex, SFFError
+
+
+def chunk(tag, payload=b""):
+    return tag.encode("ascii") + struct.pack(">I", len(payload)) + payload
+
+
+HEADER = chunk("MThd", bytes(6)) + chunk("MTrk", bytes(10))
+CASM = chunk("CASM", chunk("CSEG", chunk("Sdec", b"sdec") + chunk("Ctab", bytes(12))))
+AUDIO = chunk("AASM", chunk("ASEG", chunk("Anam", b"kick"))) + chunk("AFil", chunk("Adat", bytes(32)))
+
+
+def test_build_indexes_nested_chunks_in_order():
+    index = ChunkIndex.build(HEADER + CASM + AUDIO)
+    assert [(c.tag, c.depth) for c in index] == [
+        ("MThd", 0), ("MTrk", 0), ("CASM", 0), ("CSEG", 1), ("Sdec", 2), ("Ctab", 2),
+        ("AASM", 0), ("ASEG", 1), ("Anam", 2), ("AFil", 0), ("Adat", 1)]
+    sdec = index.find("Sdec")
+    assert index.ancestors(index.chunks.index(sdec)) == [3, 2]
+    assert (HEADER + CASM)[sdec.data_offset:sdec.end] == b"sdec"
+    assert index.size == len(HEADER + CASM + AUDIO)
+
+
+def test_header_end_and_audio_span():
+    index = ChunkIndex.build(HEADER + CASM + AUDIO)
+    assert index.header_end == len(HEADER)
+    assert index.audio_span() == (len(HEADER + CASM), len(HEADER + CASM + AUDIO))
+    assert ChunkIndex.build(HEADER + CASM).audio_span() is None
+    # Without an MTrk the header is MThd alone
+    assert ChunkIndex.build(chunk("MThd", bytes(6)) + CASM).header_end == 14
+
+
+def test_build_reads_segmented_buffers():
+    data = HEADER + CASM + AUDIO
+    pieces = SegmentedBuffer([data[:5], data[5:51], data[51:]])
+    expected = [(c.tag, c.offset, c.length) for c in ChunkIndex.build(data)]
+    assert [(c.tag, c.offset, c.length) for c in ChunkIndex.build(pieces)] == expected
+
+
+@pytest.mark.parametrize("data, message", [
+    (HEADER + CASM[:-3], "overruns its container"),
+    (HEADER + b"CAS", "Truncated chunk header"),
+    (HEADER + b"\x00\x01\x02\x03" + bytes(4), "Invalid chunk tag"),
+    (CASM + HEADER, "Missing MThd"),
+    (HEADER + chunk("CASM", b"CSEG" + struct.pack(">I", 20) + bytes(6)), "overruns its container"),
+], ids=["truncated payload", "truncated header", "bad tag", "no MThd", "child overruns parent"])
+def test_build_rejects_broken_structure(data, message):
+    with pytest.raises(SFFError, match=message):
+        ChunkIndex.build(data)
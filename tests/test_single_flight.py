@@ -0,0 +1,202 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+from cache import ResultCache
+from service import AsyncSingleFlight, SingleFlight, convert_cached, convert_cached_async
+
+
+class CountingPool:
+    """Stands in for WorkerPool: "converts" by copying, slowly enough for requests to overlap"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.jobs = 0
+        self._lock = threading.Lock()
+
+    def submit(self, aus_path, output_path, template_path=None):
+        with self._lock:
+            self.jobs += 1
+        time.sleep(self.delay)
+        shutil.copyfile(aus_path, output_path)
+
+    run = submit
+
+    def admit(self):
+        pass
+
+    def release_slot(self):
+        pass
+
+
+@pytest.fixture
+def upload(tmp_path):
+    path = tmp_path / "song.aus"
+    path.write_bytes(b"AUS" * 1000)
+    return str(path)
+
+
+def test_concurrent_identical_requests_convert_once(tmp_path, upload):
+    pool = CountingPool()
+    cache = ResultCache(str(tmp_path / "cache"))
+    flights = SingleFlight()
+    start = threading.Barrier(8)
+    results = [None] * 8
+    errors = []
+
+    def request(i):
+        try:
+            start.wait()
+            with convert_cached(pool, cache, flights, upload, str(tmp_path / f"out{i}.sty")) as f:
+                results[i] = f.read()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert pool.jobs == 1
+    assert flights.shared == 7
+    assert results == [b"AUS" * 1000] * 8
+
+
+def test_later_identical_request_is_served_from_cache(tmp_path, upload):
+    pool = CountingPool(delay=0)
+    cache = ResultCache(str(tmp_path / "cache"))
+    flights = SingleFlight()
+    convert_cached(pool, cache, flights, upload, str(tmp_path / "first.sty")).close()
+    with convert_cached(pool, cache, flights, upload, str(tmp_path / "second.sty")) as f:
+        assert f.read() == b"AUS" * 1000
+    assert pool.jobs == 1
+    assert cache.hits == 1
+
+
+def test_leader_rechecks_cache(tmp_path, upload):
+    pool = CountingPool(delay=0)
+    cache = ResultCache(str(tmp_path / "cache"))
+    key = cache.key(upload)
+    shutil.copyfile(upload, cache.path(key))
+    # The result lands between this request's miss and its turn as leader
+    first_open = cache.open
+    cache.open = lambda key, count_miss=True: None if count_miss else first_open(key, count_miss)
+    with convert_cached(pool, cache, SingleFlight(), upload, str(tmp_path / "out.sty")) as f:
+        assert f.read() == b"AUS" * 1000
+    assert pool.jobs == 0
+
+
+def test_single_flight_shares_errors():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        started.set()
+        release.wait()
+        raise ValueError("bad input")
+
+    outcomes = []
+
+    def call():
+        try:
+            flights.do("key", fail)
+        except ValueError as e:
+            outcomes.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flights.shared == 0:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+    assert calls == [1]
+    assert outcomes == ["bad input", "bad input"]
+
+
+def run_requests(*coroutines):
+    async def main():
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+    return asyncio.run(main())
+
+
+def test_async_identical_requests_convert_once(tmp_path, upload):
+    pool = CountingPool()
+    cache = ResultCache(str(tmp_path / "cache"))
+    flights = AsyncSingleFlight()
+
+    async def request(i):
+        f = await convert_cached_async(pool, cache, flights, None, upload, str(tmp_path / f"out{i}.sty"))
+        with f:
+            return f.read()
+
+    assert run_requests(*(request(i) for i in range(8))) == [b"AUS" * 1000] * 8
+    assert pool.jobs == 1
+    assert flights.shared == 7
+
+
+def test_async_follower_survives_cancelled_leader(tmp_path, monkeypatch):
+    job_dirs = tmp_path / "jobs"
+    job_dirs.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(job_dirs))
+    pool = CountingPool(delay=0.3)
+    cache = ResultCache(str(tmp_path / "cache"))
+    flights = AsyncSingleFlight()
+
+    async def request(name):
+        # Like async_server.convert: the upload lives in a directory removed on the way out
+        work_dir = tmp_path / name
+        work_dir.mkdir()
+        upload = work_dir / "input.aus"
+        upload.write_bytes(b"AUS" * 1000)
+        try:
+            f = await convert_cached_async(pool, cache, flights, None, str(upload), str(work_dir / "out.sty"))
+            with f:
+                return f.read()
+        finally:
+            shutil.rmtree(work_dir)
+
+    async def main():
+        leader = asyncio.ensure_future(request("leader"))
+        while not flights._flights:
+            await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(request("follower"))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert not (tmp_path / "leader").exists()
+        return await follower
+
+    assert asyncio.run(main()) == b"AUS" * 1000
+    assert pool.jobs == 1
+    assert flights.shared == 1
+    # The job's own copy of the inputs is gone once it finishes
+    assert not os.listdir(job_dirs)
+
+
+def test_async_flight_shares_errors():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("bad input")
+
+    outcomes = run_requests(flights.do("key", lambda: fail()), flights.do("key", lambda: fail()))
+    assert calls == [1]
+    assert [str(e) for e in outcomes] == ["bad input", "bad input"]
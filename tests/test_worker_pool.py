@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+
+from service import JobTimeout, PoolBusy, WorkerPool
+from sff import SFFError
+
+SAMPLE_AUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "annapesha.aus")
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**options):
+        pools.append(WorkerPool(**options))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_run_converts_in_a_worker(tmp_path, make_pool):
+    pool = make_pool(workers=1)
+    output = str(tmp_path / "out.sty")
+    assert pool.submit(SAMPLE_AUS, output) == os.path.getsize(SAMPLE_AUS)
+    with open(output, "rb") as f, open(SAMPLE_AUS, "rb") as original:
+        assert f.read() == original.read()
+
+    (tmp_path / "bad.aus").write_bytes(b"not an aus file")
+    with pytest.raises(SFFError):
+        pool.submit(str(tmp_path / "bad.aus"), str(tmp_path / "bad.sty"))
+    assert pool.completed == 2
+    assert pool.pending == 0
+
+
+def test_admission_is_bounded(make_pool):
+    pool = make_pool(workers=1, queue_size=1)
+    pool.admit()
+    pool.admit()
+    with pytest.raises(PoolBusy) as busy:
+        pool.admit()
+    assert busy.value.retry_after >= 1
+    assert (pool.pending, pool.rejected) == (2, 1)
+    pool.release_slot()
+    pool.admit()
+    pool.release_slot()
+    pool.release_slot()
+    assert pool.pending == 0
+
+
+def test_queue_timeout_when_no_worker_frees_up(tmp_path, make_pool):
+    pool = make_pool(workers=1, queue_timeout=0.1)
+    # Hold the only worker as if a long job were running on it
+    worker = pool._idle.get()
+    try:
+        with pytest.raises(PoolBusy, match="No worker became free"):
+            pool.submit(SAMPLE_AUS, str(tmp_path / "out.sty"))
+    finally:
+        pool._idle.put(worker)
+    assert pool.rejected == 1
+    assert pool.pending == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a FIFO to block the worker")
+def test_job_over_timeout_gets_a_new_worker(tmp_path, make_pool):
+    pool = make_pool(workers=1, timeout=0.5)
+    fifo = str(tmp_path / "stuck.aus")
+    # Opening a FIFO with no writer blocks the conversion until the worker is killed
+    os.mkfifo(fifo)
+    stuck_pid = pool._idle.queue[0].process.pid
+    with pytest.raises(JobTimeout):
+        pool.submit(fifo, str(tmp_path / "stuck.sty"))
+    assert pool._idle.queue[0].process.pid != stuck_pid
+    assert pool.submit(SAMPLE_AUS, str(tmp_path / "out.sty")) == os.path.getsize(SAMPLE_AUS)
+
+
+def test_workers_are_recycled_after_max_jobs(tmp_path, make_pool):
+    pool = make_pool(workers=1, max_jobs=2)
+    pids = []
+    for i in range(3):
+        pids.append(pool._idle.queue[0].process.pid)
+        pool.submit(SAMPLE_AUS, str(tmp_path / f"out{i}.sty"))
+    assert pids[0] == pids[1] != pids[2]